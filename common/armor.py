@@ -22,20 +22,57 @@
 Record data and attempt to find exact armor formula
 """
 
+import functools
 from math import sqrt, log, log10
+from typing import Union
 
-import matplotlib.pyplot as plt
+import numpy
 
 armor_table = {0: 0, 0.5: 3.10, 1: 5.91, 1.5: 8.48, 2: 10.83, 3: 15.00, 4: 18.57, 4.5: 20.17, 5: 21.67, 6: 24.37,
                6.5: 25.61, 7: 26.78, 8: 28.89, 9: 30.79, 9.5: 31.67, 10: 32.50}
 """Known armor value"""
 
-def armor_reduction(armor_level: int) -> float:
+ARMOR_FORMULA_A, ARMOR_FORMULA_B = 23.648706120050402, 0.29522394769958915
+"""Coefficients of the best fitted armor formula f(x) = a * log(b * x + 1) (see f)"""
+
+_measured_levels = numpy.array(sorted(armor_table), dtype=float)
+_measured_residuals = (numpy.array([armor_table[level] for level in sorted(armor_table)])
+                       - ARMOR_FORMULA_A * numpy.log(ARMOR_FORMULA_B * _measured_levels + 1))
+
+
+def armor_value(armor_level: Union[float, numpy.ndarray]) -> Union[float, numpy.ndarray]:
     """
-    :param armor_level: int, level of armor to apply (after subtraction of the attacker armor piercing)
-    :return: float, damage reduction factor for the corresponding armor value
+    Vectorized armor curve: return the damage reduction percentage of any armor level, exact at the measured levels
+    of armor_table.
+
+    Between measured levels, the fitted formula is corrected by the linear interpolation of its error on the
+    surrounding measured levels. Beyond the last measured level, the fitted formula is used as is. Negative levels
+    (armor piercing greater than the armor) give no reduction.
+
+    :param armor_level: float or numpy array, armor level(s) (after subtraction of the attacker armor piercing)
+    :return: float or numpy array of the same shape, damage reduction percentage(s)
     """
-    return (100 - armor_table[max(0, armor_level)]) / 100
+    levels = numpy.maximum(numpy.asarray(armor_level, dtype=float), 0)
+    values = (ARMOR_FORMULA_A * numpy.log(ARMOR_FORMULA_B * levels + 1)
+              + numpy.interp(levels, _measured_levels, _measured_residuals, right=0.))
+    return values if values.ndim else float(values)
+
+
+@functools.lru_cache(maxsize=1024)
+def _scalar_armor_reduction(armor_level: float) -> float:
+    return (100 - armor_value(armor_level)) / 100
+
+
+def armor_reduction(armor_level: Union[float, numpy.ndarray]) -> Union[float, numpy.ndarray]:
+    """
+    :param armor_level: float, numpy array or list, level(s) of armor to apply (after subtraction of the attacker
+        armor piercing), fractional levels are supported
+    :return: float or numpy array of the same shape, damage reduction factor for the corresponding armor value
+    """
+    if isinstance(armor_level, numpy.ndarray) or numpy.ndim(armor_level) > 0:
+        return (100 - armor_value(armor_level)) / 100
+    # Units evaluate the same few levels over and over, don't pay the numpy overhead for each of them
+    return _scalar_armor_reduction(armor_level)
 
 
 def g(x, a, b):
@@ -67,7 +104,7 @@ def f(x):
     #return 23 * log(0.3 * x + 1)
     #return 24.221188606718492 * log(0.28587109374999997 * x + 1)  # minimum by first dicotomy
     # return 24.0954206844332 * log(0.2886886886886887 * x + 1)  # minimum by first brute force
-    return 23.648706120050402 * log(0.29522394769958915 * x + 1)   # minimum by second dicotomy
+    return ARMOR_FORMULA_A * log(ARMOR_FORMULA_B * x + 1)   # minimum by second dicotomy
     #return 24.11859783964244 * log(0.2883883883883884 * x + 1)  # minimum by second brute force
 
     #return -0.20119 * x**2 + 5.00148 * x + 1.712
@@ -84,6 +121,9 @@ def f(x):
 
 
 if __name__ == '__main__':
+    # Only needed to visualize the fitting, imported here to keep matplotlib out of the units import time
+    import matplotlib.pyplot as plt
+
     # We guess that armor formula has this form. It always satify our first point g(0) = 0
     def g(a, b, x):
         return a * log(b * x + 1)
@@ -123,16 +163,12 @@ if __name__ == '__main__':
                 close_enough = True
         best_a, best_b = new_a, new_b
     else:
-        # Brute force
-        import numpy
-        best_a, best_b, best_error = None, None, None
-        for b in numpy.linspace(0.2, 0.3, 1000):
-            #print(b)
-            estimated_a = deduce_a(b)[1]
-            for a in numpy.linspace(estimated_a - 5, estimated_a + 5, 1000):
-                error = sum((armor_table[x] - round(g(a, b, x), 2))**2 for x in armor_table)
-                if best_error is None or best_error > error:
-                    best_a, best_b, best_error = a, b, error
+        # Brute force on a 1000x1000 grid (evaluated at once by numpy), then refined by least squares
+        from utils.curve_fitting import fit_curve
+        fit = fit_curve(lambda x, a, b: a * numpy.log(b * x + 1), list(armor_table), list(armor_table.values()),
+                        [numpy.linspace(15, 35, 1000), numpy.linspace(0.2, 0.3, 1000)], parameter_names=['a', 'b'])
+        print(fit)
+        best_a, best_b = fit.parameters
 
 
     print("Formla found: g(x) = {a} * log({b} * x + 1)".format(a=best_a, b=best_b))
@@ -160,7 +196,4 @@ if __name__ == '__main__':
 
 #print(f(0))
 
-for k in range(30):
-    armor_table.setdefault(k, f(k))
-
 
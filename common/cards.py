@@ -39,6 +39,8 @@ class Upgradable(Displayable):
     upgrade_costs: List[ResourcePacket] = []
     # FIXME: fill <get_upgrade> for all unit and all level, or find an approximation formula
     #        to predict it (cf economy/analyse_costs.py)
+    #        [economy/cost_models.py fits the growth curves shared by the cards, and its
+    #        CostModel.completed_upgrade_costs fills the missing levels with predictions]
     base_building: 'Type[Building]' = None
     """The building that must be built/upgraded to unlock/upgrade this unit"""
     base_building_level = 1
@@ -30,6 +30,7 @@ class.
 """
 
 
+import functools
 import itertools
 from collections import defaultdict
 from enum import Enum
@@ -55,6 +56,7 @@ class ResourceQuantity:
         self.quantity = quantity
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def compatible_types(main_type: VALID_RESOURCE_TYPE,
                          other_type: VALID_RESOURCE_TYPE):
         # Simple test for common cases where ResourceQuantity are only of type Resources enum.
@@ -253,8 +255,7 @@ class ResourcePacket(defaultdict):
 
     def copy(self):
         new_dict = type(self)()
-        for res_type in self:
-            new_dict[res_type] = self[res_type]
+        new_dict.update(self)
         return new_dict
 
     def __add__(self, other: Union['ResourcePacket', ResourceQuantity]):
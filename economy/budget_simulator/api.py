@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Headless HTTP API of the budget simulator, served by the same Flask server as the Dash application.
+
+Routes:
+- GET  /api/parameters: list the simulation parameters, their type and valid values.
+- POST /api/simulate: body {"parameters": {parameter_name: value}}, return the incomes of every gain.
+- POST /api/simulate/batch: body {"base": {parameter_name: value}, "points": [{parameter_name: value}, ...]}, return
+  the incomes of every gain for each point.
+- GET  /metrics: latency and cache metrics of the server, in the Prometheus text format (see register_metrics).
+
+Values are given as in UIParameter.parse_value (e.g. {"vip": "lvl7", "hq_lvl": 18, "collection_schedule": [8, 20]}),
+missing parameters take their default UI value.
+
+Incomes are returned as JSON: {"gains": [[category, gain name], ...], "resources": [resource type, ...],
+"incomes": matrix (points x) gains x resources}, invalid points having null incomes. Add `?format=arrow` to get a long
+format Apache Arrow stream (point, category, gain, resource, quantity) instead, if pyarrow is installed.
+
+Example:
+
+    curl -X POST -H "Content-Type: application/json" -d '{"parameters": {"vip": "lvl10"}}' \
+         http://127.0.0.1:8050/api/simulate
+"""
+import io
+import json
+import os
+from typing import Dict, Any, List, Optional
+
+import flask
+import numpy
+
+from economy.budget_simulator import parameters as simulation_parameters
+from economy.budget_simulator.result_cache import ResultCache, cache_key
+from economy.budget_simulator.simulation import all_parameters, default_parameter_values, resource_types_by_repr, \
+    serialize_incomes, update_income
+from utils.metrics import MetricsRegistry, METRICS
+
+MAX_BATCH_SIZE = 1000
+
+ARROW_MIME_TYPE = "application/vnd.apache.arrow.stream"
+
+PROMETHEUS_MIME_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class ApiError(Exception):
+    """Invalid request, reported to the client with the given HTTP status code"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_parameters(raw_parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert parameters given by name with serialized values into a parameter value dict"""
+    try:
+        return simulation_parameters.parse_parameters(raw_parameters)
+    except ValueError as error:
+        raise ApiError("{} (see /api/parameters)".format(error))
+
+
+def _point_result(incomes_records: Optional[List[list]]) -> Dict[str, Any]:
+    """JSON form of the incomes of a single point (with only its non null gains and resources)"""
+    if incomes_records is None:
+        return {'gains': [], 'resources': [], 'incomes': None}
+    records = [(category, gain, {resource: quantity for resource, quantity in quantities.items() if quantity != 0})
+               for category, gain, quantities in incomes_records]
+    records = [record for record in records if record[2]]
+    resource_order = {resource: k for k, resource in enumerate(resource_types_by_repr())}
+    resources = sorted({resource for _, _, quantities in records for resource in quantities},
+                       key=lambda resource: (resource_order.get(resource, len(resource_order)), resource))
+    return {
+        'gains': [[category, gain] for category, gain, _ in records],
+        'resources': resources,
+        'incomes': [[quantities.get(resource, 0) for resource in resources] for _, _, quantities in records],
+        }
+
+
+def simulate_points(points: List[Dict[str, Any]], result_cache: Optional[ResultCache] = None) -> List[Dict[str, Any]]:
+    """
+    Return the JSON form of the incomes of each point (complete parameter value dicts).
+
+    Incomes are shared with the Dash callbacks through the result cache: they are stored as {'incomes': records} (see
+    simulation.serialize_incomes) under cache_key(point), like in SimulationStore, invalid points having null records.
+    """
+    results = []
+    for point in points:
+        key = cache_key(point)
+        entry = result_cache.get(key) if result_cache is not None else None
+        if not isinstance(entry, dict) or 'incomes' not in entry:
+            try:
+                entry = {'incomes': serialize_incomes(update_income(point))}
+            except (AssertionError, IndexError):
+                # Incompatible parameter values (e.g. more convoys lost than convoys sent)
+                entry = {'incomes': None}
+            if result_cache is not None:
+                result_cache.put(key, entry)
+        results.append(_point_result(entry['incomes']))
+    return results
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the results of several points into a single points x gains x resources matrix"""
+    gains = []
+    resources = []
+    for result in results:
+        gains.extend(gain for gain in result['gains'] if gain not in gains)
+        resources.extend(resource for resource in result['resources'] if resource not in resources)
+    gain_indexes = {tuple(gain): k for k, gain in enumerate(gains)}
+    resource_indexes = {resource: k for k, resource in enumerate(resources)}
+
+    incomes = numpy.zeros((len(results), len(gains), len(resources)))
+    for k, result in enumerate(results):
+        if result['incomes'] is None:
+            incomes[k] = numpy.nan
+        elif result['gains']:
+            incomes[k][numpy.ix_([gain_indexes[tuple(gain)] for gain in result['gains']],
+                                 [resource_indexes[resource] for resource in result['resources']])] = \
+                result['incomes']
+    return {'gains': gains, 'resources': resources, 'incomes': incomes}
+
+
+def _json_incomes(incomes: numpy.ndarray):
+    """Convert an income array to nested lists, invalid points (NaN) becoming null"""
+    if incomes.ndim == 2:
+        return None if numpy.isnan(incomes).any() else incomes.tolist()
+    return [_json_incomes(point_incomes) for point_incomes in incomes]
+
+
+def _arrow_response(merged: Dict[str, Any]) -> flask.Response:
+    try:
+        import pyarrow
+    except ImportError:
+        raise ApiError("Arrow format is not available on this server (pyarrow is not installed)", 406)
+    point, gain, resource = numpy.nonzero(numpy.nan_to_num(merged['incomes'], nan=0.))
+    table = pyarrow.table({
+        'point': pyarrow.array(point, type=pyarrow.int32()),
+        'category': pyarrow.array([merged['gains'][k][0] for k in gain], type=pyarrow.string()),
+        'gain': pyarrow.array([merged['gains'][k][1] for k in gain], type=pyarrow.string()),
+        'resource': pyarrow.array([merged['resources'][k] for k in resource], type=pyarrow.string()),
+        'quantity': pyarrow.array(merged['incomes'][point, gain, resource], type=pyarrow.float64()),
+        })
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return flask.Response(sink.getvalue(), mimetype=ARROW_MIME_TYPE)
+
+
+def _json_body() -> Dict[str, Any]:
+    body = flask.request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ApiError("Request body must be a JSON object")
+    return body
+
+
+def _wants_arrow() -> bool:
+    return (flask.request.args.get('format') == 'arrow'
+            or flask.request.accept_mimetypes.best == ARROW_MIME_TYPE)
+
+
+def register_api(server: flask.Flask, result_cache: Optional[ResultCache] = None, url_prefix: str = "/api"):
+    """
+    Add the API routes to the Flask server
+
+    :param server: the Flask server of the Dash application
+    :param result_cache: the result cache shared with the Dash callbacks
+    :param url_prefix: str, prefix of all the routes
+    """
+    blueprint = flask.Blueprint('simulation_api', __name__, url_prefix=url_prefix)
+
+    @blueprint.errorhandler(ApiError)
+    def handle_api_error(error: ApiError):
+        return flask.jsonify({'error': str(error)}), error.status_code
+
+    @blueprint.route("/parameters", methods=['GET'])
+    def parameters():
+        default_values = default_parameter_values()
+        return flask.jsonify([
+            {
+                'name': ui_param.parameter_name,
+                'type': ('bool' if ui_param.value_range is bool
+                         else 'int' if ui_param.value_range is int
+                         else 'choice'),
+                'values': None if ui_param.display_range is None else [str(v) for v in ui_param.display_range],
+                'default': ui_param.display_value(default_values[ui_param.parameter_name]),
+                }
+            for ui_param in all_parameters
+            ])
+
+    @blueprint.route("/simulate", methods=['POST'])
+    def simulate():
+        body = _json_body()
+        point = dict(default_parameter_values(), **parse_parameters(body.get('parameters', {})))
+        result = simulate_points([point], result_cache)[0]
+        if result['incomes'] is None:
+            raise ApiError("These parameter values are not compatible with each other", 422)
+        if _wants_arrow():
+            return _arrow_response(merge_results([result]))
+        return flask.Response(json.dumps(result, separators=(',', ':')), mimetype='application/json')
+
+    @blueprint.route("/simulate/batch", methods=['POST'])
+    def simulate_batch():
+        body = _json_body()
+        raw_points = body.get('points')
+        if not isinstance(raw_points, list) or not raw_points:
+            raise ApiError("'points' must be a non empty list of parameter objects")
+        if len(raw_points) > MAX_BATCH_SIZE:
+            raise ApiError("Batches are limited to {} points".format(MAX_BATCH_SIZE), 413)
+        base_values = dict(default_parameter_values(), **parse_parameters(body.get('base', {})))
+        points = [dict(base_values, **parse_parameters(raw_point)) for raw_point in raw_points]
+
+        merged = merge_results(simulate_points(points, result_cache))
+        if _wants_arrow():
+            return _arrow_response(merged)
+        merged['incomes'] = _json_incomes(merged['incomes'])
+        return flask.Response(json.dumps(merged, separators=(',', ':')), mimetype='application/json')
+
+    server.register_blueprint(blueprint)
+    return blueprint
+
+
+def register_metrics(server: flask.Flask, metrics: MetricsRegistry = METRICS, url: str = "/metrics",
+                     server_timing: Optional[bool] = None):
+    """
+    Add the metrics route to the Flask server, and optionally a Server-Timing header to every response (detailing the
+    time spent in each stage while handling the request, e.g. "update_income;dur=12.30, update_func;dur=4.56")
+
+    :param server: the Flask server of the Dash application
+    :param metrics: the registry to export
+    :param url: str, url of the metrics route
+    :param server_timing: bool, add the Server-Timing header (default to the WINS_SERVER_TIMING environment variable
+        being set to a non empty value)
+    """
+    @server.route(url, methods=['GET'])
+    def prometheus_metrics():
+        # Only the metrics of this worker process (see utils.metrics)
+        return flask.Response(metrics.render_prometheus(), content_type=PROMETHEUS_MIME_TYPE)
+
+    if server_timing is None:
+        server_timing = bool(os.environ.get('WINS_SERVER_TIMING'))
+    if server_timing:
+        @server.before_request
+        def start_request_timings():
+            metrics.start_request()
+
+        @server.after_request
+        def add_server_timing_header(response: flask.Response):
+            timings = metrics.end_request()
+            if timings:
+                response.headers['Server-Timing'] = metrics.server_timing_header(timings)
+            return response
@@ -21,7 +21,7 @@
 This module list budget simulator user defined parameters
 and their corresponding GUI selector component automatic generation.
 """
-from typing import List, Dict, Union
+from typing import List
 
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
@@ -30,22 +30,8 @@ from dash import Dash
 from dash.dependencies import Output, Input
 from dash.development.base_component import Component
 
+from economy.budget_simulator.parameters import BUDGET_SIMULATION_PARAMETERS
 from economy.budget_simulator.style import LABEL_SETTING_BOOTSTRAP_COL, TOOLTIPS_STYLE
-
-from economy.converters.converters import lottery_convert_mode_param, defense_lost_convert_mode_param, \
-    legendary_soul_convert_mode_param, recycle_target_type_param, chest_opener_convert_mode_param, \
-    recycle_convert_mode_param
-from economy.gains.abstract_gains import rank_param, vip_param, hq_param, mesurement_range_param
-from economy.gains.adds import pub_viewed_per_day_param
-from economy.gains.daily_purchases import equipment_craft_number_param
-from economy.gains.daily_rewards import daily_10km_trading_count_param, \
-    daily_100km_trading_count_param, daily_1000km_trading_count_param, daily_best_trading_count_param, \
-    selected_heroes_param, mill_lvl_param, station_lvl_param, ambush_won_param, ask_for_donation_param, \
-    average_trophy_param, temple_lvl_param, defense_lost_param, fast_ambushes_param
-from economy.gains.weekly_rewards import gates_passed_param, leaderboard_rank_param, \
-    opponent_rank_param, clan_rank_param, battle_ranking_param, personal_boss_kill_per_fight_param, \
-    clan_boss_kills_param, clan_league_param, clanwar1v1_result_param, clan_boss_attack_count_param
-from lang.languages import TranslatableString
 from lang.translation_dash_wrapper import wrap_dash_module_translation, TranslatableComponentRegister
 from utils.ui_parameters import UIParameter
 
@@ -53,63 +39,6 @@ dcct = wrap_dash_module_translation(dcc)
 htmlt = wrap_dash_module_translation(html)
 dbct = wrap_dash_module_translation(dbc)
 
-# ----- List and organize simulation parameters of the UI -----
-
-BUDGET_SIMULATION_PARAMETERS: Dict[Union[str, TranslatableString], List[UIParameter]] = {
-    TranslatableString('General', french="Géneral"): [
-        mesurement_range_param,
-        rank_param,
-        vip_param,
-        hq_param,
-        pub_viewed_per_day_param,
-        ],
-    TranslatableString('Tradings', french="Échanges"): [
-        daily_10km_trading_count_param,
-        daily_100km_trading_count_param,
-        daily_1000km_trading_count_param,
-        daily_best_trading_count_param,
-        defense_lost_param,
-        defense_lost_convert_mode_param,
-        ],
-    TranslatableString('Units', french="Unités"): [
-        mill_lvl_param,
-        station_lvl_param,
-        temple_lvl_param,
-        ],
-    TranslatableString('Ambushes', french="Embuscades"): [
-        ambush_won_param,
-        fast_ambushes_param,
-        average_trophy_param,
-        ],
-    TranslatableString('Challenges', french="Défis"): [
-        gates_passed_param,
-        leaderboard_rank_param,
-        ],
-    TranslatableString('Clan'): [
-        clan_league_param,
-        clan_rank_param,
-        battle_ranking_param,
-        clanwar1v1_result_param,
-        opponent_rank_param,
-        personal_boss_kill_per_fight_param,
-        clan_boss_kills_param,
-        clan_boss_attack_count_param,
-        ask_for_donation_param,
-        ],
-    TranslatableString('Conversions'): [
-        lottery_convert_mode_param,
-        selected_heroes_param,
-        legendary_soul_convert_mode_param,
-        recycle_convert_mode_param,
-        recycle_target_type_param,
-        chest_opener_convert_mode_param,
-        ],
-    TranslatableString('Purchases', french="Achats"): [
-        equipment_craft_number_param,
-        ],
-    }
-"""Store all budget simulation UIParameters (sorted into categories)"""
-
 # ----- Utility functions -----
 
 def get_parameter_selector_id(parameter: UIParameter) -> str:
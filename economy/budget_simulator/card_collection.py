@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Answer the question "When will I have the 10 Seraphin cards of my next star?": model the collection of the copies of a
+card (or of any card of a rarity) as an absorbing Markov chain, fed with the daily flows of a simulated budget.
+
+The state of the chain is the number of copies still missing, and each day removes a random number of them. The
+distribution of the copies looted each weekday is derived from the simulated incomes:
+- unopened chests (chest opening disabled) through the exact card slots of the chests,
+- cards of unspecified types (e.g. 0.4 legendary cards per day) through the share of them that matches the target,
+- legendary souls through the soul exchange.
+
+The transition matrices of each weekday, the expected number of days and the completion probabilities are precomputed
+once for every number of missing copies, so that the queries are instant.
+
+Usage example:
+
+    >>> time_series = simulate_days(ui_parameters_values, days=365)
+    >>> model = collection_model(time_series, Seraphin)
+    >>> model.expected_days(10, owned=2)
+    >>> model.percentile(10, 0.9, owned=2)
+"""
+import functools
+from typing import Dict, Optional
+
+import numpy
+
+from common.resources import ResourcePacket, ResourceQuantity, Resources
+from economy.budget_simulator.time_series import BudgetTimeSeries
+from economy.budget_simulator.time_to_afford import income_share
+from economy.chests import Chest
+from economy.converters.converters import LegendarySoulExchange
+from economy.gains.abstract_gains import Days
+from utils.discrete_distribution import DiscreteDistribution
+
+MAX_COPIES = 100
+"""Default maximal number of missing copies the models are precomputed for"""
+
+
+def chest_copies_distribution(chest_type, target_type: ResourceQuantity.VALID_RESOURCE_TYPE) -> DiscreteDistribution:
+    """Return the distribution of the number of cards matching the target looted in one chest"""
+    distribution = DiscreteDistribution.point_mass(0)
+    for slot_probabilities, slot_number in chest_type.card_slots:
+        # A slot gives one card, so the probabilities of its card types matching the target simply add up
+        probability = sum(card_probability * income_share(target_type, card_type)
+                          for card_type, card_probability in slot_probabilities.items())
+        distribution = distribution + DiscreteDistribution.binomial(slot_number, min(1., probability))
+    return distribution
+
+
+def daily_copies_distribution(daily_income: Dict[ResourceQuantity.VALID_RESOURCE_TYPE, float],
+                              target_type: ResourceQuantity.VALID_RESOURCE_TYPE) -> DiscreteDistribution:
+    """
+    Return the distribution of the number of cards matching the target looted in a day.
+
+    Only the known averages of the flows are used: a flow of 2.3 chests (or cards) per day is modeled as 2 or 3 chests
+    (keeping the average), each card of an unspecified type matching the target independently. Negative flows (spent or
+    recycled resources) are ignored.
+
+    :param daily_income: Dict[resource type, quantity], the net income of the day
+    :param target_type: the card (e.g. Seraphin) or the card type (e.g. Rarity.Legendary) to collect
+    :return: DiscreteDistribution
+    """
+    distribution = DiscreteDistribution.point_mass(0)
+    for res_type, quantity in daily_income.items():
+        if quantity <= 0:
+            continue
+        if res_type is Resources.LegendarySoul:
+            exchanged_cards = LegendarySoulExchange.get_diff(ResourcePacket(Resources.LegendarySoul(quantity)))
+            distribution = distribution + daily_copies_distribution(
+                {card_type: card_quantity for card_type, card_quantity in exchanged_cards.items()
+                 if card_type is not Resources.LegendarySoul},
+                target_type)
+        elif isinstance(res_type, type) and issubclass(res_type, Chest):
+            distribution = distribution + DiscreteDistribution.point_mass(quantity).compound(
+                chest_copies_distribution(res_type, target_type))
+        else:
+            share = income_share(target_type, res_type)
+            if share > 0:
+                distribution = distribution + DiscreteDistribution.point_mass(quantity).compound(
+                    DiscreteDistribution.bernoulli(min(1., share)))
+    return distribution
+
+
+class CardCollectionModel:
+    """
+    Absorbing Markov chain of the collection of the copies of a card, with a weekly cycle of daily loots.
+
+    Weekdays are indexed from the first simulated day of the time series, the state is the number of missing copies
+    (0 being the absorbing state).
+    """
+
+    def __init__(self, time_series: BudgetTimeSeries, target_type: ResourceQuantity.VALID_RESOURCE_TYPE,
+                 max_copies: int = MAX_COPIES, horizon: Optional[int] = None):
+        """
+        :param time_series: BudgetTimeSeries, the simulated daily incomes (at least a week, further weeks are
+            assumed to repeat the first one)
+        :param target_type: the card (e.g. Seraphin) or the card type (e.g. Rarity.Legendary) to collect
+        :param max_copies: int, the maximal number of missing copies that can be queried
+        :param horizon: int, the number of days the completion probabilities are computed for, default to the
+            number of simulated days
+        """
+        assert time_series.days >= 7, "at least a week must be simulated"
+        self.target_type = target_type
+        self.max_copies = max_copies
+        self.horizon = time_series.days if horizon is None else horizon
+        self.start_day = time_series.start_day
+
+        daily_incomes = time_series.total_daily_incomes()
+        self.daily_distributions = [
+            daily_copies_distribution(dict(zip(time_series.resource_types, daily_incomes[day_index])), target_type)
+            for day_index in range(7)]
+        """Distribution of the copies looted each weekday"""
+
+        # Transition matrices: transitions[weekday, missing copies, missing copies the next day]
+        self.transitions = numpy.zeros((7, max_copies + 1, max_copies + 1))
+        states = numpy.arange(max_copies + 1)
+        for weekday, distribution in enumerate(self.daily_distributions):
+            for missing in states:
+                numpy.add.at(self.transitions[weekday, missing],
+                             numpy.maximum(missing - distribution.values, 0), distribution.probabilities)
+
+        self._expected_days = self._solve_expected_days()
+        self._completion_probabilities = self._propagate_completion_probabilities()
+
+    def _solve_expected_days(self) -> numpy.ndarray:
+        """Return the expected number of days to collect the missing copies, as a (weekday x missing copies) array"""
+        expected_days = numpy.zeros((7, self.max_copies + 1))
+        if all(distribution.probability_at_least(1) == 0 for distribution in self.daily_distributions):
+            expected_days[:, 1:] = numpy.inf
+            return expected_days
+        for missing in range(1, self.max_copies + 1):
+            # Days without loot keep the state, so h(d) = a(d) + b(d) * h(d+1) around the weekly cycle, where a(d)
+            # depends only on the already solved states with fewer missing copies
+            next_expected_days = numpy.roll(expected_days, -1, axis=0)[:, :missing]
+            a = 1 + numpy.einsum('ds,ds->d', self.transitions[:, missing, :missing], next_expected_days)
+            b = self.transitions[:, missing, missing]
+            cycle_factors = numpy.concatenate([[1.], numpy.cumprod(b)])
+            expected_days[0, missing] = (a @ cycle_factors[:-1]) / (1 - cycle_factors[-1])
+            for weekday in range(6, 0, -1):
+                expected_days[weekday, missing] = a[weekday] + b[weekday] * expected_days[(weekday + 1) % 7, missing]
+        return expected_days
+
+    def _propagate_completion_probabilities(self) -> numpy.ndarray:
+        """
+        Return the probability to collect the missing copies within each number of days, as a
+        (days x weekday x missing copies) array
+        """
+        probabilities = numpy.zeros((self.horizon + 1, 7, self.max_copies + 1))
+        probabilities[:, :, 0] = 1.
+        for days in range(1, self.horizon + 1):
+            # Completed within <days> days starting on weekday d: the first day is a transition of weekday d, the
+            # remaining days start on the next weekday
+            probabilities[days] = numpy.einsum('drs,ds->dr', self.transitions,
+                                               numpy.roll(probabilities[days - 1], -1, axis=0))
+        return numpy.minimum(probabilities, 1.)
+
+    def _weekday_index(self, start_day: Optional[Days]) -> int:
+        return 0 if start_day is None else (start_day - self.start_day) % 7
+
+    def _missing_copies(self, copies: int, owned: int) -> int:
+        missing = max(0, copies - owned)
+        assert missing <= self.max_copies, "the model is computed for {} missing copies at most".format(
+            self.max_copies)
+        return missing
+
+    def expected_days(self, copies: int, owned: int = 0, start_day: Optional[Days] = None) -> float:
+        """
+        Return the expected number of days to collect the copies (infinite if the target is never looted).
+
+        :param copies: int, the number of copies required
+        :param owned: int, the number of copies already owned
+        :param start_day: Days, the weekday of the first collecting day, default to the first simulated day
+        """
+        return float(self._expected_days[self._weekday_index(start_day), self._missing_copies(copies, owned)])
+
+    def completion_probabilities(self, copies: int, owned: int = 0, start_day: Optional[Days] = None) -> numpy.ndarray:
+        """
+        Return the probability to have collected the copies within 0, 1, ..., horizon days (cumulative distribution
+        of the number of days).
+
+        :param copies: int, the number of copies required
+        :param owned: int, the number of copies already owned
+        :param start_day: Days, the weekday of the first collecting day, default to the first simulated day
+        :return: array of horizon + 1 probabilities
+        """
+        return self._completion_probabilities[:, self._weekday_index(start_day), self._missing_copies(copies, owned)]
+
+    def percentile(self, copies: int, probability: float, owned: int = 0,
+                   start_day: Optional[Days] = None) -> Optional[int]:
+        """
+        Return the lowest number of days within which the copies are collected with at least the given probability
+        (e.g. 0.5 for the median), or None if it's beyond the horizon.
+        """
+        assert 0 <= probability <= 1
+        completion = self.completion_probabilities(copies, owned, start_day)
+        # Tolerance for the floating point errors of the propagation
+        days = int(numpy.searchsorted(completion, probability - 1e-12))
+        return days if days <= self.horizon else None
+
+
+@functools.lru_cache(maxsize=32)
+def collection_model(time_series: BudgetTimeSeries, target_type: ResourceQuantity.VALID_RESOURCE_TYPE,
+                     max_copies: int = MAX_COPIES) -> CardCollectionModel:
+    """Return the CardCollectionModel of the target, cached per time series and target (card or rarity)"""
+    return CardCollectionModel(time_series, target_type, max_copies)
@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Command line budget simulator, for running simulations from scripts without the web application.
+
+It never imports dash nor plotly, so it starts much faster than the application (see tests/cli_startup.py).
+
+Usage examples:
+
+    python3 -m economy.budget_simulator.cli --set vip=lvl10 --set hq_lvl=18
+    python3 -m economy.budget_simulator.cli my_config.json other_configs.json --format csv --output incomes.csv
+    python3 -m economy.budget_simulator.cli --list-parameters
+
+Parameter files are JSON files containing either a single {parameter name: value} object, a list of them, or a batch
+{"base": {parameter name: value}, "points": [{parameter name: value}, ...]}. Values are given as in
+UIParameter.parse_value (e.g. "lvl7" for the VIP level, [8, 20] for the collection schedule).
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import List, Dict, Any, TextIO
+
+import numpy
+
+from common.resources import ResourceQuantity
+from economy.budget_simulator.parameters import parse_parameters, PARAMETERS_BY_NAME
+from economy.budget_simulator.simulation import default_parameter_values
+from economy.budget_simulator.sweep import evaluate_batch, SweepResult
+from utils.prettifying import human_readable
+
+
+def parse_assignment(assignment: str) -> Dict[str, Any]:
+    """Parse a NAME=VALUE command line assignment (VALUE being JSON or plain text)"""
+    name, separator, raw_value = assignment.partition('=')
+    if not separator:
+        raise ValueError("Expected NAME=VALUE, got {!r}".format(assignment))
+    try:
+        raw_value = json.loads(raw_value)
+    except ValueError:
+        # Plain text value (e.g. an enum member name)
+        pass
+    return parse_parameters({name.strip(): raw_value})
+
+
+def load_parameter_file(path: str) -> List[Dict[str, Any]]:
+    """
+    Return the list of points (parameter value dicts, possibly partial) defined in a parameter file
+
+    :raise OSError: if the file can't be read
+    :raise ValueError: if the file content is not a valid parameter file
+    """
+    with open(path) as parameter_file:
+        content = json.load(parameter_file)
+    if isinstance(content, list):
+        return [parse_parameters(point) for point in content]
+    elif not isinstance(content, dict):
+        raise ValueError("{}: expected a JSON object or a list of objects, got {!r}".format(path, content))
+    elif 'points' in content:
+        if not isinstance(content['points'], list):
+            raise ValueError("{}: 'points' must be a list of parameter objects".format(path))
+        base_values = parse_parameters(content.get('base', {}))
+        return [dict(base_values, **parse_parameters(point)) for point in content['points']]
+    else:
+        return [parse_parameters(content)]
+
+
+def point_description(point: Dict[str, Any]) -> str:
+    """Describe the parameters of a point that differ from their default value"""
+    default_values = default_parameter_values()
+    return ", ".join("{}={}".format(name, PARAMETERS_BY_NAME[name].display_value(value))
+                     for name, value in point.items() if value != default_values[name]) or "default parameters"
+
+
+def write_table(result: SweepResult, points: List[Dict[str, Any]], output: TextIO, detailed: bool = False):
+    """Write a human readable summary of the incomes of each point"""
+    resource_labels = [ResourceQuantity.prettify_type(res_type) for res_type in result.resource_types]
+    gain_labels = [gain.display_name() for _, gain in result.gains]
+    label_width = max(len(label) for label in resource_labels + (gain_labels if detailed else []) + ['Total'])
+    invalid = result.invalid()
+    for k, point in enumerate(points):
+        output.write("# Point {}: {}\n".format(k, point_description(point)))
+        incomes = result.values[k]
+        if invalid[k]:
+            output.write("  These parameter values are not compatible with each other\n\n")
+            continue
+        totals = incomes.sum(axis=0)
+        for label, total in zip(resource_labels, totals):
+            if total != 0:
+                output.write("  {:<{width}}  {:>10}\n".format(label, human_readable(total), width=label_width))
+        if detailed:
+            used_resources = numpy.nonzero(totals)[0]
+            output.write("\n  {:<{width}}  {}\n".format(
+                "", "  ".join("{:>10}".format(resource_labels[r][:10]) for r in used_resources), width=label_width))
+            for label, gain_incomes in zip(gain_labels, incomes):
+                if gain_incomes.any():
+                    output.write("  {:<{width}}  {}\n".format(
+                        label, "  ".join("{:>10}".format(human_readable(gain_incomes[r], erase_under=10**-2))
+                                         for r in used_resources), width=label_width))
+        output.write("\n")
+
+
+def write_json(result: SweepResult, points: List[Dict[str, Any]], output: TextIO):
+    """Write the incomes of each point as a points x gains x resources JSON matrix (null for invalid points)"""
+    json.dump({
+        'points': [{name: PARAMETERS_BY_NAME[name].display_value(value) for name, value in point.items()}
+                   for point in points],
+        'gains': result.gain_names(),
+        'resources': result.resource_names(),
+        'incomes': [None if invalid else incomes.tolist() for incomes, invalid in zip(result.values, result.invalid())],
+        }, output, separators=(',', ':'))
+    output.write("\n")
+
+
+def write_csv(result: SweepResult, points: List[Dict[str, Any]], output: TextIO):
+    """Write the non null incomes in long format: point, category, gain, resource, quantity"""
+    writer = csv.writer(output)
+    writer.writerow(['point', 'category', 'gain', 'resource', 'quantity'])
+    gain_names = result.gain_names()
+    resource_names = result.resource_names()
+    for point, gain, resource in zip(*numpy.nonzero(numpy.nan_to_num(result.values, nan=0.))):
+        writer.writerow([point] + gain_names[gain] + [resource_names[resource], result.values[point, gain, resource]])
+
+
+def list_parameters(output: TextIO):
+    default_values = default_parameter_values()
+    for name, ui_param in PARAMETERS_BY_NAME.items():
+        if ui_param.value_range is bool or ui_param.value_range is int:
+            values = ui_param.value_range.__name__
+        else:
+            values = " | ".join(str(display) for display in ui_param.display_range)
+        output.write("{} (default {}): {}\n".format(name, ui_param.display_value(default_values[name]), values))
+
+
+def main(args: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate the regular incomes of a CaravanWar player")
+    parser.add_argument('parameter_files', nargs='*', help="JSON files of parameter values (see module documentation)")
+    parser.add_argument('-s', '--set', dest='assignments', action='append', default=[], metavar='NAME=VALUE',
+                        help="set a parameter value for every point (may be repeated)")
+    parser.add_argument('-f', '--format', choices=['table', 'json', 'csv'], default='table', help="output format")
+    parser.add_argument('-o', '--output', help="output file (default to the standard output)")
+    parser.add_argument('-g', '--gains', action='store_true', help="also detail the incomes of each gain (table)")
+    parser.add_argument('--list-parameters', action='store_true', help="list the parameters and their values")
+    arguments = parser.parse_args(args)
+
+    if arguments.list_parameters:
+        list_parameters(sys.stdout)
+        return 0
+
+    try:
+        overrides = {}
+        for assignment in arguments.assignments:
+            overrides.update(parse_assignment(assignment))
+        points = [point for path in arguments.parameter_files for point in load_parameter_file(path)] or [{}]
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    points = [{**default_parameter_values(), **point, **overrides} for point in points]
+
+    result = evaluate_batch(points)
+
+    output = open(arguments.output, 'w', newline='') if arguments.output else sys.stdout
+    try:
+        if arguments.format == 'json':
+            write_json(result, points, output)
+        elif arguments.format == 'csv':
+            write_csv(result, points, output)
+        else:
+            write_table(result, points, output, detailed=arguments.gains)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    invalid_points = numpy.flatnonzero(result.invalid())
+    for k in invalid_points:
+        sys.stderr.write("error: point {} ({}): these parameter values are not compatible with each other\n".format(
+            k, point_description(points[k])))
+    return 1 if len(invalid_points) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,6 +20,11 @@
 """
 Definition of all the graphs functions present in the application and their callback functions
 """
+import copy
+import functools
+import hashlib
+import itertools
+import json
 import os
 from collections import namedtuple
 from typing import List, Union, Dict, Type, Optional
@@ -28,17 +33,43 @@ import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
 from dash import dash
+import plotly.utils
 from plotly.subplots import make_subplots
 
 from common.resources import ResourceQuantity, Resources, ResourcePacket
+from economy.budget_simulator.result_cache import cache_key
 from economy.budget_simulator.simulation import RESOURCE_SORTING_MAP
-from economy.chests import Chest
+from economy.chests import Chest, ALL_CHESTS
 from economy.converters.abstract_converter import GainConverter
 from economy.gains import Gain
 from lang.languages import Language, TranslatableString
-from utils.prettifying import human_readable
+from utils.prettifying import human_readable, human_readable_array
 
-GraphsUpdates = namedtuple('GraphsUpdates', 'update_func component_id target_attribute')
+GraphsUpdates = namedtuple('GraphsUpdates', 'update_func component_id target_attribute input_digest')
+"""
+update_func: function computing the new graph data from incomes, a language and the application
+component_id: str, the id of the graph component
+target_attribute: str, the attribute of the component to update
+input_digest: function returning a hash of the part of the incomes the graph displays, so that the graph isn't
+    rendered again if it didn't change
+"""
+
+
+def incomes_digest(incomes: Dict[Union[str, TranslatableString],
+                                 Dict[Union[Type[Gain], Type[GainConverter]], ResourcePacket]],
+                   resource_type: ResourceQuantity.VALID_RESOURCE_TYPE = None) -> str:
+    """
+    Return a hash of the incomes, or of the incomes of a single resource type if one is given.
+    """
+    return cache_key([
+        [category.translated_into(Language.ENGLISH) if isinstance(category, TranslatableString) else category,
+         gain,
+         # Note: use .get() as indexing a ResourcePacket inserts missing keys
+         {res_type: float(quantity) for res_type, quantity in incomes[category][gain].items()}
+         if resource_type is None else float(incomes[category][gain].get(resource_type, 0))]
+        for category in incomes
+        for gain in incomes[category]
+        ])
 
 # Maybe not the best place to put this
 resource_colors = {
@@ -49,6 +80,59 @@ resource_colors = {
     }
 
 
+RESOURCE_ICONS_FOLDER = "resources"
+"""Folder of the resource icons, relative to the application assets folder"""
+
+
+def resource_icon_filename(resource: ResourceQuantity.VALID_RESOURCE_TYPE) -> Optional[str]:
+    """Return the name of the icon file of a resource (whether it exists or not), None if the type is not supported"""
+    if isinstance(resource, Resources):
+        return "{}.png".format(resource.name)
+    elif isinstance(resource, Type):
+        if issubclass(resource, Chest):
+            return "{}.png".format(resource.__name__)
+        else:
+            return "random_{}.png".format(resource.__name__)
+    # TODO handle all other VALID_RESOURCE_TYPE
+    else:
+        return None
+        #raise NotImplemented("Resource type not supported")
+
+
+class _LazyManifest(dict):
+    """Manifest dict that also resolves resource types not listed at startup (it's only a dict lookup too)"""
+
+    def __init__(self, icon_urls: Dict[str, str]):
+        super().__init__()
+        self.icon_urls = icon_urls
+
+    def __missing__(self, res_type):
+        url = self[res_type] = self.icon_urls.get(resource_icon_filename(res_type))
+        return url
+
+
+@functools.lru_cache(maxsize=None)
+def asset_manifest(app: dash.Dash) -> Dict[ResourceQuantity.VALID_RESOURCE_TYPE, Optional[str]]:
+    """
+    Scan the resource icons folder once, and return the URL of the icon of every known resource type (None if it has
+    no icon). URLs include a hash of the file content, so browsers can cache them safely.
+    """
+    icons_folder = os.path.join(app.config.assets_folder, RESOURCE_ICONS_FOLDER)
+    icon_urls = {}
+    if os.path.isdir(icons_folder):
+        for filename in sorted(os.listdir(icons_folder)):
+            if not os.path.isfile(os.path.join(icons_folder, filename)):
+                continue
+            with open(os.path.join(icons_folder, filename), 'rb') as icon_file:
+                content_hash = hashlib.md5(icon_file.read()).hexdigest()[:10]
+            icon_urls[filename] = "{}?v={}".format(app.get_asset_url("{}/{}".format(RESOURCE_ICONS_FOLDER, filename)),
+                                                   content_hash)
+    manifest = _LazyManifest(icon_urls)
+    for res_type in itertools.chain(RESOURCE_SORTING_MAP, ALL_CHESTS):
+        manifest[res_type] = icon_urls.get(resource_icon_filename(res_type))
+    return manifest
+
+
 def resource_icons(app: dash.Dash, resource: ResourceQuantity.VALID_RESOURCE_TYPE, fail_safe=False,
                     **dash_img_extra_parameters) -> Optional[html.Img]:
     """
@@ -56,31 +140,26 @@ def resource_icons(app: dash.Dash, resource: ResourceQuantity.VALID_RESOURCE_TYP
     is returned insted, except if fail_safe is to true where in this case a dummy component (an empty html Div) is
     returned insted.
 
+    (Components are reused between calls with the same parameters, they must not be modified)
+
     :param app: the main dash application
     :param resource: the target resource
     :param fail_safe: (default False) if set tu True, ensure you always have a dash component returned.
     :param dash_img_extra_parameters: extra parameter to forwed to the html.Img object (like height="20px", etc)
     """
-    if isinstance(resource, Resources):
-        resource_icon_filename = "{}.png".format(resource.name)
-    elif isinstance(resource, Type):
-        if issubclass(resource, Chest):
-            resource_icon_filename = "{}.png".format(resource.__name__)
-        else:
-            resource_icon_filename = "random_{}.png".format(resource.__name__)
-    # TODO handle all other VALID_RESOURCE_TYPE
-    else:
-        resource_icon_filename = None
-        #raise NotImplemented("Resource type not supported")
+    try:
+        return _cached_resource_icons(app, resource, fail_safe, tuple(sorted(dash_img_extra_parameters.items())))
+    except TypeError:
+        # Unhashable extra parameters (like a style dict), build a new component
+        return _build_resource_icon(app, resource, fail_safe, dash_img_extra_parameters)
 
-    if resource_icon_filename is not None \
-       and os.path.isfile(os.path.join("assets", "resources", resource_icon_filename)):
 
+def _build_resource_icon(app: dash.Dash, resource: ResourceQuantity.VALID_RESOURCE_TYPE, fail_safe: bool,
+                         dash_img_extra_parameters: dict) -> Optional[html.Img]:
+    icon_url = asset_manifest(app)[resource]
+    if icon_url is not None:
         # Target resource exists
-        return html.Img(
-            src=app.get_asset_url(os.path.join("resources", resource_icon_filename)),
-            **dash_img_extra_parameters,
-            )
+        return html.Img(src=icon_url, **dash_img_extra_parameters)
     else:
         if fail_safe:
             # return a dummy component
@@ -89,6 +168,12 @@ def resource_icons(app: dash.Dash, resource: ResourceQuantity.VALID_RESOURCE_TYP
             return None
 
 
+@functools.lru_cache(maxsize=None)
+def _cached_resource_icons(app: dash.Dash, resource: ResourceQuantity.VALID_RESOURCE_TYPE, fail_safe: bool,
+                           dash_img_extra_parameters: tuple) -> Optional[html.Img]:
+    return _build_resource_icon(app, resource, fail_safe, dict(dash_img_extra_parameters))
+
+
 graphs_to_update: List[GraphsUpdates] = []
 
 
@@ -99,11 +184,34 @@ class ResourceTable(dbc.Table):
     def __init__(self, id: str, bordered=True, striped=False, hover=True, responsive=True, **kwargs):
         super().__init__(self.EMPTY_TABLE, id, bordered=bordered, striped=striped, hover=hover, responsive=responsive, **kwargs)
         # Register the graph
-        graphs_to_update.append(GraphsUpdates(self.figures_updates, id, 'children'))
+        graphs_to_update.append(GraphsUpdates(self.figures_updates, id, 'children', incomes_digest))
+
+    TOTALS_CATEGORY = TranslatableString('totals', french="totaux")
 
     @staticmethod
-    def figures_updates(incomes: Dict[Union[str, TranslatableString],
-                                      Dict[Union[Type[Gain], Type[GainConverter]], ResourcePacket]],
+    @functools.lru_cache(maxsize=None)
+    def column_header(res_type: ResourceQuantity.VALID_RESOURCE_TYPE, language: Language,
+                      app: dash.Dash) -> html.Th:
+        """Return the header cell of a resource column (cached as it only depends on the resource and the language)"""
+        return html.Th([
+            # Add the resource icon if it exists
+            resource_icons(app, res_type, height="20px", fail_safe=True),
+            html.Div(ResourceQuantity.prettify_type(res_type, language=language))
+            ],
+            className='text-center',)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def value_cell(pretty_value: str) -> html.Td:
+        """
+        Return a table cell displaying a formatted value (cached as dash components are slow to build, and most cells
+        are empty or share the same values)
+        """
+        return html.Td(pretty_value, className='text-danger' if pretty_value[:1] == '-' else 'text-success')
+
+    @classmethod
+    def figures_updates(cls, incomes: Dict[Union[str, TranslatableString],
+                                           Dict[Union[Type[Gain], Type[GainConverter]], ResourcePacket]],
                         language: Language, app: dash.Dash) -> List[Union[html.Table, html.Tbody]]:
         # Compute total
         total = ResourcePacket()
@@ -113,30 +221,25 @@ class ResourceTable(dbc.Table):
                 total = total + incomes[gain_category][key]
 
         incomes = incomes.copy()
-        TOTALS_CATEGORY = TranslatableString('totals', french="totaux")
-        incomes[TOTALS_CATEGORY] = {None: total}
+        incomes[cls.TOTALS_CATEGORY] = {None: total}
 
-        all_res_types = [res_type for res_type in RESOURCE_SORTING_MAP.keys() if res_type in total.keys()]
+        all_res_types = sorted((res_type for res_type in total.keys() if res_type in RESOURCE_SORTING_MAP),
+                               key=RESOURCE_SORTING_MAP.__getitem__)
         """List all resource types present in incomes, sorted according to the RESOURCE_SORTING_MAP"""
-        # O(n²) : There probably a better way to proceed
 
-        def pretty_Td(value):
-            """Generate a dash html Td while prettifying its content"""
-            pretty_value = human_readable(value, erase_under=10**-2)
-            return html.Td(
-                pretty_value,
-                className='text-danger' if len(pretty_value) > 0 and pretty_value[0] == '-' else 'text-success',
-                )
+        # Format all the cells at once, (note: use .get() as indexing a ResourcePacket inserts missing keys)
+        rows = [(category, gain) for category in incomes for gain in incomes[category]]
+        pretty_values = human_readable_array(
+            [incomes[category][gain].get(res_type, 0) for category, gain in rows for res_type in all_res_types],
+            erase_under=10**-2,
+            )
+        row_length = len(all_res_types)
+        pretty_cells = {
+            row: [cls.value_cell(pretty_value) for pretty_value in pretty_values[k * row_length:(k + 1) * row_length]]
+            for k, row in enumerate(rows)
+            }
 
-        columns_names = [
-            # Add the resource icon if it exists
-            html.Th([
-                resource_icons(app, res_type, height="20px", fail_safe=True),
-                html.Div(ResourceQuantity.prettify_type(res_type, language=language))
-                ],
-                className='text-center',)
-            for res_type in all_res_types
-            ]
+        columns_names = [cls.column_header(res_type, language, app) for res_type in all_res_types]
 
         return [
             Thead_or_Tbody
@@ -144,15 +247,14 @@ class ResourceTable(dbc.Table):
             for Thead_or_Tbody in [
                 html.Thead(html.Tr([html.Th((category if not isinstance(category, TranslatableString)
                                             else category.translated_into(language)).upper())]
-                                   + (columns_names if k == 0 or category is TOTALS_CATEGORY else ([html.Th()] * len(columns_names))),
+                                   + (columns_names if k == 0 or category is cls.TOTALS_CATEGORY else ([html.Th()] * len(columns_names))),
                                    className='thead-light')),
                 html.Tbody([
                     html.Tr(
                         [html.Td(gain.display_name(language=language).replace(' ', ' ')
                                  if gain is not None else ''  # Special case for the total line which doesn't have gain
                                  )]
-                        + [pretty_Td(incomes[category][gain][res_types])
-                           for res_types in all_res_types]
+                        + pretty_cells[(category, gain)]
                         )
                     for gain in incomes[category]
                     ]),
@@ -167,8 +269,8 @@ class ResourceBarPie(dcc.Graph):
         str_target_resource = ResourceQuantity.prettify_type(self.target_resource)
         id: str = id or str_target_resource + "_plot"
 
-        self.fig = make_subplots(rows=1, cols=2, specs=[[{"type": "bar"}, {"type": "pie"}]])
-        self.fig.add_bar(
+        fig = make_subplots(rows=1, cols=2, specs=[[{"type": "bar"}, {"type": "pie"}]])
+        fig.add_bar(
             x=[],
             y=[],
             name=str_target_resource,
@@ -177,7 +279,7 @@ class ResourceBarPie(dcc.Graph):
             marker_color=resource_colors[target_resource]
             )
 
-        self.fig.add_pie(
+        fig.add_pie(
             hole=0.5,
             sort=False,
             values=[],
@@ -187,38 +289,93 @@ class ResourceBarPie(dcc.Graph):
             marker_line_width=2,
             )
 
-        super().__init__(figure=self.fig, id=id, **kwargs)
+        super().__init__(figure=fig, id=id, **kwargs)
         # Register the graph
-        graphs_to_update.append(GraphsUpdates(self.figures_updates, id, 'figure'))
+        graphs_to_update.append(GraphsUpdates(self.figures_updates, id, 'figure',
+                                              functools.partial(incomes_digest, resource_type=target_resource)))
+
+        # Keep the figure as plain dicts (without the plotly figure, only needed to build them), updates build new
+        # figures from copies of them
+        self._bar_trace, self._pie_trace = json.loads(json.dumps(fig.data, cls=plotly.utils.PlotlyJSONEncoder))
+        self._layout = json.loads(json.dumps(fig.layout, cls=plotly.utils.PlotlyJSONEncoder))
 
     def figures_updates(self, incomes: Dict[Union[str, TranslatableString],
                                             Dict[Union[Type[Gain], Type[GainConverter]], ResourcePacket]],
-                        language: Language, app: dash.Dash) -> List:
+                        language: Language, app: dash.Dash) -> dict:
+        """
+        Return a new figure (as a dict) of the target resource incomes. It doesn't modify any shared state, and shares no
+        object with the other figures returned, so it can be called concurrently and its result can be modified.
+        """
         # Extract incomes for the target resource, erase too small values, prettify gains names and sort them
-        target_incomes_label, target_incomes_values = zip(
-            *sorted(
-                [(gain.display_name(language).replace(" ", " "),  # Prettify gains names
-                  incomes[category][gain][self.target_resource])
-                    for category in incomes
-                    for gain in incomes[category]
-                    if abs(incomes[category][gain][self.target_resource]) >= 10**-2  # Erase small values
-                 ],
-                key=lambda x: x[1],
-                reverse=True,
-                )
+        target_incomes = sorted(
+            [(gain.display_name(language).replace(" ", " "),  # Prettify gains names
+              incomes[category][gain].get(self.target_resource, 0))  # Note: indexing would insert missing keys
+             for category in incomes
+             for gain in incomes[category]
+             if abs(incomes[category][gain].get(self.target_resource, 0)) >= 10**-2  # Erase small values
+             ],
+            key=lambda x: x[1],
+            reverse=True,
             )
+        target_incomes_label = [label for label, _ in target_incomes]
+        target_incomes_values = [value for _, value in target_incomes]
 
-        self.fig.update_traces(
-            values=[abs(x) for x in target_incomes_values],  # Pie chart doesn't like negative values
-            labels=target_incomes_label,
-            selector=dict(type='pie'),
-            marker_line_width=[0 if x > 0 else 4 for x in target_incomes_values],
-            marker_line_color=["#00C000" if x > 0 else "#C00000" for x in target_incomes_values],
-            )
-        self.fig.update_traces(
-            y=target_incomes_values,
-            x=target_incomes_label,
-            selector=dict(type='bar'),
-            )
+        bar_trace, pie_trace, layout = copy.deepcopy((self._bar_trace, self._pie_trace, self._layout))
+        return {
+            'data': [
+                dict(bar_trace, x=target_incomes_label, y=target_incomes_values),
+                dict(pie_trace,
+                     values=[abs(x) for x in target_incomes_values],  # Pie chart doesn't like negative values
+                     labels=target_incomes_label,
+                     marker=dict(pie_trace.get('marker', {}), line={
+                         'width': [0 if x > 0 else 4 for x in target_incomes_values],
+                         'color': ["#00C000" if x > 0 else "#C00000" for x in target_incomes_values],
+                         })),
+                ],
+            'layout': layout,
+            }
+
+
+class SensitivityTable(dbc.Table):
+    """
+    Table listing, for each target resource, the parameter changes that impact its total income the most.
 
-        return self.fig
+    Unlike other graphs it's not updated from the incomes but from a sensitivity report, see sensitivity.sensitivity.
+    """
+    MAX_ROWS = 5
+
+    def __init__(self, id: str, bordered=True, striped=False, hover=True, responsive=True, **kwargs):
+        super().__init__(ResourceTable.EMPTY_TABLE, id, bordered=bordered, striped=striped, hover=hover,
+                         responsive=responsive, **kwargs)
+
+    @classmethod
+    def figures_updates(cls, report: Dict[ResourceQuantity.VALID_RESOURCE_TYPE, List['SensitivityEntry']],
+                        language: Language, app: dash.Dash) -> List[Union[html.Thead, html.Tbody]]:
+        def entry_Td(entry):
+            if entry is None:
+                return html.Td()
+            parameter_txt = entry.parameter.display_txt
+            if isinstance(parameter_txt, TranslatableString):
+                parameter_txt = parameter_txt.translated_into(language)
+            pretty_delta = human_readable(entry.delta)
+            return html.Td([
+                html.Div("{} → {}".format(parameter_txt, entry.parameter.display_value(entry.value))),
+                html.Div(pretty_delta, className='text-danger' if entry.delta < 0 else 'text-success'),
+                ])
+
+        res_types = list(report)
+        return [
+            html.Thead(html.Tr([
+                html.Th([
+                    resource_icons(app, res_type, height="20px", fail_safe=True),
+                    html.Div(ResourceQuantity.prettify_type(res_type, language=language)),
+                    ],
+                    className='text-center')
+                for res_type in res_types
+                ], className='thead-light')),
+            html.Tbody([
+                html.Tr([entry_Td(report[res_type][row] if row < len(report[res_type]) else None)
+                         for res_type in res_types])
+                for row in range(min(cls.MAX_ROWS, max([len(entries) for entries in report.values()] + [0])))
+                ]),
+            ]
@@ -21,7 +21,8 @@ print("Copyright (c) 2019 Kasonnara (wins@kasonnara.fr)")
 """
 Main scrit of the dash application to simulate regular earnings and losses.
 """
-
+import threading
+from collections import OrderedDict
 from typing import List
 
 import dash
@@ -31,13 +32,20 @@ import dash_core_components as dcc
 import dash_html_components as html
 
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 
 from common.resources import Resources, ResourceQuantity
 from economy.budget_simulator import heroku_footer
+from economy.budget_simulator.api import register_api, register_metrics
 from economy.budget_simulator.bs_ui_parameters import get_parameter_selector_id, get_parameter_selector_value_attibute, \
     get_parameter_value, build_parameters_selectors_list
-from economy.budget_simulator.graphs import graphs_to_update, ResourceTable, ResourceBarPie, resource_icons
-from economy.budget_simulator.simulation import update_income, all_parameters
+from economy.budget_simulator.graphs import graphs_to_update, ResourceTable, ResourceBarPie, resource_icons, \
+    SensitivityTable, GraphsUpdates
+from economy.budget_simulator.result_cache import build_result_cache, cache_key
+from economy.budget_simulator.sensitivity import sensitivity, serialize_report, deserialize_report
+from economy.budget_simulator.simulation import update_income, all_parameters, default_parameter_values, \
+    SimulationStore
+from economy.budget_simulator.snapshot import Snapshot
 from economy.budget_simulator.style import external_stylesheets, HEADER_STYLE, SIDEBAR_STYLE, \
     LABEL_SETTING_BOOTSTRAP_COL
 from economy.chests import GoldenChest
@@ -45,6 +53,7 @@ from lang.languages import Language, TranslatableString
 from lang.translation_dash_wrapper import wrap_dash_module_translation, \
     build_language_selector, setup_language_callback, TranslatableComponentRegister
 
+from utils.metrics import METRICS
 from utils.ui_parameters import UIParameter
 
 
@@ -59,6 +68,15 @@ app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 """The main dash application object"""
 app.title = "WINS CaravanWar"
 
+# Simulation results shared between the server worker processes
+result_cache = build_result_cache()
+# Precomputed results of the most common scenarios (empty if the snapshot wasn't built)
+snapshot = Snapshot()
+# Headless JSON API for scripts (see api.py)
+register_api(app.server, result_cache)
+# Latency and cache metrics for monitoring (see utils/metrics.py)
+register_metrics(app.server)
+
 # Register all persistent elements in order to build a callback that can disable all of them if the user disagree
 persistent_components_ids: List[str] = ['language_selector']
 """Store ids of all persistent elements"""
@@ -213,6 +231,10 @@ content = html.Div(
     children=[
         #dcct.Markdown(TranslatableString("## Global incomes", french="## Tableau général"), id="table-title"),
         ResourceTable('global_resource_table'),
+        dcct.Markdown(TranslatableString("### Most influential parameters",
+                                         french="### Paramètres les plus influents"),
+                      id="sensitivity-title"),
+        SensitivityTable('sensitivity_table'),
         ] + [elt
              for resource_type in (Resources.Gold, Resources.Goods, Resources.Gem)
              for elt in (
@@ -251,39 +273,156 @@ app.layout = html.Div(children=[
         className='d-flex',
         id='wrapper'),
     legal_footer,
+    # Key of the current simulation of the session, its incomes are kept on the server in simulation_store
+    dcc.Store(id='simulation'),
+    ] + [
+    # Digest of the data currently displayed by each graph, to skip rendering graphs whose data didn't change
+    dcc.Store(id=graph.component_id + "_digest")
+    for graph in graphs_to_update
     ], )
 
+simulation_store = SimulationStore(result_cache=result_cache)
+
+
+def compute_graphs(ui_parameter_values: dict, selected_lang: Language) -> list:
+    """Run the simulation and return the new data of every graph of graphs_to_update"""
+    incomes = update_income(ui_parameter_values)
+    return [graph.update_func(incomes, selected_lang, app) for graph in graphs_to_update]
+
+
+def get_ui_parameter_values(ui_parameters_raw_values) -> dict:
+    """Convert the raw values of the parameter selectors into the parameter value dict"""
+    # TODO add category filtering
+    return {
+        ui_parameter.parameter_name: get_parameter_value(ui_parameter, raw_value)
+        for ui_parameter, raw_value in zip(all_parameters, ui_parameters_raw_values)
+        }
+
+
+# Fill the graphs with the default scenario, so that the first page is rendered before any callback returns
+_default_graphs = snapshot.get(cache_key(default_parameter_values(), Language.ENGLISH.name))
+if _default_graphs is not None:
+    _default_incomes = update_income(default_parameter_values())
+    for graph, graph_data in zip(graphs_to_update, _default_graphs):
+        setattr(app.layout[graph.component_id], graph.target_attribute, graph_data)
+        app.layout[graph.component_id + "_digest"].data = cache_key(graph.input_digest(_default_incomes),
+                                                                      Language.ENGLISH.name)
+
 
 @app.callback(
-    [Output(graph.component_id, graph.target_attribute)
-     for graph in graphs_to_update],
-    [Input('language_selector', 'value')] + \
+    Output('simulation', 'data'),
     [Input(get_parameter_selector_id(ui_param),
            get_parameter_selector_value_attibute(ui_param))
      for ui_param in all_parameters],
     )
-def update_simulation(selected_lang_name, *ui_parameters_raw_values):
+def update_simulation(*ui_parameters_raw_values):
     """
-    Main call back that update every graph as soon as any parameter changes
+    Main call back that runs the simulation as soon as any parameter changes
     :param ui_parameters_raw_values:
-    :param weekly: bool
-    :return: the new data for every graphs
+    :return: the key of the simulation in simulation_store, and the raw values in case another server process has to
+        run it again
     """
-    # Get the lang object
+    with METRICS.timer('update_simulation'):
+        return {
+            'key': simulation_store.put(get_ui_parameter_values(ui_parameters_raw_values)),
+            'raw_values': ui_parameters_raw_values,
+            }
+
+
+def get_simulation(simulation: dict):
+    """Return the parameter values and the incomes of the simulation stored in the session"""
+    return simulation_store.get(simulation['key'], lambda: get_ui_parameter_values(simulation['raw_values']))
+
+
+def register_graph_callback(graph_index: int, graph: GraphsUpdates):
+    """Create the callback rendering a graph when the simulation or the language changes"""
+
+    @app.callback(
+        [Output(graph.component_id, graph.target_attribute), Output(graph.component_id + "_digest", 'data')],
+        [Input('simulation', 'data'), Input('language_selector', 'value')],
+        [State(graph.component_id + "_digest", 'data')],
+        )
+    def update_graph(simulation, selected_lang_name, displayed_digest):
+        if simulation is None:
+            raise PreventUpdate
+        ui_parameter_values, incomes = get_simulation(simulation)
+        digest = cache_key(graph.input_digest(incomes), selected_lang_name)
+        if digest == displayed_digest:
+            # This graph doesn't display the parameter that changed
+            METRICS.increment('graph_updates_skipped', graph=graph.component_id)
+            return dash.no_update, dash.no_update
+
+        METRICS.increment('cache_lookups', cache='snapshot')
+        precomputed_graph = snapshot.get_graph(cache_key(ui_parameter_values, selected_lang_name), graph_index)
+        if precomputed_graph is not None:
+            return precomputed_graph, digest
+        METRICS.increment('cache_misses', cache='snapshot')
+
+        def render():
+            with METRICS.timer('update_func', graph=graph.component_id):
+                return graph.update_func(incomes, Language.__members__[selected_lang_name], app)
+        if result_cache is None:
+            return render(), digest
+        return result_cache.get_or_compute(cache_key(digest, graph.component_id), render), digest
+
+    return update_graph
+
+
+graphs_callbacks = [register_graph_callback(graph_index, graph) for graph_index, graph in enumerate(graphs_to_update)]
+
+
+@app.callback(
+    Output('sensitivity_table', 'children'),
+    [Input('simulation', 'data'), Input('language_selector', 'value')],
+    )
+def update_sensitivity(simulation, selected_lang_name):
+    """Callback that update the table of the parameters that impact the most the main resources"""
+    if simulation is None:
+        raise PreventUpdate
     selected_lang = Language.__members__[selected_lang_name]
+    return SensitivityTable.figures_updates(get_sensitivity(simulation), selected_lang, app)
 
-    # Generate the parameter value dict
-    # TODO add category filtering
-    ui_parameter_values = {
-        ui_parameter.parameter_name: get_parameter_value(ui_parameter, raw_value)
-        for ui_parameter, raw_value in zip(all_parameters, ui_parameters_raw_values)
-        }
-    # Get the new resources incomes
-    incomes = update_income(ui_parameter_values)
-    return [graph.update_func(incomes, selected_lang, app) for graph in graphs_to_update]
+
+sensitivity_reports: OrderedDict = OrderedDict()
+"""Latest sensitivity reports, indexed by simulation key (so that switching the language doesn't recompute them)"""
+sensitivity_reports_lock = threading.Lock()
 
 
-update_language = setup_language_callback(app, translatable_components, language_selector_id="language_selector")
+def get_sensitivity(simulation: dict, max_size: int = 128):
+    """
+    Return the sensitivity report of the simulation stored in the session, only computed once per simulation (reports
+    computed by other server processes are found in the shared result cache)
+    """
+    METRICS.increment('cache_lookups', cache='sensitivity')
+    with sensitivity_reports_lock:
+        report = sensitivity_reports.get(simulation['key'])
+        if report is not None:
+            sensitivity_reports.move_to_end(simulation['key'])
+            return report
+    METRICS.increment('cache_misses', cache='sensitivity')
+    shared_key = cache_key('sensitivity', simulation['key'])
+    report = None
+    if result_cache is not None:
+        records = result_cache.get(shared_key)
+        try:
+            report = None if records is None else deserialize_report(records)
+        except (KeyError, TypeError, ValueError):
+            report = None
+    if report is None:
+        ui_parameter_values, _ = get_simulation(simulation)
+        report = sensitivity(ui_parameter_values)
+        if result_cache is not None:
+            result_cache.put(shared_key, serialize_report(report))
+    with sensitivity_reports_lock:
+        sensitivity_reports[simulation['key']] = report
+        while len(sensitivity_reports) > max_size:
+            sensitivity_reports.popitem(last=False)
+    return report
+
+
+# Language switching runs in the browser, from a catalog of all the translations sent with the page
+app.layout.children.append(
+    setup_language_callback(app, translatable_components, language_selector_id="language_selector"))
 
 
 
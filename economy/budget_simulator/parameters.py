@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+List of the budget simulator parameters, and their parsing from serialized values.
+
+This module doesn't depend on dash, so that the simulation can be run without the web application (see cli.py).
+"""
+from typing import List, Dict, Union, Any
+
+from economy.converters.converters import lottery_convert_mode_param, defense_lost_convert_mode_param, \
+    legendary_soul_convert_mode_param, recycle_target_type_param, chest_opener_convert_mode_param, \
+    recycle_convert_mode_param
+from economy.gains.abstract_gains import rank_param, vip_param, hq_param, mesurement_range_param
+from economy.gains.adds import pub_viewed_per_day_param
+from economy.gains.daily_purchases import equipment_craft_number_param
+from economy.gains.daily_rewards import daily_10km_trading_count_param, \
+    daily_100km_trading_count_param, daily_1000km_trading_count_param, daily_best_trading_count_param, \
+    selected_heroes_param, mill_lvl_param, station_lvl_param, collection_schedule_param, ambush_won_param, \
+    ask_for_donation_param, average_trophy_param, temple_lvl_param, defense_lost_param, fast_ambushes_param
+from economy.gains.weekly_rewards import gates_passed_param, leaderboard_rank_param, \
+    opponent_rank_param, clan_rank_param, battle_ranking_param, personal_boss_kill_per_fight_param, \
+    clan_boss_kills_param, clan_league_param, clanwar1v1_result_param, clan_boss_attack_count_param
+from lang.languages import TranslatableString
+from utils.ui_parameters import UIParameter
+
+# ----- List and organize simulation parameters of the UI -----
+
+BUDGET_SIMULATION_PARAMETERS: Dict[Union[str, TranslatableString], List[UIParameter]] = {
+    TranslatableString('General', french="Géneral"): [
+        mesurement_range_param,
+        rank_param,
+        vip_param,
+        hq_param,
+        pub_viewed_per_day_param,
+        ],
+    TranslatableString('Tradings', french="Échanges"): [
+        daily_10km_trading_count_param,
+        daily_100km_trading_count_param,
+        daily_1000km_trading_count_param,
+        daily_best_trading_count_param,
+        defense_lost_param,
+        defense_lost_convert_mode_param,
+        ],
+    TranslatableString('Units', french="Unités"): [
+        mill_lvl_param,
+        station_lvl_param,
+        collection_schedule_param,
+        temple_lvl_param,
+        ],
+    TranslatableString('Ambushes', french="Embuscades"): [
+        ambush_won_param,
+        fast_ambushes_param,
+        average_trophy_param,
+        ],
+    TranslatableString('Challenges', french="Défis"): [
+        gates_passed_param,
+        leaderboard_rank_param,
+        ],
+    TranslatableString('Clan'): [
+        clan_league_param,
+        clan_rank_param,
+        battle_ranking_param,
+        clanwar1v1_result_param,
+        opponent_rank_param,
+        personal_boss_kill_per_fight_param,
+        clan_boss_kills_param,
+        clan_boss_attack_count_param,
+        ask_for_donation_param,
+        ],
+    TranslatableString('Conversions'): [
+        lottery_convert_mode_param,
+        selected_heroes_param,
+        legendary_soul_convert_mode_param,
+        recycle_convert_mode_param,
+        recycle_target_type_param,
+        chest_opener_convert_mode_param,
+        ],
+    TranslatableString('Purchases', french="Achats"): [
+        equipment_craft_number_param,
+        ],
+    }
+"""Store all budget simulation UIParameters (sorted into categories)"""
+
+PARAMETERS_BY_NAME: Dict[str, UIParameter] = {ui_param.parameter_name: ui_param
+                                              for category in BUDGET_SIMULATION_PARAMETERS
+                                              for ui_param in BUDGET_SIMULATION_PARAMETERS[category]}
+
+
+def parse_parameters(raw_parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert parameters given by name with serialized values (see UIParameter.parse_value) into a parameter value dict
+
+    :raise ValueError: if a parameter is unknown or has an invalid value
+    """
+    if not isinstance(raw_parameters, dict):
+        raise ValueError("Parameters must be given as a mapping {parameter name: value}")
+    parameter_values = {}
+    for name, raw_value in raw_parameters.items():
+        if name not in PARAMETERS_BY_NAME:
+            raise ValueError("Unknown parameter {!r}".format(name))
+        parameter_values[name] = PARAMETERS_BY_NAME[name].parse_value(raw_value)
+    return parameter_values
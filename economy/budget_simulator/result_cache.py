@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Simulation result cache shared by all the server worker processes.
+
+Results are stored as JSON in a local SQLite database (in WAL mode so that readers don't block each other), indexed by
+a canonical hash of the simulation parameters. The total size is bounded and the least recently used entries are
+evicted first. Each entry is stamped with a hash of the simulation source code, so that deploying a new version of the
+gains automatically invalidates older results.
+
+The database location can be set with the WINS_RESULT_CACHE environment variable (and WINS_RESULT_CACHE_SIZE for its
+maximal size in bytes). Setting WINS_RESULT_CACHE to an empty string disables the cache.
+"""
+import enum
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VERSIONED_SOURCES = ['buildings', 'common', 'economy', 'lang', 'spells', 'units', 'utils']
+"""Project packages whose source code changes invalidate cached results"""
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "wins_simulation_cache.sqlite")
+DEFAULT_MAX_SIZE = 256 * 1024 ** 2
+
+
+def source_version(packages=VERSIONED_SOURCES, root: str = PROJECT_ROOT) -> str:
+    """Return a hash of the content of all the python files of the given packages"""
+    digest = hashlib.sha256()
+    for package in packages:
+        for directory, sub_directories, files in os.walk(os.path.join(root, package)):
+            sub_directories.sort()
+            for filename in sorted(files):
+                if filename.endswith('.py'):
+                    path = os.path.join(directory, filename)
+                    digest.update(os.path.relpath(path, root).encode())
+                    with open(path, 'rb') as source_file:
+                        digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def canonical_repr(value) -> str:
+    """
+    Return a string representation of a parameter value that is stable across processes and executions
+    (unlike hash() of enums and classes, or repr() of objects that include memory addresses).
+    """
+    if isinstance(value, enum.Enum):
+        return "{}.{}".format(type(value).__qualname__, value.name)
+    elif isinstance(value, type):
+        return "{}.{}".format(value.__module__, value.__qualname__)
+    elif isinstance(value, (tuple, list)):
+        return "({})".format(",".join(canonical_repr(v) for v in value))
+    elif isinstance(value, dict):
+        return "{{{}}}".format(",".join("{}:{}".format(canonical_repr(k), canonical_repr(value[k]))
+                                        for k in sorted(value, key=canonical_repr)))
+    else:
+        assert value is None or isinstance(value, (bool, int, float, str)), \
+            "Unsupported parameter value type {}".format(type(value))
+        return repr(value)
+
+
+def cache_key(*key_parts) -> str:
+    """Return a canonical hash of the given values (e.g. a parameter value dict and a language)"""
+    return hashlib.sha256(canonical_repr(key_parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    A size bounded LRU cache of JSON serializable results, stored in a SQLite database that can be shared by several
+    processes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_size: int = DEFAULT_MAX_SIZE, version: str = None):
+        """
+        :param path: str, path of the SQLite database file
+        :param max_size: int, maximal total size of the stored results in bytes
+        :param version: str, version stamp of the results, default to the hash of the simulation sources
+        """
+        self.path = path
+        self.max_size = max_size
+        self.version = version or source_version()
+        self._local = threading.local()
+        self._init_database()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, as sqlite connections must not be shared between threads"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _init_database(self):
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "last_access REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        # Drop results computed by other versions of the code
+        self._connection.execute("DELETE FROM results WHERE version != ?", (self.version,))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached result for this key, or None if it isn't cached"""
+        METRICS.increment('cache_lookups', cache='result_cache')
+        row = self._connection.execute("SELECT value FROM results WHERE key = ? AND version = ?",
+                                       (key, self.version)).fetchone()
+        if row is None:
+            METRICS.increment('cache_misses', cache='result_cache')
+            return None
+        self._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Any) -> str:
+        """
+        Store a result, then evict the least recently used ones if the cache became too big
+
+        :return: str, the JSON serialization of the result
+        """
+        # Imported here to keep the cache usable without plotly (e.g. by the command line simulator)
+        import plotly.utils
+        value = json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder)
+        connection = self._connection
+        connection.execute("INSERT OR REPLACE INTO results (key, version, value, size, last_access) "
+                           "VALUES (?, ?, ?, ?, ?)", (key, self.version, value, len(value), time.time()))
+        excess_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0] - self.max_size
+        if excess_size > 0:
+            # Delete the least recently used entries (except the new one) until enough space is freed
+            connection.execute(
+                "DELETE FROM results WHERE key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(size) OVER (ORDER BY last_access, key) - size AS freed_before FROM results"
+                "    WHERE key != ?"
+                "  ) WHERE freed_before < ?)",
+                (key, excess_size))
+        return value
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for this key, computing and storing it if necessary.
+
+        (Results are always returned in their JSON form, so that cache hits and misses return the same thing)
+        """
+        result = self.get(key)
+        if result is None:
+            result = json.loads(self.put(key, compute()))
+        return result
+
+
+def build_result_cache() -> Optional[ResultCache]:
+    """Build the result cache configured by the environment variables, or None if it's disabled or unavailable"""
+    path = os.environ.get('WINS_RESULT_CACHE', DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    try:
+        return ResultCache(path, max_size=int(os.environ.get('WINS_RESULT_CACHE_SIZE', DEFAULT_MAX_SIZE)))
+    except sqlite3.Error as error:
+        logger.warning("Simulation result cache disabled, cannot open %s: %s", path, error)
+        return None
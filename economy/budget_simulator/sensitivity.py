@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Sensitivity analysis: find which simulation parameters move the incomes the most around the current configuration.
+
+Each parameter is moved one step along its value range (previous and next value), only the gains that depend on it are
+recomputed (through the simulation per gain cache), then converters are applied again and the total incomes are
+compared to the current ones.
+"""
+from collections import namedtuple
+from typing import Dict, List, Iterable, Any
+
+from common.resources import ResourcePacket, Resources, ResourceQuantity
+from economy.budget_simulator.result_cache import canonical_repr
+from economy.budget_simulator.simulation import all_parameters, gain_income, resource_types_by_repr
+from economy.converters.abstract_converter import GainConverter
+from economy.gains import GAINS_DICTIONARY
+from economy.gains.abstract_gains import mesurement_range_param
+from utils.ui_parameters import UIParameter
+
+SensitivityEntry = namedtuple('SensitivityEntry', 'parameter value delta')
+"""Variation (delta) of a resource total when the parameter is set to value"""
+
+DEFAULT_TARGET_RESOURCES = (Resources.Gold, Resources.Goods, Resources.Gem)
+
+IGNORED_PARAMETERS = [mesurement_range_param]
+"""Parameters that are not part of the player economy (changing the measurement period just scales everything)"""
+
+
+def parameter_neighbours(parameter: UIParameter, value) -> List[Any]:
+    """Return the values one step away from value in the parameter value range"""
+    if parameter.value_range is bool:
+        return [not value]
+    elif parameter.value_range is int:
+        return [v for v in (value - 1, value + 1) if v >= 0]
+    else:
+        if value not in parameter.value_range:
+            return []
+        index = parameter.value_range.index(value)
+        return [parameter.value_range[k] for k in (index - 1, index + 1) if 0 <= k < len(parameter.value_range)]
+
+
+def _total_income(gains_incomes, ui_parameters_values: dict) -> ResourcePacket:
+    """Apply converters to a copy of the given gain incomes and return the sum of all of them"""
+    incomes = {gain_category: dict(gains_incomes[gain_category]) for gain_category in gains_incomes}
+    GainConverter.apply_all(incomes, ui_parameters_values)
+    total = ResourcePacket()
+    for gain_category in incomes:
+        for resource_packet in incomes[gain_category].values():
+            total = total + resource_packet
+    return total
+
+
+def sensitivity(ui_parameters_values: dict,
+                target_resources: Iterable[ResourceQuantity.VALID_RESOURCE_TYPE] = DEFAULT_TARGET_RESOURCES,
+                parameters: Iterable[UIParameter] = None,
+                ) -> Dict[ResourceQuantity.VALID_RESOURCE_TYPE, List[SensitivityEntry]]:
+    """
+    Compute the variation of the total incomes when each parameter is moved one step around its current value.
+
+    :param ui_parameters_values: dict, the current simulation parameter values
+    :param target_resources: the resource types to report
+    :param parameters: the parameters to perturb (default to all the simulation parameters)
+    :return: for each target resource, the list of non null variations sorted by decreasing absolute value.
+    """
+    parameters = all_parameters if parameters is None else parameters
+    target_resources = list(target_resources)
+
+    gains_incomes = {
+        gain_category: {gain: gain_income(gain, ui_parameters_values) for gain in GAINS_DICTIONARY[gain_category]}
+        for gain_category in GAINS_DICTIONARY
+        }
+    reference_total = _total_income(gains_incomes, ui_parameters_values)
+
+    report = {res_type: [] for res_type in target_resources}
+    for parameter in parameters:
+        if parameter in IGNORED_PARAMETERS or parameter.parameter_name not in ui_parameters_values:
+            continue
+        for value in parameter_neighbours(parameter, ui_parameters_values[parameter.parameter_name]):
+            perturbed_values = dict(ui_parameters_values)
+            perturbed_values[parameter.parameter_name] = value
+            try:
+                # Only recompute the gains that depend on the perturbed parameter
+                perturbed_incomes = {
+                    gain_category: {
+                        gain: (gain_income(gain, perturbed_values)
+                               if parameter in gain.parameter_dependencies
+                               else gains_incomes[gain_category][gain])
+                        for gain in GAINS_DICTIONARY[gain_category]
+                        }
+                    for gain_category in GAINS_DICTIONARY
+                    }
+                perturbed_total = _total_income(perturbed_incomes, perturbed_values)
+            except (AssertionError, IndexError):
+                # This value is not compatible with the other parameters (e.g. a trading count above the VIP limit)
+                continue
+            for res_type in target_resources:
+                delta = perturbed_total[res_type] - reference_total[res_type]
+                if abs(delta) >= 10**-2:
+                    report[res_type].append(SensitivityEntry(parameter, value, delta))
+
+    for res_type in target_resources:
+        report[res_type].sort(key=lambda entry: abs(entry.delta), reverse=True)
+    return report
+
+
+def serialize_report(report: Dict[ResourceQuantity.VALID_RESOURCE_TYPE, List[SensitivityEntry]]) -> List[list]:
+    """
+    Convert a sensitivity report into JSON serializable [resource type, [[parameter name, value, delta]...]] records
+    (values of list like parameters being given by their canonical_repr)
+    """
+    return [
+        [canonical_repr(res_type),
+         [[entry.parameter.parameter_name,
+           canonical_repr(entry.value) if isinstance(entry.parameter.value_range, tuple) else entry.value,
+           entry.delta]
+          for entry in entries]]
+        for res_type, entries in report.items()
+        ]
+
+
+def deserialize_report(records: List[list]) -> Dict[ResourceQuantity.VALID_RESOURCE_TYPE, List[SensitivityEntry]]:
+    """
+    Rebuild a sensitivity report from serialize_report records.
+
+    :raise KeyError: if a record refers to an unknown resource type, parameter or parameter value
+    """
+    parameters = {parameter.parameter_name: parameter for parameter in all_parameters}
+    resource_types = resource_types_by_repr()
+
+    def parse_value(parameter: UIParameter, value):
+        if not isinstance(parameter.value_range, tuple):
+            return value
+        values_by_repr = {canonical_repr(v): v for v in parameter.value_range}
+        return values_by_repr[value]
+
+    return {
+        resource_types[res_type_repr]: [
+            SensitivityEntry(parameters[name], parse_value(parameters[name], value), delta)
+            for name, value, delta in entries
+            ]
+        for res_type_repr, entries in records
+        }
@@ -20,41 +20,197 @@
 """
 Manage the parameters of the simulator
 """
-from typing import Type, Dict, Union
+import functools
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Type, Dict, Union, Any, Callable, Tuple, List, Optional
 
 from common.card_categories import CardCategories
 from common.rarity import Rarity
 from common.resources import Resources, ResourcePacket
-from economy.budget_simulator.bs_ui_parameters import BUDGET_SIMULATION_PARAMETERS
+from economy.budget_simulator.parameters import BUDGET_SIMULATION_PARAMETERS
+from economy.budget_simulator.result_cache import cache_key, canonical_repr, ResultCache
 from economy.chests import ALL_CHESTS
 from economy.converters.abstract_converter import GainConverter
 from economy.gains import GAINS_DICTIONARY
-from economy.gains.abstract_gains import Gain
-from lang.languages import TranslatableString
+from economy.gains.abstract_gains import Gain, mesurement_range_param
+from lang.languages import TranslatableString, Language
 from spells.common_spell import Spell
 from units.base_units import MovableUnit
 from units.equipments import Equipment
+from utils.metrics import METRICS
 
 all_parameters = [ui_param
                   for category in BUDGET_SIMULATION_PARAMETERS
                   for ui_param in BUDGET_SIMULATION_PARAMETERS[category]]
 
 
+def default_parameter_values() -> Dict[str, Any]:
+    """Return the default value of every simulation parameter, indexed by parameter name"""
+    return {ui_param.parameter_name: ui_param.default_value for ui_param in all_parameters}
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_gain_income(gain: Type[Gain], dependencies_values: tuple) -> ResourcePacket:
+    METRICS.increment('cache_misses', cache='gain_income')
+    with METRICS.timer('average_income', gain=gain.__name__):
+        return gain.average_income(**dict(dependencies_values))
+
+
+def gain_income(gain: Type[Gain], ui_parameters_values: dict) -> ResourcePacket:
+    """
+    Return gain.average_income(**ui_parameters_values), cached on the values of the parameters the gain depends on.
+
+    The returned ResourcePacket is a copy of the cached one, so it can be modified (converters may insert keys by
+    merely reading missing resource types).
+    """
+    dependencies_values = tuple(
+        (name, ui_parameters_values[name])
+        for name in itertools.chain([mesurement_range_param.parameter_name],
+                                    (ui_param.parameter_name for ui_param in gain.parameter_dependencies))
+        if name in ui_parameters_values
+        )
+    METRICS.increment('cache_lookups', cache='gain_income')
+    try:
+        return _cached_gain_income(gain, dependencies_values).copy()
+    except TypeError:
+        # Unhashable parameter value, don't cache it
+        METRICS.increment('cache_misses', cache='gain_income')
+        with METRICS.timer('average_income', gain=gain.__name__):
+            return gain.average_income(**ui_parameters_values)
+
+
 def update_income(ui_parameters_values: dict) -> Dict[Union[str, TranslatableString], Dict[Union[Type[Gain], Type['GainConverter']], ResourcePacket]]:
-    # Recompute all gains
-    incomes = {
-        gain_category: {
-            gain: gain.average_income(**ui_parameters_values)
-            for gain in GAINS_DICTIONARY[gain_category]
+    with METRICS.timer('update_income'):
+        # Recompute all gains (only the ones whose parameters changed are really computed)
+        incomes = {
+            gain_category: {
+                gain: gain_income(gain, ui_parameters_values)
+                for gain in GAINS_DICTIONARY[gain_category]
+                }
+            for gain_category in GAINS_DICTIONARY
             }
-        for gain_category in GAINS_DICTIONARY
+        # Apply converters
+        GainConverter.apply_all(incomes, ui_parameters_values)
+
+    return incomes
+
+
+def serialize_incomes(incomes: Dict[Any, Dict[Any, ResourcePacket]]) -> List[list]:
+    """Convert simulation incomes into JSON serializable [category, gain, {resource type: quantity}] records"""
+    return [
+        [category.translated_into(Language.ENGLISH) if isinstance(category, TranslatableString) else category,
+         gain.__name__,
+         {canonical_repr(res_type): quantity for res_type, quantity in incomes[category][gain].items()}]
+        for category in incomes
+        for gain in incomes[category]
+        ]
+
+
+@functools.lru_cache(maxsize=1)
+def _gains_by_name() -> Dict[Tuple[str, str], Tuple[Any, type]]:
+    # Indexed by category too, as a converter can have the same name as a gain (e.g. Lottery)
+    categories_gains = [(category, gain) for category in GAINS_DICTIONARY for gain in GAINS_DICTIONARY[category]]
+    categories_gains += [(GainConverter.CONVERTER_CATEGORY, converter) for converter in GainConverter.ALL]
+    return {
+        (category.translated_into(Language.ENGLISH) if isinstance(category, TranslatableString) else category,
+         gain.__name__): (category, gain)
+        for category, gain in categories_gains
         }
-    # Apply converters
-    GainConverter.apply_all(incomes, ui_parameters_values)
 
+
+@functools.lru_cache(maxsize=1)
+def resource_types_by_repr() -> Dict[str, Any]:
+    """Return the resource types of RESOURCE_SORTING_MAP indexed by their canonical_repr"""
+    return {canonical_repr(resource_type): resource_type for resource_type in RESOURCE_SORTING_MAP}
+
+
+def deserialize_incomes(records: List[list]) -> Dict[Any, Dict[Any, ResourcePacket]]:
+    """
+    Rebuild simulation incomes from serialize_incomes records.
+
+    :raise KeyError: if a record refers to an unknown category, gain or resource type (e.g. it was stored by an other
+        version of the code)
+    """
+    gains_by_name, resource_types = _gains_by_name(), resource_types_by_repr()
+    incomes = {}
+    for category_name, gain_name, quantities in records:
+        category, gain = gains_by_name[(category_name, gain_name)]
+        packet = ResourcePacket()
+        for res_type_repr, quantity in quantities.items():
+            packet[resource_types[res_type_repr]] = quantity
+        incomes.setdefault(category, {})[gain] = packet
     return incomes
 
 
+class SimulationStore:
+    """
+    Server side store of the latest simulations, indexed by a key small enough to be sent to the client (so that every
+    graph callback of a session can retrieve the incomes without running the simulation again).
+
+    Simulations computed by other server processes (or by the simulation API) are found in the shared result cache,
+    where incomes are stored as {'incomes': serialize_incomes records} under the same key.
+    """
+
+    def __init__(self, max_size: int = 128, result_cache: Optional[ResultCache] = None):
+        """
+        :param max_size: int, maximal number of simulations kept in this process
+        :param result_cache: ResultCache shared by the server processes, or None to only keep simulations locally
+        """
+        self.max_size = max_size
+        self.result_cache = result_cache
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, ui_parameters_values: dict) -> str:
+        """Run the simulation (if not already stored) and return its key"""
+        key = cache_key(ui_parameters_values)
+        self.get(key, lambda: ui_parameters_values)
+        return key
+
+    def _shared_incomes(self, key: str) -> Optional[Dict]:
+        """Return the incomes stored in the shared result cache, or None if they aren't there (or can't be read)"""
+        if self.result_cache is None:
+            return None
+        entry = self.result_cache.get(key)
+        if not isinstance(entry, dict) or entry.get('incomes') is None:
+            return None
+        try:
+            return deserialize_incomes(entry['incomes'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get(self, key: str, ui_parameters_values_factory: Callable[[], dict]) -> Tuple[dict, Dict]:
+        """
+        Return the parameter values and the incomes of a stored simulation.
+
+        :param key: str, the key returned by put
+        :param ui_parameters_values_factory: callable returning the simulation parameter values, only used if the
+            simulation isn't stored in this process (evicted, or computed by another server process)
+        :return: (ui_parameters_values, incomes)
+        """
+        METRICS.increment('cache_lookups', cache='simulation_store')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        METRICS.increment('cache_misses', cache='simulation_store')
+        ui_parameters_values = ui_parameters_values_factory()
+        incomes = self._shared_incomes(key)
+        if incomes is None:
+            incomes = update_income(ui_parameters_values)
+            if self.result_cache is not None:
+                self.result_cache.put(key, {'incomes': serialize_incomes(incomes)})
+        entry = (ui_parameters_values, incomes)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+
 RESOURCE_SORTING_MAP = {
     resource_type: order
     for order, resource_type in enumerate(
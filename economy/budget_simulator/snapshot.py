@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Precomputed simulation results of the default scenario and of the most common rank x VIP x HQ scenarios.
+
+The snapshot is built once at deployment (see bin/post_compile):
+
+    python3 -m economy.budget_simulator.snapshot
+
+Then the application loads it at startup, uses the default scenario as initial content of its graphs and serves the
+precomputed payloads to matching requests.
+The snapshot stores, for each scenario and each language, the incomes of every gain and the payloads of all the
+graphs (compressed, as they are very redundant). It's stamped with the source version, so a snapshot built by another
+version of the code is ignored.
+"""
+import argparse
+import base64
+import functools
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Iterable, Any
+
+import plotly.utils
+
+from common.leagues import Rank
+from common.vip import VIP
+from economy.budget_simulator.result_cache import source_version, cache_key, canonical_repr
+from economy.budget_simulator.simulation import default_parameter_values, serialize_incomes
+from lang.languages import Language
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.environ.get('WINS_SNAPSHOT', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                              "snapshot.json.gz"))
+
+COMMON_RANKS = list(Rank)
+COMMON_VIPS = [VIP.lvl0, VIP.lvl7, VIP.lvl10, VIP.lvl15]
+COMMON_HQ_LEVELS = [10, 15, 20, 25]
+
+
+def common_scenarios(ranks: Iterable[Rank] = COMMON_RANKS, vips: Iterable[VIP] = COMMON_VIPS,
+                     hq_levels: Iterable[int] = COMMON_HQ_LEVELS) -> List[Dict[str, Any]]:
+    """Return the parameter values of the default scenario followed by every rank x VIP x HQ combination"""
+    default_values = default_parameter_values()
+    scenarios = [default_values]
+    for rank in ranks:
+        for vip in vips:
+            for hq_lvl in hq_levels:
+                scenario = dict(default_values, rank=rank, vip=vip, hq_lvl=hq_lvl)
+                if scenario != default_values:
+                    scenarios.append(scenario)
+    return scenarios
+
+
+def _compress(payload) -> str:
+    return base64.b64encode(zlib.compress(json.dumps(payload, cls=plotly.utils.PlotlyJSONEncoder).encode())).decode()
+
+
+@functools.lru_cache(maxsize=8)
+def _decompress(data: str):
+    # Cached as every graph callback of a request looks up the same scenario (WARNING: results are shared)
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+def build_snapshot(path: str = SNAPSHOT_PATH, scenarios: List[Dict[str, Any]] = None):
+    """
+    Compute the given scenarios (default to common_scenarios()) in every language and save them at path.
+    """
+    # Imported here as the main module builds the whole application
+    from economy.budget_simulator.main import compute_graphs
+    from economy.budget_simulator.simulation import update_income
+
+    scenarios = common_scenarios() if scenarios is None else scenarios
+    records = []
+    for parameter_values in scenarios:
+        incomes = serialize_incomes(update_income(parameter_values))
+        for language in Language:
+            records.append({
+                'key': cache_key(parameter_values, language.name),
+                'language': language.name,
+                'parameters': {name: canonical_repr(value) for name, value in parameter_values.items()},
+                'incomes': incomes,
+                'graphs': _compress(compute_graphs(parameter_values, language)),
+                })
+    with gzip.open(path, 'wt') as snapshot_file:
+        json.dump({'version': source_version(), 'created': time.time(), 'scenarios': records}, snapshot_file)
+
+
+class Snapshot:
+    """Precomputed graph payloads loaded from a snapshot file, indexed by result_cache.cache_key"""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self._graphs: Dict[str, str] = {}
+        self.incomes: Dict[str, List[list]] = {}
+        if not os.path.isfile(path):
+            return
+        with gzip.open(path, 'rt') as snapshot_file:
+            content = json.load(snapshot_file)
+        if content['version'] != source_version():
+            logger.warning("Ignoring simulation snapshot %s built from another version of the code", path)
+            return
+        for record in content['scenarios']:
+            # Keep payloads compressed in memory, they are only decompressed when served
+            self._graphs[record['key']] = record['graphs']
+            self.incomes[record['key']] = record['incomes']
+
+    def __len__(self):
+        return len(self._graphs)
+
+    def __contains__(self, key: str):
+        return key in self._graphs
+
+    def get(self, key: str) -> Optional[list]:
+        """Return the graphs payloads of a precomputed scenario or None (the returned list must not be modified)"""
+        if key not in self._graphs:
+            return None
+        return _decompress(self._graphs[key])
+
+    def get_graph(self, key: str, graph_index: int) -> Optional[Any]:
+        """Return the payload of a single graph (index in graphs.graphs_to_update) of a precomputed scenario or None"""
+        graphs = self.get(key)
+        return None if graphs is None else graphs[graph_index]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute the most common budget simulator scenarios")
+    parser.add_argument('--output', default=SNAPSHOT_PATH, help="path of the snapshot file")
+    parser.add_argument('--default-only', action='store_true', help="only precompute the default scenario")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    build_snapshot(args.output, scenarios=[default_parameter_values()] if args.default_only else None)
+    print("Snapshot {} built in {:.1f}s".format(args.output, time.time() - start_time))
@@ -0,0 +1,391 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Evaluate the budget simulation over a whole grid of parameter values at once.
+
+A grid is defined by a list of UIParameter axes and their values, other parameters keep a base value. Each gain is
+only computed over the axes listed in its `parameter_dependencies` and broadcast over the others. Converters on the
+other hand depend on every gain, so when they are enabled they are applied point by point, and large grids are split
+over several processes.
+
+Usage example:
+
+    >>> result = sweep({rank_param: None, vip_param: None, hq_param: None})
+    >>> result.shape
+    (46, 16, 30)
+    >>> result.sel(rank=Rank.Camel1, vip=VIP.lvl7).total()[:, result.resource_index(Resources.Gold)]
+"""
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Union, Optional, Sequence, Any
+
+import numpy
+
+from common.resources import ResourcePacket, ResourceQuantity
+from economy.budget_simulator.result_cache import canonical_repr
+from economy.budget_simulator.simulation import RESOURCE_SORTING_MAP, default_parameter_values, gain_income
+from economy.budget_simulator.time_series import GainKey
+from economy.converters.abstract_converter import GainConverter
+from economy.gains import GAINS_DICTIONARY
+from economy.gains.abstract_gains import mesurement_range_param
+from lang.languages import TranslatableString, Language
+from utils.ui_parameters import UIParameter
+
+GridSpec = Dict[Union[UIParameter, str], Optional[Sequence]]
+"""
+Grid definition: {parameter (or parameter name): values}.
+If values is None, the whole value_range of the parameter is used (bool and list like parameters only).
+"""
+Axes = List[Tuple[str, tuple]]
+
+PARALLEL_THRESHOLD = 2000
+"""Minimal number of grid points (with converters enabled) before splitting the computation over several processes"""
+
+
+class SweepResult:
+    """
+    Incomes of every gain over a parameter grid.
+
+    `values` is a numpy array of shape (*axes lengths, gains, resource types). Grid points where a gain is not
+    computable (e.g. a trading count greater than what the VIP level allows) are filled with NaN.
+    """
+
+    def __init__(self, values: numpy.ndarray, axes: Axes, gains: List[GainKey],
+                 resource_types: List[ResourceQuantity.VALID_RESOURCE_TYPE]):
+        assert values.shape == tuple(len(axis_values) for _, axis_values in axes) + (len(gains), len(resource_types))
+        self.values = values
+        self.axes = axes
+        self.gains = gains
+        self.resource_types = resource_types
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the parameter grid"""
+        return self.values.shape[:len(self.axes)]
+
+    @property
+    def axes_names(self) -> List[str]:
+        return [name for name, _ in self.axes]
+
+    def axis_index(self, parameter_name: str) -> int:
+        return self.axes_names.index(parameter_name)
+
+    def resource_index(self, resource_type: ResourceQuantity.VALID_RESOURCE_TYPE) -> Optional[int]:
+        """Return the index of the given resource type on the last axis (or None if it never appears)"""
+        return self.resource_types.index(resource_type) if resource_type in self.resource_types else None
+
+    def gain_names(self) -> List[List[str]]:
+        """Return the [category, gain name] of every gain, for serialization"""
+        return [[gain_category.translated_into(Language.ENGLISH) if isinstance(gain_category, TranslatableString)
+                 else gain_category, gain.__name__]
+                for gain_category, gain in self.gains]
+
+    def resource_names(self) -> List[str]:
+        """Return the stable name of every resource type (see result_cache.canonical_repr), for serialization"""
+        return [canonical_repr(res_type) for res_type in self.resource_types]
+
+    def sel(self, **coordinates) -> 'SweepResult':
+        """
+        Select a sub-grid by fixing the value of some axes, the fixed axes are removed from the result.
+
+        :param coordinates: {parameter_name: value}, the value must be one of the axis values
+        """
+        indexes = []
+        axes = []
+        for name, axis_values in self.axes:
+            if name in coordinates:
+                indexes.append(axis_values.index(coordinates[name]))
+            else:
+                indexes.append(slice(None))
+                axes.append((name, axis_values))
+        return SweepResult(self.values[tuple(indexes)], axes, self.gains, self.resource_types)
+
+    def invalid(self) -> numpy.ndarray:
+        """Return the boolean mask of the grid points where the incomes are not computable"""
+        # When no point is valid there is no resource type at all, and thus no NaN to see
+        return numpy.isnan(self.values).any(axis=(-2, -1)) | (len(self.resource_types) == 0)
+
+    def total(self) -> numpy.ndarray:
+        """Return the incomes of all gains summed up, as an array of shape (*axes lengths, resource types)"""
+        return self.values.sum(axis=-2)
+
+    def to_resource_packet(self, grid_index: Tuple[int, ...], gain_index: int = None) -> ResourcePacket:
+        """
+        Convert the result of a grid point back into a ResourcePacket
+
+        :param grid_index: the index of the point in the grid
+        :param gain_index: the index of a gain, if None, return the total of all gains.
+        """
+        quantities = self.values[grid_index]
+        quantities = quantities.sum(axis=0) if gain_index is None else quantities[gain_index]
+        return ResourcePacket(*(ResourceQuantity(res_type, float(quantity))
+                                for res_type, quantity in zip(self.resource_types, quantities)
+                                if quantity != 0))
+
+
+def _normalize_grid(grid: GridSpec) -> Axes:
+    """Convert a GridSpec into an ordered list of (parameter name, values)"""
+    axes = []
+    for parameter, values in grid.items():
+        if values is None:
+            assert isinstance(parameter, UIParameter), "Values of a parameter given by name must be specified"
+            if parameter.value_range is bool:
+                values = (False, True)
+            else:
+                assert isinstance(parameter.value_range, tuple), \
+                    "Values of int parameter {} must be specified".format(parameter.parameter_name)
+                values = parameter.value_range
+        name = parameter.parameter_name if isinstance(parameter, UIParameter) else parameter
+        axes.append((name, tuple(values)))
+    assert len({name for name, _ in axes}) == len(axes), "Axes must be unique"
+    return axes
+
+
+class _GainCache:
+    """Compute gains incomes over the sub-grid of the axes they depend on, and only once per sub-grid point"""
+
+    def __init__(self, axes: Axes, base_values: Dict[str, Any]):
+        self.axes = axes
+        self.base_values = base_values
+        self._dependent_axes = {}
+        self._cache = {}
+
+    def dependent_axes(self, gain) -> Tuple[int, ...]:
+        """Return the indexes of the grid axes the given gain depends on"""
+        if gain not in self._dependent_axes:
+            dependencies = {ui_param.parameter_name for ui_param in gain.parameter_dependencies}
+            dependencies.add(mesurement_range_param.parameter_name)
+            self._dependent_axes[gain] = tuple(k for k, (name, _) in enumerate(self.axes) if name in dependencies)
+        return self._dependent_axes[gain]
+
+    def get(self, gain, grid_index: Tuple[int, ...]) -> Optional[ResourcePacket]:
+        """Return the income of the gain at the given grid point, or None if it's invalid there"""
+        key = (gain,) + tuple(grid_index[k] for k in self.dependent_axes(gain))
+        if key not in self._cache:
+            parameter_values = dict(self.base_values)
+            parameter_values.update({self.axes[k][0]: self.axes[k][1][grid_index[k]]
+                                     for k in self.dependent_axes(gain)})
+            try:
+                self._cache[key] = gain.average_income(**parameter_values)
+            except (AssertionError, IndexError):
+                # Incompatible parameter values (e.g. a building level not available at this HQ level)
+                self._cache[key] = None
+        return self._cache[key]
+
+
+def _evaluate_points(axes: Axes, base_values: Dict[str, Any], start: int, stop: int):
+    """
+    Evaluate the incomes, converters included, of the grid points of flat index [start; stop[.
+
+    :return: (gains, resource_types, values, invalid) with values of shape (stop-start, gains, resource types), and
+        invalid a boolean mask of the points where at least one gain cannot be computed.
+    """
+    shape = tuple(len(axis_values) for _, axis_values in axes)
+    cache = _GainCache(axes, base_values)
+    gain_indexes: Dict[GainKey, int] = {}
+    resource_indexes: Dict[ResourceQuantity.VALID_RESOURCE_TYPE, int] = {}
+    entries = []
+    invalid = numpy.zeros(stop - start, dtype=bool)
+
+    for point in range(start, stop):
+        grid_index = numpy.unravel_index(point, shape) if shape else ()
+        parameter_values = dict(base_values)
+        parameter_values.update({name: axis_values[k] for (name, axis_values), k in zip(axes, grid_index)})
+
+        incomes = {gain_category: {gain: cache.get(gain, grid_index) for gain in GAINS_DICTIONARY[gain_category]}
+                   for gain_category in GAINS_DICTIONARY}
+        if any(income is None for gain_incomes in incomes.values() for income in gain_incomes.values()):
+            invalid[point - start] = True
+            continue
+        try:
+            GainConverter.apply_all(incomes, parameter_values)
+        except (AssertionError, IndexError):
+            # Incompatible parameter values for a converter (e.g. more convoys lost than convoys sent)
+            invalid[point - start] = True
+            continue
+
+        for gain_category in incomes:
+            for gain, resource_packet in incomes[gain_category].items():
+                gain_index = gain_indexes.setdefault((gain_category, gain), len(gain_indexes))
+                for res_type, quantity in resource_packet.items():
+                    entries.append((point - start, gain_index,
+                                    resource_indexes.setdefault(res_type, len(resource_indexes)), quantity))
+
+    values = numpy.zeros((stop - start, len(gain_indexes), len(resource_indexes)))
+    if entries:
+        point_indexes, gain_idx, res_idx, quantities = zip(*entries)
+        values[point_indexes, gain_idx, res_idx] = quantities
+    return list(gain_indexes), list(resource_indexes), values, invalid
+
+
+def _broadcast_sweep(axes: Axes, base_values: Dict[str, Any]) -> SweepResult:
+    """Converter free sweep, each gain being computed over the axes it depends on then broadcast over the others"""
+    shape = tuple(len(axis_values) for _, axis_values in axes)
+    cache = _GainCache(axes, base_values)
+    gains: List[GainKey] = [(gain_category, gain)
+                            for gain_category in GAINS_DICTIONARY for gain in GAINS_DICTIONARY[gain_category]]
+
+    # Compute each gain on its own sub-grid
+    sub_grids = []
+    for _, gain in gains:
+        dependent_axes = cache.dependent_axes(gain)
+        sub_shape = tuple(shape[k] for k in dependent_axes)
+        sub_grid = {}
+        for sub_index in itertools.product(*(range(n) for n in sub_shape)):
+            grid_index = [0] * len(shape)
+            for k, i in zip(dependent_axes, sub_index):
+                grid_index[k] = i
+            sub_grid[sub_index] = cache.get(gain, tuple(grid_index))
+        sub_grids.append((dependent_axes, sub_shape, sub_grid))
+
+    resource_types = _sort_resource_types(ResourcePacket.get_all_resource_types(
+        packet for _, _, sub_grid in sub_grids for packet in sub_grid.values() if packet is not None))
+    resource_indexes = {res_type: k for k, res_type in enumerate(resource_types)}
+
+    # Then broadcast them over the whole grid
+    values = numpy.zeros(shape + (len(gains), len(resource_types)))
+    for gain_index, (dependent_axes, sub_shape, sub_grid) in enumerate(sub_grids):
+        sub_values = numpy.zeros(sub_shape + (len(resource_types),))
+        for sub_index, packet in sub_grid.items():
+            if packet is None:
+                sub_values[sub_index] = numpy.nan
+            else:
+                for res_type, quantity in packet.items():
+                    sub_values[sub_index + (resource_indexes[res_type],)] = quantity
+        broadcast_shape = tuple(shape[k] if k in dependent_axes else 1 for k in range(len(shape)))
+        values[..., gain_index, :] = sub_values.reshape(broadcast_shape + (len(resource_types),))
+
+    # A point is invalid as soon as one of its gains is
+    invalid = numpy.isnan(values).any(axis=(-2, -1))
+    values[invalid] = numpy.nan
+    return SweepResult(values, axes, gains, resource_types)
+
+
+def _sort_resource_types(resource_types) -> List[ResourceQuantity.VALID_RESOURCE_TYPE]:
+    return sorted(resource_types, key=lambda res_type: RESOURCE_SORTING_MAP.get(res_type, len(RESOURCE_SORTING_MAP)))
+
+
+def sweep(grid: GridSpec, base_values: Dict[str, Any] = None, apply_converters: bool = True,
+          processes: Optional[int] = None, parallel_threshold: int = PARALLEL_THRESHOLD) -> SweepResult:
+    """
+    Compute the incomes of every gain over every combination of the given parameter values.
+
+    :param grid: GridSpec, the parameters to vary and their values
+    :param base_values: Dict[str, Any], values of the parameters not in the grid (default to the UI default values)
+    :param apply_converters: bool, if False converters are skipped, and the sweep is fully broadcast.
+    :param processes: Optional[int], maximal number of worker processes (default to the number of CPUs)
+    :param parallel_threshold: int, minimal grid size for using worker processes
+    :return: SweepResult
+    """
+    axes = _normalize_grid(grid)
+    parameter_values = default_parameter_values()
+    parameter_values.update(base_values or {})
+    if not apply_converters:
+        return _broadcast_sweep(axes, parameter_values)
+
+    shape = tuple(len(axis_values) for _, axis_values in axes)
+    point_count = math.prod(shape)
+    processes = processes or os.cpu_count() or 1
+
+    # Split the grid into chunks of consecutive points
+    if point_count >= parallel_threshold and processes > 1:
+        chunk_size = math.ceil(point_count / (processes * 4))
+        bounds = [(start, min(start + chunk_size, point_count)) for start in range(0, point_count, chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunks = list(executor.map(_evaluate_points, *zip(*((axes, parameter_values, start, stop)
+                                                                  for start, stop in bounds))))
+    else:
+        bounds = [(0, point_count)]
+        chunks = [_evaluate_points(axes, parameter_values, 0, point_count)]
+
+    # Merge chunk results, each of them have their own gain and resource orders
+    gains: List[GainKey] = []
+    for chunk_gains, _, _, _ in chunks:
+        gains.extend(gain_key for gain_key in chunk_gains if gain_key not in gains)
+    resource_types = _sort_resource_types({res_type for _, chunk_resources, _, _ in chunks
+                                           for res_type in chunk_resources})
+    gain_indexes = {gain_key: k for k, gain_key in enumerate(gains)}
+    resource_indexes = {res_type: k for k, res_type in enumerate(resource_types)}
+
+    values = numpy.zeros((point_count, len(gains), len(resource_types)))
+    for (start, stop), (chunk_gains, chunk_resources, chunk_values, invalid) in zip(bounds, chunks):
+        chunk_view = values[start:stop]
+        chunk_view[numpy.ix_(numpy.arange(stop - start),
+                             numpy.array([gain_indexes[gain_key] for gain_key in chunk_gains], dtype=int),
+                             numpy.array([resource_indexes[res_type] for res_type in chunk_resources], dtype=int),
+                             )] = chunk_values
+        chunk_view[invalid] = numpy.nan
+    return SweepResult(values.reshape(shape + values.shape[1:]), axes, gains, resource_types)
+
+
+def evaluate_batch(points: Sequence[Dict[str, Any]], base_values: Dict[str, Any] = None) -> SweepResult:
+    """
+    Compute the incomes, converters included, of a batch of arbitrary parameter points (unlike sweep, they don't have
+    to form a grid).
+
+    Points are evaluated together: each gain is only computed once per distinct values of its dependencies across the
+    batch, and the results are gathered into a single array.
+
+    :param points: the parameter values of each point (missing parameters take their base value)
+    :param base_values: Dict[str, Any], values of the parameters not given by the points (default to the UI default
+        values)
+    :return: SweepResult with a single 'point' axis (points where a gain is not computable are filled with NaN)
+    """
+    parameter_values = default_parameter_values()
+    parameter_values.update(base_values or {})
+    points_values = [dict(parameter_values, **point) for point in points]
+
+    gains: List[GainKey] = [(gain_category, gain)
+                            for gain_category in GAINS_DICTIONARY for gain in GAINS_DICTIONARY[gain_category]]
+    points_incomes = []
+    for values in points_values:
+        try:
+            incomes = {gain_category: {gain: gain_income(gain, values) for gain in GAINS_DICTIONARY[gain_category]}
+                       for gain_category in GAINS_DICTIONARY}
+            GainConverter.apply_all(incomes, values)
+        except (AssertionError, IndexError):
+            # Incompatible parameter values (e.g. a building level not available at this HQ level, or more convoys
+            # lost than convoys sent)
+            points_incomes.append(None)
+            continue
+        points_incomes.append(incomes)
+        # Converters may add their own entries
+        gains.extend((gain_category, gain) for gain_category in incomes for gain in incomes[gain_category]
+                     if (gain_category, gain) not in gains)
+
+    resource_types = _sort_resource_types(ResourcePacket.get_all_resource_types(
+        packet for incomes in points_incomes if incomes is not None
+        for gain_incomes in incomes.values() for packet in gain_incomes.values()))
+    gain_indexes = {gain_key: k for k, gain_key in enumerate(gains)}
+    resource_indexes = {res_type: k for k, res_type in enumerate(resource_types)}
+
+    entries = [(k, gain_indexes[(gain_category, gain)], resource_indexes[res_type], quantity)
+               for k, incomes in enumerate(points_incomes) if incomes is not None
+               for gain_category in incomes
+               for gain, resource_packet in incomes[gain_category].items()
+               for res_type, quantity in resource_packet.items()]
+    values = numpy.zeros((len(points_values), len(gains), len(resource_types)))
+    if entries:
+        point_indexes, gain_idx, res_idx, quantities = zip(*entries)
+        values[point_indexes, gain_idx, res_idx] = quantities
+    values[numpy.array([incomes is None for incomes in points_incomes], dtype=bool)] = numpy.nan
+    return SweepResult(values, [('point', tuple(range(len(points_values))))], gains, resource_types)
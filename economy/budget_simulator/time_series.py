@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Day by day budget simulation over an arbitrary horizon.
+
+Instead of averaging gains over a MeasurementPeriod, each gain is evaluated once for each day of the week (weekly
+challenges, clan wars, etc. then land on their real weekday) and the resulting week is tiled over the whole horizon.
+"""
+from typing import Dict, List, Tuple, Type, Union, Optional
+
+import numpy
+
+from common.resources import ResourcePacket, ResourceQuantity
+from economy.budget_simulator.simulation import RESOURCE_SORTING_MAP
+from economy.converters.abstract_converter import GainConverter
+from economy.gains import GAINS_DICTIONARY
+from economy.gains.abstract_gains import Gain, Days, MeasurementPeriod
+from lang.languages import TranslatableString
+
+GainKey = Tuple[Union[str, TranslatableString], Union[Type[Gain], Type[GainConverter]]]
+"""Label of a gain in the time series: (gain category, gain or converter class)"""
+
+
+def update_day_income(ui_parameters_values: dict, day: Days) -> Dict[Union[str, TranslatableString], Dict[Union[Type[Gain], Type[GainConverter]], ResourcePacket]]:
+    """
+    Same as simulation.update_income, but return the incomes of one specific day of the week instead of an average.
+
+    :param ui_parameters_values: dict, the simulation parameter values (mesurement_range is ignored)
+    :param day: Days, the day of the week to simulate
+    """
+    ui_parameters_values = dict(ui_parameters_values)
+    ui_parameters_values.pop('mesurement_range', None)
+
+    incomes = {
+        gain_category: {
+            gain: gain.daily_income(day=day, **ui_parameters_values)
+            for gain in GAINS_DICTIONARY[gain_category]
+            }
+        for gain_category in GAINS_DICTIONARY
+        }
+    # Converters are applied on a single day
+    GainConverter.apply_all(incomes, dict(ui_parameters_values, mesurement_range=MeasurementPeriod.DAY))
+
+    return incomes
+
+
+class BudgetTimeSeries:
+    """
+    Store the incomes of every gain for every simulated day in a (days x gains x resources) numpy tensor.
+    """
+
+    def __init__(self, daily_incomes: numpy.ndarray, gains: List[GainKey],
+                 resource_types: List[ResourceQuantity.VALID_RESOURCE_TYPE], start_day: Days = Days.Monday):
+        """
+        :param daily_incomes: numpy.ndarray of shape (days, len(gains), len(resource_types))
+        :param gains: List[GainKey], label of each gain of the second axis
+        :param resource_types: list of the resource types of the third axis
+        :param start_day: Days, the weekday of the first simulated day
+        """
+        assert daily_incomes.shape[1:] == (len(gains), len(resource_types))
+        self.daily_incomes = daily_incomes
+        self.gains = gains
+        self.resource_types = resource_types
+        self.start_day = start_day
+        self._resource_indexes = {res_type: k for k, res_type in enumerate(resource_types)}
+
+    @property
+    def days(self) -> int:
+        """Number of simulated days"""
+        return self.daily_incomes.shape[0]
+
+    def resource_index(self, resource_type: ResourceQuantity.VALID_RESOURCE_TYPE) -> Optional[int]:
+        """Return the index of the given resource type on the resource axis (or None if it never appears)"""
+        return self._resource_indexes.get(resource_type)
+
+    def weekday(self, day_index: int) -> Days:
+        """Return the weekday of the given simulated day"""
+        return Days((self.start_day + day_index) % 7)
+
+    def total_daily_incomes(self) -> numpy.ndarray:
+        """Return the net income of each day, all gains summed up, as a (days x resources) array"""
+        return self.daily_incomes.sum(axis=1)
+
+    def cumulative_balance(self, initial_balance: ResourcePacket = None) -> numpy.ndarray:
+        """
+        Return the balance at the end of each simulated day as a (days x resources) array
+
+        :param initial_balance: Optional[ResourcePacket], resources owned before the first day
+            (resource types that never appear in the simulation are ignored).
+        """
+        balance = numpy.cumsum(self.total_daily_incomes(), axis=0)
+        if initial_balance is not None:
+            for res_type in initial_balance:
+                res_index = self.resource_index(res_type)
+                if res_index is not None:
+                    balance[:, res_index] += initial_balance[res_type]
+        return balance
+
+    def resource_balance(self, resource_type: ResourceQuantity.VALID_RESOURCE_TYPE,
+                         initial_quantity: float = 0) -> numpy.ndarray:
+        """Return the cumulative balance curve of a single resource type (zeros if it never appears)"""
+        res_index = self.resource_index(resource_type)
+        if res_index is None:
+            return numpy.full(self.days, initial_quantity, dtype=float)
+        return numpy.cumsum(self.daily_incomes[:, :, res_index].sum(axis=1)) + initial_quantity
+
+
+def simulate_days(ui_parameters_values: dict, days: int = 365, start_day: Days = Days.Monday) -> BudgetTimeSeries:
+    """
+    Simulate the budget day by day.
+
+    Each gain is computed once per weekday, then the week is tiled over the whole horizon.
+
+    :param ui_parameters_values: dict, the simulation parameter values
+    :param days: int, the number of days to simulate
+    :param start_day: Days, the weekday of the first simulated day
+    :return: BudgetTimeSeries
+    """
+    assert days >= 0
+    week = [update_day_income(ui_parameters_values, day) for day in Days]
+
+    # List gains and resource types appearing at least once in the week
+    gains: List[GainKey] = []
+    for day_incomes in week:
+        for gain_category in day_incomes:
+            for gain in day_incomes[gain_category]:
+                if (gain_category, gain) not in gains:
+                    gains.append((gain_category, gain))
+    resource_types = sorted(
+        ResourcePacket.get_all_resource_types(day_incomes[gain_category][gain]
+                                              for day_incomes in week
+                                              for gain_category, gain in gains
+                                              if gain in day_incomes.get(gain_category, {})),
+        key=lambda res_type: RESOURCE_SORTING_MAP.get(res_type, len(RESOURCE_SORTING_MAP)),
+        )
+    resource_indexes = {res_type: k for k, res_type in enumerate(resource_types)}
+
+    # Fill the (weekday x gain x resource) tensor
+    weekly_incomes = numpy.zeros((7, len(gains), len(resource_types)))
+    for day, day_incomes in zip(Days, week):
+        for gain_index, (gain_category, gain) in enumerate(gains):
+            resource_packet = day_incomes.get(gain_category, {}).get(gain)
+            if resource_packet is None:
+                continue
+            for res_type, quantity in resource_packet.items():
+                weekly_incomes[day, gain_index, resource_indexes[res_type]] = quantity
+
+    # Tile the week over the whole horizon
+    weekdays = (start_day + numpy.arange(days)) % 7
+    return BudgetTimeSeries(weekly_incomes[weekdays], gains, resource_types, start_day=start_day)
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Answer the question "When is my next Seraph?": combine the cost of a target with a simulated budget time series to
+find the earliest day when each of the required resources is available.
+
+Usage example:
+
+    >>> time_series = simulate_days(ui_parameters_values, days=365)
+    >>> time_to_afford(HQ(17), time_series)
+    AffordResult(day=42, constraints={Resources.Goods: 7, Resources.Gold: 42})
+"""
+import functools
+from collections import namedtuple
+from typing import Union, Iterable, Dict, Optional, List, Set
+
+import numpy
+
+from common.card_categories import CardCategories
+from common.cards import Upgradable, Card
+from common.resources import ResourcePacket, ResourceQuantity, Resources
+from economy.budget_simulator.time_series import BudgetTimeSeries
+
+AffordResult = namedtuple('AffordResult', 'day constraints')
+"""
+day: Optional[int], the number of days needed to afford the whole target (0 if it's already affordable), None if it's
+    not reached within the simulated horizon.
+constraints: Dict[resource type, Optional[int]], the same for each required resource type.
+"""
+
+Target = Union[Upgradable, ResourceQuantity, ResourcePacket, Iterable[Union[Upgradable, ResourceQuantity]]]
+"""
+What to afford:
+- an Upgradable at a given level (e.g. Seraphin(20) or HQ(18)), its upgrade cost is computed from the current cards,
+- a resource quantity (e.g. ResourceQuantity(Rarity.Legendary, 20) for 20 legendary cards of any kind),
+- a ResourcePacket of positive required quantities,
+- or an iterable mixing the previous types.
+"""
+
+IGNORED_RESOURCES = [Resources.VIP]
+"""Resource types that appear in upgrade costs but are not a constraint (upgrades give VIP points)"""
+
+
+@functools.lru_cache(maxsize=1)
+def _concrete_cards() -> List[type]:
+    """List every card class that can be looted as a copy (i.e. that have a rarity)"""
+    return [card for card_category in CardCategories for card in card_category
+            if issubclass(card, Card) and card.rarity is not None]
+
+
+def income_share(required_type: ResourceQuantity.VALID_RESOURCE_TYPE,
+                 income_type: ResourceQuantity.VALID_RESOURCE_TYPE) -> float:
+    """
+    Return the expected fraction of an income that can be used to fulfill a requirement.
+
+    If the income type is the required type or a specific case of it (e.g. a Seraphin card for a legendary card
+    requirement) it's fully usable. If it's more general (e.g. a random legendary guardian for a Seraphin card
+    requirement) only the share of the card types matching the requirement counts, assuming uniform loots.
+    """
+    if ResourceQuantity.compatible_types(required_type, income_type):
+        return 1.
+    if isinstance(income_type, Resources) or isinstance(required_type, Resources):
+        return 0.
+    income_cards = [card for card in _concrete_cards() if ResourceQuantity.compatible_types(income_type, card)]
+    if len(income_cards) == 0:
+        return 0.
+    return sum(ResourceQuantity.compatible_types(required_type, card) for card in income_cards) / len(income_cards)
+
+
+def owned_items(my_cards: Dict[CardCategories, Set]) -> List[Upgradable]:
+    """Flatten a MY_CARDS like dictionary into the list of owned Upgradable (CardStock are unpacked)"""
+    return [getattr(item, 'card', item) for category in my_cards for item in my_cards[category]]
+
+
+def required_resources(target: Target, my_cards: Dict[CardCategories, Set] = None) -> ResourcePacket:
+    """
+    Convert a target into the resources it requires (as positive quantities).
+
+    :param target: Target, see Target
+    :param my_cards: a MY_CARDS like dictionary, default to config.my_cards.MY_CARDS
+    """
+    if isinstance(target, (Upgradable, ResourceQuantity, ResourcePacket)):
+        target = [target]
+    upgradables = [item for item in target if isinstance(item, Upgradable)]
+
+    requirement = ResourcePacket()
+    if upgradables:
+        if my_cards is None:
+            from config.my_cards import MY_CARDS
+            my_cards = MY_CARDS
+        # Upgrade costs are negative quantities
+        requirement = requirement + Upgradable.total_upgrade_cost(upgradables, owned_items(my_cards)) * -1
+    for item in target:
+        if isinstance(item, ResourceQuantity):
+            requirement = requirement + ResourcePacket(item)
+        elif isinstance(item, ResourcePacket):
+            requirement = requirement + item
+    return ResourcePacket(*(ResourceQuantity(res_type, quantity) for res_type, quantity in requirement.items()
+                            if quantity > 0 and res_type not in IGNORED_RESOURCES))
+
+
+def time_to_afford(target: Target, time_series: BudgetTimeSeries, my_cards: Dict[CardCategories, Set] = None,
+                   initial_balance: ResourcePacket = None) -> AffordResult:
+    """
+    Find the earliest day when each resource required by the target is available.
+
+    Resources are considered spent as soon as they are available, so a constraint is met the first day the running
+    maximum of the balance reaches the required quantity.
+
+    :param target: Target, what to afford
+    :param time_series: BudgetTimeSeries, the simulated daily incomes
+    :param my_cards: a MY_CARDS like dictionary used to compute the upgrade costs, default to config.my_cards.MY_CARDS
+    :param initial_balance: ResourcePacket, the resources currently owned
+    :return: AffordResult
+    """
+    requirement = required_resources(target, my_cards)
+    required_types = list(requirement.keys())
+    initial_balance = initial_balance or ResourcePacket()
+    if not required_types:
+        return AffordResult(0, {})
+
+    # Aggregate the time series resources that can fulfill each constraint: (resources x constraints) weights
+    weights = numpy.array([[income_share(required_type, income_type) for required_type in required_types]
+                           for income_type in time_series.resource_types]).reshape(len(time_series.resource_types),
+                                                                                   len(required_types))
+    initial = numpy.array([sum(quantity * income_share(required_type, res_type)
+                               for res_type, quantity in initial_balance.items())
+                           for required_type in required_types])
+    daily_flows = time_series.total_daily_incomes() @ weights
+
+    # Balance at the end of each day (index 0 being the current balance), and its running maximum
+    balances = numpy.vstack([initial, initial + numpy.cumsum(daily_flows, axis=0)])
+    best_balances = numpy.maximum.accumulate(balances, axis=0)
+
+    # The running maximum is sorted, so the first day a constraint is met is found by binary search
+    constraints: Dict[ResourceQuantity.VALID_RESOURCE_TYPE, Optional[int]] = {}
+    for k, required_type in enumerate(required_types):
+        day = int(numpy.searchsorted(best_balances[:, k], requirement[required_type], side='left'))
+        constraints[required_type] = day if day < len(best_balances) else None
+
+    days = list(constraints.values())
+    return AffordResult(None if None in days else max(days), constraints)
@@ -16,7 +16,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-from typing import List, Type, Tuple
+from typing import List, Type, Tuple, Dict
 
 from common.leagues import Rank
 from common.rarity import Rarity
@@ -24,8 +24,12 @@ from common.resources import ResourcePacket, ResourceQuantity, Resources
 from lang.languages import TranslatableString
 from spells.common_spell import Spell
 from units.base_units import MovableUnit
+from utils.discrete_distribution import DiscreteDistribution
 from utils.prettifying import Displayable
 
+CardSlots = List[Tuple[Dict[ResourceQuantity.VALID_RESOURCE_TYPE, float], int]]
+"""Card slots of a chest: [(probability of each card type to fill the slot, number of such slots)]"""
+
 
 class Chest(Displayable):
     """Represent an in-game chest and its loot"""
@@ -34,6 +38,9 @@ class Chest(Displayable):
     _average_goods_base = None
     _average_loot: ResourcePacket = None
     max_reincarnation_token = None
+    _average_reincarnation_token = None
+    card_slots: CardSlots = []
+    """Detail of the cards of _average_loot, used to compute the loot distributions"""
 
     @classmethod
     def average_loot(cls, rank=Rank.NONE):
@@ -51,6 +58,36 @@ class Chest(Displayable):
     # FIXME reincarnation tokens have weird loot conditions
     # FIXME loot chance aren't equal between all units
 
+    @classmethod
+    def loot_distributions(cls, rank=Rank.NONE) -> Dict[ResourceQuantity.VALID_RESOURCE_TYPE, DiscreteDistribution]:
+        """
+        Return the probability distribution of the quantity of each loot type of one chest.
+
+        Note: slots are independent, but the quantities of the different card types of a chest aren't (their total is
+        fixed), so these distributions must only be combined with the ones of other chests.
+        Note: only the average of gold and goods loots is known, they are given as a constant (split between the two
+        nearest integers when the average isn't an integer).
+        :param rank: the current rank (gold and goods loot depends on it)
+        :return: Dict[loot type, DiscreteDistribution]
+        """
+        distributions = {}
+        for slot_probabilities, slot_number in cls.card_slots:
+            for card_type, probability in slot_probabilities.items():
+                slots_distribution = DiscreteDistribution.binomial(slot_number, probability)
+                distributions[card_type] = (slots_distribution + distributions[card_type]
+                                            if card_type in distributions else slots_distribution)
+        if cls._average_reincarnation_token is not None:
+            # FIXME the real rules are unknown, each possible token is assumed to be independently looted
+            distributions[Resources.ReincarnationToken] = DiscreteDistribution.binomial(
+                cls.max_reincarnation_token, cls._average_reincarnation_token / cls.max_reincarnation_token)
+        if cls._average_goods_base is not None:
+            distributions[Resources.Goods] = DiscreteDistribution.point_mass(
+                cls._average_goods_base * rank.traiding_base)
+        if cls._average_gold_base is not None:
+            distributions[Resources.Gold] = DiscreteDistribution.point_mass(
+                cls._average_gold_base * rank.traiding_base)
+        return distributions
+
 
 class WoodenChest(Chest):
     number_of_card = 5
@@ -59,7 +96,12 @@ class WoodenChest(Chest):
         ResourceQuantity(Rarity.Common, 4 + 33 / 35),
         #Resources.ReincarnationToken(1),
         )
+    card_slots = [
+        ({Rarity.Common: 1.}, 4),
+        ({Rarity.Rare: 2/35, Rarity.Common: 33/35}, 1),
+        ]
     max_reincarnation_token = 3
+    _average_reincarnation_token = 1
     __display_name = TranslatableString("Wooden chest", french="Coffre en bois")
 
 
@@ -70,7 +112,11 @@ class IronChest(Chest):
         ResourceQuantity(Rarity.Common, number_of_card * (7/10)),
         # Resources.ReincarnationToken(2),
         )
+    card_slots = [
+        ({Rarity.Rare: 3/10, Rarity.Common: 7/10}, number_of_card),
+        ]
     max_reincarnation_token = 3
+    _average_reincarnation_token = 2
     __display_name = TranslatableString("Iron chest", french="Coffre en fer")
 
 
@@ -83,7 +129,14 @@ class SilverChest(Chest):
         ResourceQuantity(Rarity.Common, (579/100) * (8/10)),
         # Resources.ReincarnationToken(2.5),
         )
+    card_slots = [
+        ({Rarity.Rare: 1.}, 1),
+        ({Rarity.Legendary: 3/100, Rarity.Epic: 18/100,
+          Rarity.Rare: (79/100) * (2/10), Rarity.Common: (79/100) * (8/10)}, 1),
+        ({Rarity.Rare: 2/10, Rarity.Common: 8/10}, number_of_card - 2),
+        ]
     max_reincarnation_token = 4
+    _average_reincarnation_token = 2.5
     __display_name = TranslatableString("Silver chest", french="Coffre argenté")
 
 
@@ -96,7 +149,14 @@ class GoldenChest(Chest):
         ResourceQuantity(Rarity.Common, (651 / 100) * (7 / 10)),
         # Resources.ReincarnationToken(4),
         )
+    card_slots = [
+        ({Rarity.Rare: 1.}, 1),
+        ({Rarity.Legendary: 7/100, Rarity.Epic: 42/100,
+          Rarity.Rare: (51/100) * (3/10), Rarity.Common: (51/100) * (7/10)}, 1),
+        ({Rarity.Rare: 3/10, Rarity.Common: 7/10}, number_of_card - 2),
+        ]
     max_reincarnation_token = 5
+    _average_reincarnation_token = 4
     __display_name = TranslatableString("Golden chest", french="Coffre doré")
 
 
@@ -110,6 +170,7 @@ class RecycleChest(Chest):
     _average_loot = ResourcePacket(
         ResourceQuantity(Spell, 3),
         )
+    card_slots = [({Spell: 1.}, 3)]
     _average_gold_base = 0.75
     _average_goods_base = 1.5
     __display_name = TranslatableString("Recycle chest", french="Coffre de recyclage")
@@ -128,3 +189,29 @@ class RaidChest(SilverChest):
 
 ALL_CHESTS: List[Type[Chest]] = [GoldenChest, SilverChest, IronChest, WoodenChest, RaidChest, RecycleChest]
 """List all defined chests class"""
+
+
+def chests_loot_distributions(chests: Dict[Type[Chest], int], rank=Rank.NONE,
+                              ) -> Dict[ResourceQuantity.VALID_RESOURCE_TYPE, DiscreteDistribution]:
+    """
+    Return the exact probability distribution of the total quantity of each loot type when opening several chests.
+
+    Usage example:
+
+        >>> distributions = chests_loot_distributions({GoldenChest: 30, SilverChest: 100})
+        >>> distributions[Rarity.Legendary].probability_at_least(5)
+        >>> distributions[Rarity.Epic].percentile(0.1)
+
+    :param chests: Dict[chest class, number of chests of this class opened]
+    :param rank: the current rank (gold and goods loot depends on it)
+    :return: Dict[loot type, DiscreteDistribution]
+    """
+    distributions = {}
+    for chest_type, chest_number in chests.items():
+        if chest_number == 0:
+            continue
+        for loot_type, distribution in chest_type.loot_distributions(rank).items():
+            chests_distribution = distribution.convolution_power(chest_number)
+            distributions[loot_type] = (chests_distribution + distributions[loot_type]
+                                        if loot_type in distributions else chests_distribution)
+    return distributions
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Model of the goods looted fighting the clan boss, fitted on experiments/data/clan_boss_loots.csv
+
+The goods reward of a fight is modeled as a quadratic function of the number of boss kills (each boss killed giving a
+bit more than the previous one):
+
+    goods(kills) = A * kills² + B * kills
+
+The fit is a linear least-squares on the relative errors, with the rejection of the recorded values that are far from
+the model (the records of 19/04/2020 are a bugged replay with overflowed rewards). The fitted coefficients are saved in
+the constants below, run `python3 -m economy.clan_boss_rewards` to fit them again after recording new data.
+"""
+from typing import Union, Tuple
+
+import numpy
+
+CLAN_BOSS_GOODS_FORMULA_A, CLAN_BOSS_GOODS_FORMULA_B = 10000., 10000.
+"""Fitted coefficients of the goods reward of a fight: A * kills² + B * kills"""
+
+OUTLIER_RELATIVE_ERROR = 0.01
+"""Relative error above which a recorded reward is considered invalid and left out of the fit"""
+
+
+def predict_fight_goods(kills: Union[int, numpy.ndarray], a: float = CLAN_BOSS_GOODS_FORMULA_A,
+                        b: float = CLAN_BOSS_GOODS_FORMULA_B) -> Union[float, numpy.ndarray]:
+    """
+    Return the goods looted in a clan boss fight, vectorized over the numbers of kills.
+
+    :param kills: int or array, the number of bosses killed during the fight
+    :return: float or array of floats
+    """
+    return a * numpy.square(kills) + b * numpy.asarray(kills) if numpy.ndim(kills) else float(a * kills**2 + b * kills)
+
+
+def recorded_goods_rewards() -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Ingest the recorded clan boss fights (only the new rows) and return the (kills, goods rewards) arrays"""
+    import os
+    from experiments.data.ingestion import default_store, DATA_DIRECTORY
+    store = default_store('clan_boss_loots')
+    store.ingest(os.path.join(DATA_DIRECTORY, "clan_boss_loots.csv"))
+    columns = store.load()
+    return columns['boss_kills'].data.astype(float), columns['goods_reward'].data.astype(float)
+
+
+def fit_goods_reward_model(kills: numpy.ndarray, rewards: numpy.ndarray):
+    """
+    Fit the goods reward model, rejecting the outliers one by one (the worst first, as a few huge invalid rewards
+    would otherwise drag the fit away from every valid record).
+
+    :param kills: array of the recorded numbers of kills
+    :param rewards: array of the recorded goods rewards
+    :return: (FitResult on the valid records, boolean array of the valid records)
+    """
+    from utils.curve_fitting import FitResult
+    kills, rewards = numpy.asarray(kills, dtype=float), numpy.asarray(rewards, dtype=float)
+    valid = (kills > 0) & (rewards > 0)
+    while True:
+        # Relative errors are minimized, so that the biggest rewards don't outweigh the others
+        design = numpy.stack([kills[valid] ** 2, kills[valid]], axis=1) / rewards[valid, None]
+        parameters = numpy.linalg.lstsq(design, numpy.ones(int(valid.sum())), rcond=None)[0]
+        relative_errors = numpy.where(valid, numpy.abs(predict_fight_goods(kills, *parameters)
+                                                       / numpy.where(valid, rewards, 1) - 1), 0)
+        worst = int(numpy.argmax(relative_errors))
+        if relative_errors[worst] <= OUTLIER_RELATIVE_ERROR or valid.sum() <= 3:
+            break
+        valid[worst] = False
+    result = FitResult(lambda x, a, b: predict_fight_goods(x, a, b), ['A', 'B'], parameters, kills[valid],
+                       rewards[valid])
+    return result, valid
+
+
+if __name__ == '__main__':
+    recorded_kills, recorded_rewards = recorded_goods_rewards()
+    fit_result, valid_records = fit_goods_reward_model(recorded_kills, recorded_rewards)
+    print("{} valid records, {} rejected".format(int(valid_records.sum()), int((~valid_records).sum())))
+    print(fit_result)
+    print("CLAN_BOSS_GOODS_FORMULA_A, CLAN_BOSS_GOODS_FORMULA_B = {!r}, {!r}".format(
+        *[float(round(value, 6)) for value in fit_result.parameters]))
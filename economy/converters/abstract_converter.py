@@ -25,6 +25,7 @@ from common.resources import ResourcePacket
 from economy.gains import Gain
 from lang.languages import TranslatableString
 from utils.class_property import classproperty
+from utils.metrics import METRICS
 from utils.prettifying import Displayable
 from utils.ui_parameters import UIParameter, T
 
@@ -158,15 +159,21 @@ class GainConverter(Displayable):
             if converter_mode is ConverterModeUIParameter.ConversionMode.DISABLED:
                 pass
             else:
-                for gain_category in resources_dict:
-                    for gain in resources_dict[gain_category]:
-                        if gain == converter:
-                            # Avoid applying a converter to it's own results, it makes no sense
-                            continue
-                        # if in place mode keep the same gain key, else take the converter key
-                        if converter_mode is ConverterModeUIParameter.ConversionMode.IN_PLACE:
-                            target_category, target_key = gain_category, gain
-                        else:  # converter_mode is ConverterModeUIParameter.ConversionMode.EXTERNAL
-                            target_category, target_key = cls.CONVERTER_CATEGORY, converter
-                        resources_dict[target_category][target_key] = resources_dict[target_category][target_key] + converter.get_diff(resources_dict[gain_category][gain], gain=gain, **ui_parameters)
+                # Timed per converter rather than per gain, timing each of the many small get_diff calls costs
+                # more than the calls themselves
+                with METRICS.timer('apply_converter', converter=converter.__name__):
+                    for gain_category in resources_dict:
+                        for gain in resources_dict[gain_category]:
+                            if gain == converter:
+                                # Avoid applying a converter to it's own results, it makes no sense
+                                continue
+                            # if in place mode keep the same gain key, else take the converter key
+                            if converter_mode is ConverterModeUIParameter.ConversionMode.IN_PLACE:
+                                target_category, target_key = gain_category, gain
+                            else:  # converter_mode is ConverterModeUIParameter.ConversionMode.EXTERNAL
+                                target_category, target_key = cls.CONVERTER_CATEGORY, converter
+                            diff = converter.get_diff(resources_dict[gain_category][gain], gain=gain, **ui_parameters)
+                            if diff:
+                                resources_dict[target_category][target_key] = (
+                                    resources_dict[target_category][target_key] + diff)
 
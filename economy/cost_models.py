@@ -0,0 +1,507 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Upgrade cost models: find the formula shared by the upgrade_costs of the Upgradable classes, and predict the missing
+values.
+
+economy/analyse_costs.py plots showed that the cost of each level relatively to the previous one is the same for almost
+every unit and building (the differences being due to the game rounding costs to 2 or 3 significant digits). So the
+cost of an upgrade is modeled as:
+
+    cost(upgradable, resource, level) = scale[upgradable, resource] * growth_curve[level]
+
+Every (upgradable, resource) cost series is fitted at once in log space, where the model is linear. Series sharing the
+same growth curve are clustered together, so the whole upgrade cost data boils down to a few growth curves and one
+scale per series (see CostModel.parameter_table), and the error of the model at each level gives the error bounds of
+the predictions.
+
+The low levels growth factors differ a lot between the buildings and between units (and they are the least accurate, as
+the game rounds the costs), but from SHARED_GROWTH_LEVEL on they are the same for almost everything. So the growth
+factors of the high levels are fitted first, shared by every compatible series, and the clusters only differ by their
+low levels growth factors.
+
+Usage example:
+
+    >>> model = CostModel.fit()
+    >>> print(model.parameter_table())
+    >>> model.predict(Knight, Resources.Gold, 29)
+    >>> model.completed_upgrade_costs(Cryomancer)
+
+Or `python3 -m economy.cost_models` to print the parameter table.
+"""
+import math
+import warnings
+from typing import List, Type, Tuple, Dict, Optional, Union, Iterable
+
+import numpy
+
+from common.cards import Upgradable, MAX_LEVEL
+from common.resources import Resources, ResourcePacket
+
+CostSeries = Tuple[Type[Upgradable], Resources]
+"""Key of a cost series: the upgradable class and the resource type paid"""
+
+CARD_MODULES = ('units.towers', 'units.vehicles', 'units.guardians', 'units.heroes', 'units.bandits', 'units.modules',
+                'buildings.buildings', 'buildings.headquarters', 'spells.attack_spells', 'spells.defense_spells')
+"""Modules defining the Upgradable classes"""
+
+MIN_RELATIVE_ERROR = 0.01
+"""Minimal relative uncertainty of a recorded cost (besides rounding, recorded values may have small errors)"""
+
+CLUSTER_TOLERANCE = 1.
+"""Minimal fraction of compatible growth factors for two series to be considered as sharing the same growth curve"""
+
+SHARED_GROWTH_LEVEL = 11
+"""Level from which the growth factors are shared by the clusters (the cost of this level relatively to the previous one
+being the first shared growth factor)"""
+
+COMPATIBILITY_SIGMAS = 2.
+"""Maximal difference between two compatible growth factors, in uncertainties of their difference"""
+
+OUTLIER_THRESHOLD = 5.
+"""Error above which a recorded cost is reported as an outlier, in rounding uncertainties"""
+
+ERROR_BOUNDS_SIGMAS = 2
+"""Width of the prediction error bounds, in standard deviations of the model log error at that level"""
+
+
+def registered_upgradables() -> List[Type[Upgradable]]:
+    """Return every Upgradable class defining its own upgrade_costs list"""
+    import importlib
+    for module_name in CARD_MODULES:
+        importlib.import_module(module_name)
+
+    upgradables = []
+    classes_to_visit = [Upgradable]
+    while classes_to_visit:
+        cls = classes_to_visit.pop(0)
+        for subclass in cls.__subclasses__():
+            if subclass not in upgradables and subclass not in classes_to_visit:
+                classes_to_visit.append(subclass)
+                # Note: heroes define upgrade_costs as a class property, they aren't a list of hardcoded values
+                if isinstance(subclass.__dict__.get('upgrade_costs'), list) and subclass.upgrade_costs:
+                    upgradables.append(subclass)
+    return upgradables
+
+
+def cost_matrix(upgradables: Iterable[Type[Upgradable]]) -> Tuple[List[CostSeries], numpy.ndarray, numpy.ndarray]:
+    """
+    Gather the upgrade costs of the upgradable classes into a matrix
+
+    :return: (list of the cost series,
+        (series x MAX_LEVEL) array of the positive cost of each upgrade, NaN for missing values and null costs,
+        (series x MAX_LEVEL) boolean array of the missing values: None entries and levels not filled yet)
+    """
+    series = []
+    rows = []
+    missing_rows = []
+    for upgradable in upgradables:
+        upgrade_costs = upgradable.upgrade_costs[:MAX_LEVEL]
+        resource_types = sorted({resource_type
+                                 for packet in upgrade_costs if packet is not None
+                                 for resource_type, quantity in packet.items() if quantity < 0},
+                                key=str)
+        missing = numpy.array([packet is None for packet in upgrade_costs] + [True] * (MAX_LEVEL - len(upgrade_costs)))
+        for resource_type in resource_types:
+            row = numpy.full(MAX_LEVEL, numpy.nan)
+            for level, packet in enumerate(upgrade_costs):
+                if packet is not None and packet.get(resource_type, 0) < 0:
+                    row[level] = -packet[resource_type]
+            series.append((upgradable, resource_type))
+            rows.append(row)
+            missing_rows.append(missing)
+    return (series, numpy.array(rows).reshape((len(rows), MAX_LEVEL)),
+            numpy.array(missing_rows, dtype=bool).reshape((len(rows), MAX_LEVEL)))
+
+
+def relative_rounding_errors(costs: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the relative uncertainty of each recorded cost due to the game rounding it (e.g. 4100 may be anything from
+    4050 to 4150 so 1.2%), at least MIN_RELATIVE_ERROR. This is also about the uncertainty of its logarithm.
+    """
+    costs = numpy.asarray(costs, dtype=float)
+    known = ~numpy.isnan(costs)
+    rounding_units = numpy.ones_like(costs)
+    for power in range(1, 16):
+        with numpy.errstate(invalid='ignore'):
+            rounded = known & (numpy.mod(costs, 10. ** power) == 0)
+        rounding_units = numpy.where(rounded, 10. ** power, rounding_units)
+    return numpy.maximum(0.5 * rounding_units / costs, MIN_RELATIVE_ERROR)
+
+
+def fit_growth_curve(log_costs: numpy.ndarray, weights: numpy.ndarray, iterations: int = 50,
+                     tied_log_curve: Optional[numpy.ndarray] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Fit log_costs[series, level] = log_scales[series] + log_curve[level] by weighted alternating least squares over the
+    known (non NaN) values, all series at once.
+
+    :param log_costs: (series x levels) array, NaN for missing values
+    :param weights: array of the same shape, weight of each value
+    :param tied_log_curve: optional array of the imposed shape of the curve over some levels (e.g. shared growth
+        factors), NaN for the free levels: over the others log_curve is tied_log_curve up to a fitted constant
+    :return: (log_scales, log_curve), log_curve being 0 at the first level known by any series, and NaN at the levels
+        known by no series (and not tied to a known one)
+    """
+    known = ~numpy.isnan(log_costs)
+    weights = numpy.where(known, weights, 0.)
+    values = numpy.where(known, log_costs, 0.)
+    series_weights, level_weights = weights.sum(axis=1), weights.sum(axis=0)
+    tied = numpy.zeros(log_costs.shape[1], dtype=bool) if tied_log_curve is None else ~numpy.isnan(tied_log_curve)
+    tied_weights = level_weights[tied]
+    log_curve = numpy.zeros(log_costs.shape[1])
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            # Note: levels or series without any known value have a NaN curve/scale, their weight is null anyway
+            log_scales = (weights * numpy.nan_to_num(values - log_curve)).sum(axis=1) / series_weights
+            log_curve = (weights * numpy.nan_to_num(values - log_scales[:, None])).sum(axis=0) / level_weights
+            if tied.any():
+                # The least squares offset of the tied levels is the weighted mean of their free offsets
+                free_offsets = numpy.nan_to_num(log_curve[tied] - tied_log_curve[tied])
+                log_curve[tied] = tied_log_curve[tied] + (tied_weights * free_offsets).sum() / tied_weights.sum()
+    known_levels = numpy.nonzero(known.any(axis=0))[0]
+    if len(known_levels):
+        # Fix the gauge: scales are the cost of the first known level
+        offset = log_curve[known_levels[0]]
+        log_curve, log_scales = log_curve - offset, log_scales + offset
+    return log_scales, log_curve
+
+
+def _nan_statistic(statistic, values: numpy.ndarray, axis=None):
+    """Apply a nan-aware numpy statistic, silently returning NaN for all-NaN slices"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return statistic(values, axis=axis)
+
+
+class CostCluster:
+    """Cost series sharing the same growth curve"""
+
+    def __init__(self, series: List[CostSeries], log_costs: numpy.ndarray, uncertainties: numpy.ndarray,
+                 shared_curve: Optional['CostCluster'] = None):
+        """
+        :param series: the cost series of the cluster
+        :param log_costs: (series x levels) array of their log costs, NaN for missing values
+        :param uncertainties: array of the same shape, uncertainty of each log cost
+        :param shared_curve: optional CostCluster fitted on the last levels only, whose growth factors are imposed
+            over these levels
+        """
+        self.series = series
+        self.shared_curve = shared_curve
+        """CostCluster giving the growth factors of the last levels, None if they are fitted by this cluster"""
+        tied_log_curve = None
+        if shared_curve is not None:
+            tied_log_curve = numpy.full(log_costs.shape[1], numpy.nan)
+            tied_log_curve[-len(shared_curve.log_curve):] = shared_curve.log_curve - shared_curve.log_curve[0]
+        log_scales, self.log_curve = fit_growth_curve(log_costs, uncertainties ** -2, tied_log_curve=tied_log_curve)
+        self.scales: Dict[CostSeries, float] = dict(zip(series, numpy.exp(log_scales).tolist()))
+
+        self.residuals = log_costs - log_scales[:, None] - self.log_curve
+        """Log error of each recorded cost of the cluster series"""
+        self.standardized_residuals = self.residuals / uncertainties
+        """Error of each recorded cost of the cluster series, in rounding uncertainties"""
+        self.rms_error = float(numpy.sqrt(_nan_statistic(numpy.nanmean, self.residuals ** 2))) if len(series) else 0.
+        # Error of the model at each level (the game rounds costs, so low levels are relatively less accurate), outliers
+        # excluded. Levels known by a single series have no measured error, the overall one is used. Anyway recorded
+        # costs are not more accurate than MIN_RELATIVE_ERROR.
+        inliers = numpy.where(numpy.abs(self.standardized_residuals) <= OUTLIER_THRESHOLD, self.residuals, numpy.nan)
+        level_errors = numpy.sqrt(_nan_statistic(numpy.nanmean, inliers ** 2, axis=0))
+        single_known = (~numpy.isnan(inliers)).sum(axis=0) < 2
+        self.level_errors = numpy.maximum(numpy.where(single_known | numpy.isnan(level_errors), self.rms_error,
+                                                      level_errors),
+                                          MIN_RELATIVE_ERROR)
+        self.extrapolated = numpy.isnan(log_costs).all(axis=0) & ~numpy.isnan(self.log_curve)
+        """Levels of the growth curve known by no series of the cluster, extrapolated from the other clusters"""
+
+    def extend(self, reference_log_factors: numpy.ndarray, reference_errors: numpy.ndarray):
+        """
+        Extrapolate the growth curve to the levels known by no series of the cluster, using reference growth factors
+        (e.g. the consensus of all the series, as the growth factors of high levels are the same for almost everything)
+
+        :param reference_log_factors: array of the log growth factor of each level relatively to the previous one
+        :param reference_errors: array of the uncertainty of each reference log growth factor
+        """
+        known_levels = numpy.nonzero(~numpy.isnan(self.log_curve))[0]
+        if not len(known_levels):
+            return
+        # Forward then backward from the known levels, errors accumulating as in a random walk
+        for levels, direction in ((range(known_levels[-1] + 1, len(self.log_curve)), 1),
+                                  (range(known_levels[0] - 1, -1, -1), -1)):
+            for level in levels:
+                factor_index = level - 1 if direction == 1 else level
+                self.log_curve[level] = self.log_curve[level - direction] \
+                    + direction * reference_log_factors[factor_index]
+                self.level_errors[level] = math.hypot(self.level_errors[level - direction],
+                                                      reference_errors[factor_index])
+                self.extrapolated[level] = not numpy.isnan(self.log_curve[level])
+
+    @property
+    def growth_curve(self) -> numpy.ndarray:
+        """Cost of each level relatively to the first known level (NaN where unknown)"""
+        return numpy.exp(self.log_curve)
+
+    @property
+    def growth_factors(self) -> numpy.ndarray:
+        """Cost of each level relatively to the previous one"""
+        return numpy.exp(numpy.diff(self.log_curve))
+
+
+def compatibility_matrix(log_costs: numpy.ndarray, uncertainties: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the fraction of the levels known by both series where their growth factors (cost relatively to the previous
+    level, which doesn't depend on the scale) are compatible given the rounding uncertainties, for every pair of series.
+
+    :param log_costs: (series x levels) array, NaN for missing values
+    :param uncertainties: array of the same shape, uncertainty of each log cost
+    :return: (series x series) array, NaN for pairs without any common growth factor
+    """
+    log_factors = numpy.diff(log_costs, axis=1)
+    factor_variances = uncertainties[:, 1:] ** 2 + uncertainties[:, :-1] ** 2
+    # All pairs at once: series x series x levels
+    differences = numpy.abs(log_factors[:, None, :] - log_factors[None, :, :])
+    compared = ~numpy.isnan(differences)
+    with numpy.errstate(invalid='ignore'):
+        compatible = differences <= COMPATIBILITY_SIGMAS * numpy.sqrt(factor_variances[:, None, :]
+                                                                      + factor_variances[None, :, :])
+        return compatible.sum(axis=2) / compared.sum(axis=2)
+
+
+def _greedy_clusters(compatibility: numpy.ndarray, completeness: numpy.ndarray, tolerance: float) -> List[numpy.ndarray]:
+    """
+    Cluster the series: the most complete series not clustered yet seeds a new cluster, candidates are added one by one
+    (most compatible first) if they are compatible with every member
+
+    :param compatibility: (series x series) array of the compatibility of each pair (see compatibility_matrix)
+    :param completeness: array of the number of known values of each series
+    :param tolerance: float, minimal compatibility to join a cluster
+    :return: list of the sorted indexes of the members of each cluster
+    """
+    clusters = []
+    remaining = numpy.ones(len(completeness), dtype=bool)
+    for seed in numpy.argsort(-completeness, kind='stable'):
+        if remaining[seed]:
+            members = [seed]
+            remaining[seed] = False
+            for candidate in numpy.argsort(-compatibility[seed], kind='stable'):
+                if remaining[candidate] and (compatibility[candidate, members] >= tolerance).all():
+                    members.append(candidate)
+                    remaining[candidate] = False
+            clusters.append(numpy.sort(members))
+    return clusters
+
+
+class CostModel:
+    """Growth curve clusters and scales fitted on the upgrade costs of the Upgradable classes"""
+
+    def __init__(self, clusters: List[CostCluster], costs: Dict[CostSeries, numpy.ndarray],
+                 missing: Dict[CostSeries, numpy.ndarray], shared_curves: List[CostCluster] = ()):
+        self.clusters = clusters
+        self.shared_curves = list(shared_curves)
+        """Growth curves of the high levels, each one shared by several clusters"""
+        self.costs = costs
+        """Known costs of each series (NaN if missing or free)"""
+        self.missing = missing
+        """Levels of each series whose cost isn't recorded yet"""
+        self._cluster_of: Dict[CostSeries, CostCluster] = {
+            series: cluster for cluster in clusters for series in cluster.series}
+
+    @classmethod
+    def fit(cls, upgradables: Optional[Iterable[Type[Upgradable]]] = None, tolerance: float = CLUSTER_TOLERANCE,
+            shared_level: int = SHARED_GROWTH_LEVEL) -> 'CostModel':
+        """
+        Cluster the cost series by growth curve and fit them.
+
+        The series are first grouped by their growth factors from <shared_level> on, each group fitting a shared curve
+        over these levels. Then the series of each group are clustered by their growth factors below <shared_level>,
+        the growth curve of each cluster being its own below <shared_level> and the shared one of its group above.
+
+        In both cases the most complete series not grouped yet seeds a new group, joined by every other remaining series
+        whose growth factors are compatible with the ones of all the group members (see compatibility_matrix), and so on.
+        Then the growth curves are extended to the levels their series don't know with the median growth factors of all
+        the series.
+
+        :param upgradables: classes to model (default to every registered Upgradable class)
+        :param tolerance: float, minimal fraction of compatible growth factors to join a cluster
+        :param shared_level: int, level from which the growth factors are shared (MAX_LEVEL to share none)
+        """
+        if upgradables is None:
+            upgradables = registered_upgradables()
+        series, costs, missing = cost_matrix(upgradables)
+        log_costs = numpy.log(costs)
+        uncertainties = relative_rounding_errors(costs)
+        completeness = (~numpy.isnan(log_costs)).sum(axis=1)
+
+        # Consensus growth factors (median and robust spread of all series), filling the gaps of the curves
+        log_factors = numpy.diff(log_costs, axis=1)
+        reference_log_factors = _nan_statistic(numpy.nanmedian, log_factors, axis=0)
+        reference_errors = numpy.maximum(
+            1.4826 * _nan_statistic(numpy.nanmedian, numpy.abs(log_factors - reference_log_factors), axis=0),
+            MIN_RELATIVE_ERROR)
+
+        # Note: the shared curves start at the level before shared_level, so that they include its growth factor.
+        # Series without any common shared level don't contradict each other.
+        first_shared = max(shared_level - 1, 0)
+        shared_curves = []
+        shared_curve_of = numpy.empty(len(series), dtype=object)
+        if first_shared < MAX_LEVEL - 1:
+            shared_compatibility = numpy.nan_to_num(
+                compatibility_matrix(log_costs[:, first_shared:], uncertainties[:, first_shared:]), nan=1.)
+            for members in _greedy_clusters(shared_compatibility, completeness, tolerance):
+                shared_curve = CostCluster([series[m] for m in members], log_costs[members, first_shared:],
+                                           uncertainties[members, first_shared:])
+                shared_curve.extend(reference_log_factors[first_shared:], reference_errors[first_shared:])
+                shared_curves.append(shared_curve)
+                shared_curve_of[members] = shared_curve
+
+        # Only the series sharing the same curve can be clustered together
+        last_own = max(shared_level, 1)
+        compatibility = numpy.nan_to_num(
+            compatibility_matrix(log_costs[:, :last_own], uncertainties[:, :last_own]), nan=0.)
+        compatibility[shared_curve_of[:, None] != shared_curve_of[None, :]] = 0.
+        clusters = []
+        for members in _greedy_clusters(compatibility, completeness, tolerance):
+            clusters.append(CostCluster([series[m] for m in members], log_costs[members], uncertainties[members],
+                                        shared_curve_of[members[0]]))
+        for cluster in clusters:
+            cluster.extend(reference_log_factors, reference_errors)
+        return cls(clusters, dict(zip(series, costs)), dict(zip(series, missing)), shared_curves)
+
+    def cluster_of(self, upgradable: Type[Upgradable], resource_type: Resources) -> CostCluster:
+        try:
+            return self._cluster_of[(upgradable, resource_type)]
+        except KeyError:
+            raise KeyError("{} doesn't cost any {}".format(upgradable.__name__, resource_type)) from None
+
+    def predict(self, upgradable: Type[Upgradable], resource_type: Resources,
+                levels: Union[int, numpy.ndarray] = None) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Predict the cost of upgrading from the given levels
+
+        :param upgradable: the upgradable class
+        :param resource_type: the resource paid
+        :param levels: int or array of levels (default to all the levels)
+        :return: (predicted costs, lower bounds, upper bounds), as positive numbers (NaN for levels unknown to the
+            growth curve)
+        """
+        if levels is None:
+            levels = numpy.arange(MAX_LEVEL)
+        cluster = self.cluster_of(upgradable, resource_type)
+        log_predictions = math.log(cluster.scales[(upgradable, resource_type)]) + cluster.log_curve[levels]
+        margins = ERROR_BOUNDS_SIGMAS * cluster.level_errors[levels]
+        return (numpy.exp(log_predictions), numpy.exp(log_predictions - margins),
+                numpy.exp(log_predictions + margins))
+
+    def completed_upgrade_costs(self, upgradable: Type[Upgradable]) -> List[Optional[ResourcePacket]]:
+        """
+        Return the upgrade_costs of the class for every level, missing values being replaced by their rounded
+        prediction (None if it can't be predicted)
+        """
+        upgrade_costs = list(upgradable.upgrade_costs[:MAX_LEVEL]) + [None] * (MAX_LEVEL - len(upgradable.upgrade_costs))
+        resource_types = [resource_type for series_upgradable, resource_type in self.costs
+                          if series_upgradable is upgradable]
+        predictions = {resource_type: self.predict(upgradable, resource_type)[0] for resource_type in resource_types}
+        for level, packet in enumerate(upgrade_costs):
+            if packet is None and all(not numpy.isnan(predictions[r][level]) for r in resource_types) \
+                    and resource_types:
+                upgrade_costs[level] = ResourcePacket(*(
+                    resource_type(-round_significant(predictions[resource_type][level]))
+                    for resource_type in resource_types))
+        return upgrade_costs
+
+    def missing_values(self) -> List[Tuple[CostSeries, int, float, float, float]]:
+        """Return the predictions of every missing cost: [((upgradable, resource), level, cost, lower, upper)]"""
+        missing = []
+        for series, missing_levels in self.missing.items():
+            predictions, lower_bounds, upper_bounds = self.predict(*series)
+            for level in numpy.nonzero(missing_levels & ~numpy.isnan(predictions))[0]:
+                missing.append((series, int(level), float(predictions[level]), float(lower_bounds[level]),
+                                float(upper_bounds[level])))
+        return missing
+
+    def outliers(self) -> List[Tuple[CostSeries, int, float, float]]:
+        """
+        Return the recorded costs that don't fit the model (probably typos, or game changes not applied to every card)
+
+        :return: [((upgradable, resource), level, recorded cost, predicted cost)]
+        """
+        outliers = []
+        for cluster in self.clusters:
+            for k, level in zip(*numpy.nonzero(numpy.abs(cluster.standardized_residuals) > OUTLIER_THRESHOLD)):
+                series = cluster.series[k]
+                outliers.append((series, int(level), float(self.costs[series][level]),
+                                 float(self.predict(*series, level)[0])))
+        return outliers
+
+    def parameter_table(self) -> str:
+        """
+        Return the compact text table of the model parameters: the shared growth factors of the high levels, then the
+        growth factors of the lower levels and the scales of each cluster (extrapolated growth factors being marked by
+        a star)
+        """
+        def format_factors(factors, extrapolated):
+            return " ".join("-" if numpy.isnan(factor) else "{:.3f}{}".format(factor, "*" if is_extrapolated else "")
+                            for factor, is_extrapolated in zip(factors, extrapolated))
+
+        lines = []
+        shared_indexes = {id(shared_curve): k for k, shared_curve in enumerate(self.shared_curves)}
+        for k, shared_curve in enumerate(self.shared_curves):
+            first_level = MAX_LEVEL - len(shared_curve.log_curve) + 1
+            lines.append("Shared curve {} ({} series, rms error {:.2%})".format(k, len(shared_curve.series),
+                                                                             shared_curve.rms_error))
+            lines.append("  growth factors from level {}: ".format(first_level) + format_factors(
+                shared_curve.growth_factors, shared_curve.extrapolated[1:]))
+        for k, cluster in enumerate(self.clusters):
+            own_factors = len(cluster.growth_factors)
+            if cluster.shared_curve is None:
+                lines.append("Cluster {} ({} series, rms error {:.2%})".format(k, len(cluster.series),
+                                                                               cluster.rms_error))
+            else:
+                own_factors -= len(cluster.shared_curve.growth_factors)
+                lines.append("Cluster {} ({} series, rms error {:.2%}, shared curve {})".format(
+                    k, len(cluster.series), cluster.rms_error, shared_indexes[id(cluster.shared_curve)]))
+            lines.append("  growth factors: " + format_factors(cluster.growth_factors[:own_factors],
+                                                               cluster.extrapolated[1:own_factors + 1]))
+            for (upgradable, resource_type), scale in sorted(cluster.scales.items(),
+                                                             key=lambda item: (str(item[0][1]), -item[1])):
+                lines.append("  {:<20} {:<10} {:>10.4g}".format(upgradable.__name__, resource_type.name, scale))
+        return "\n".join(lines)
+
+
+def round_significant(value: float, digits: int = 3) -> int:
+    """Round like the game does: to a few significant digits"""
+    if value == 0:
+        return 0
+    return int(round(value, digits - 1 - int(math.floor(math.log10(abs(value))))))
+
+
+if __name__ == '__main__':
+    model = CostModel.fit()
+    print(model.parameter_table())
+    print()
+    outliers = model.outliers()
+    print("{} recorded costs don't fit the model".format(len(outliers)))
+    for (upgradable, resource_type), level, cost, prediction in outliers:
+        print("  {} {} level {}: {:.4g} (predicted {:.4g})".format(upgradable.__name__, resource_type.name, level,
+                                                                   cost, prediction))
+    print()
+    missing_values = model.missing_values()
+    print("{} missing costs predicted".format(len(missing_values)))
+    for (upgradable, resource_type), level, cost, lower_bound, upper_bound in missing_values:
+        print("  {} {} level {}: {:.4g} [{:.4g}, {:.4g}]".format(upgradable.__name__, resource_type.name, level,
+                                                                 cost, lower_bound, upper_bound))
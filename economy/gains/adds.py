@@ -21,7 +21,7 @@
 Data about adds rewards
 """
 from common.resources import Resources as R, ResourcePacket
-from economy.gains.abstract_gains import Gain
+from economy.gains.abstract_gains import Gain, hq_param
 from lang.languages import TranslatableString
 from utils.ui_parameters import UIParameter
 
@@ -59,6 +59,7 @@ pub_viewed_per_day_param = UIParameter(
 
 
 class Adds(Gain):
+    parameter_dependencies = [hq_param, pub_viewed_per_day_param]
     __display_name = TranslatableString("Adds", french="Publicités")
 
     @classmethod
@@ -26,7 +26,7 @@ from common.resources import ResourcePacket, ResourceQuantity
 from common.resources import Resources as R
 from common.vip import VIP
 
-from economy.gains.abstract_gains import Gain, vip_param
+from economy.gains.abstract_gains import Gain, vip_param, rank_param
 
 # TODO: daily shop
 from lang.languages import TranslatableString
@@ -55,6 +55,7 @@ equipment_craft_number_param = UIParameter(
 
 
 class EquipmentCrafting(Gain):
+    parameter_dependencies = [rank_param, vip_param, equipment_craft_number_param]
     __display_name = TranslatableString("Equipement crafting", french="Forger des équipements")
 
     common_card_costs = [-3, -3, -4, -5, -6] + [-6]*10
@@ -69,7 +70,7 @@ class EquipmentCrafting(Gain):
         if equipment_crafting_index >= vip.equipment_building_limit:
             return ResourcePacket()
         return ResourcePacket(
-            R.Gold(sum(cls.equipment_gold_costs[equipment_crafting_index] * rank.traiding_base)),
+            R.Gold(cls.equipment_gold_costs[equipment_crafting_index] * rank.traiding_base),
             ResourceQuantity(Equipment, 1),
             ResourceQuantity(Rarity.Rare, cls.rare_card_costs[equipment_crafting_index]),
             ResourceQuantity(Rarity.Common, cls.common_card_costs[equipment_crafting_index]),
@@ -85,7 +86,7 @@ class EquipmentCrafting(Gain):
             equipment_craft_number = min(equipment_craft_number, vip.equipment_building_limit)
 
         return ResourcePacket(
-            R.Gold(sum(cls.equipment_gold_costs[:equipment_craft_number] * rank.traiding_base)),
+            R.Gold(sum(cls.equipment_gold_costs[:equipment_craft_number]) * rank.traiding_base),
             ResourceQuantity(Equipment, equipment_craft_number),
             ResourceQuantity(Rarity.Rare, -5 * equipment_craft_number),  # Fixme, check average values
             ResourceQuantity(Rarity.Common, -5 * equipment_craft_number),  # Fixme, check average values
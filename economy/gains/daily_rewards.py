@@ -33,6 +33,7 @@ from common.resources import Resources as R
 from common.vip import VIP
 from economy.chests import WoodenChest, IronChest, SilverChest, GoldenChest, Chest, RaidChest
 from economy.gains.abstract_gains import Gain, rank_param, vip_param, Days, hq_param
+from economy.production import day_production, Schedule
 from lang.languages import TranslatableString
 from units.bandits import Bandit
 from units.guardians import Guardian
@@ -95,6 +96,7 @@ daily_10km_trading_count_param = UIParameter(
 
 
 class Trading10Km(Trading):
+    parameter_dependencies = [rank_param, vip_param, daily_10km_trading_count_param]
     duration = 0.5
     traiding_limit = 100
     goods_cost_multiplier = 1
@@ -136,6 +138,7 @@ daily_100km_trading_count_param = UIParameter(
 
 
 class Trading100Km(Trading):
+    parameter_dependencies = [rank_param, vip_param, daily_100km_trading_count_param]
     duration = 1
     traiding_limit = 3
     goods_cost_multiplier = 2
@@ -164,6 +167,7 @@ daily_1000km_trading_count_param = UIParameter(
 
 
 class Trading1000Km(Trading):
+    parameter_dependencies = [rank_param, vip_param, daily_1000km_trading_count_param]
     duration = 2
     traiding_limit = 2
     goods_cost_multiplier = 3
@@ -192,6 +196,7 @@ daily_best_trading_count_param = UIParameter(
 
 
 class BestTrading(Trading):
+    parameter_dependencies = [rank_param, vip_param, daily_best_trading_count_param]
     duration = 4
     traiding_limit = 1
     goods_cost_multiplier = 4
@@ -217,6 +222,8 @@ selected_heroes_param = UIParameter(
 
 
 class TradingResets(Gain):
+    parameter_dependencies = [vip_param, daily_100km_trading_count_param, daily_1000km_trading_count_param,
+                              daily_best_trading_count_param]
     reset_costs = [ResourcePacket(R.Gem(gem_cost)) for gem_cost in (0, -80, -160, -320)]
     cumulative_reset_costs = [ResourcePacket(R.Gem(gem_cost)) for gem_cost in (0, -80, -240, -560)]
     # TODO: factor with other element that implement resets (like the forge)
@@ -286,7 +293,25 @@ mill_lvl_param = UIParameter(
     )
 
 
+collection_schedule_param = UIParameter(
+    'collection_schedule',
+    [None, (8, 20), (20,), (7, 12, 19, 23), (8, 10, 12, 14, 16, 18, 20, 22)],
+    display_range=["Always in time", "Twice a day (8h, 20h)", "Once a day (20h)", "4 times a day (7h, 12h, 19h, 23h)",
+                   "Every 2 hours (8h-22h)"],
+    display_txt=TranslatableString("Production collection", french="Récolte de la production"),
+    default_value=None,
+    help_txt=TranslatableString(
+        "Select when you usually collect the production of your mill and transport station. Once their storage is "
+        "full (8 hours of production) they stop producing, so rare collections lose part of the production.",
+        french="Sélectionner quand vous récupérez habituellement la production de votre moulin et de votre station de "
+               "transport. Une fois leur stockage plein (8 heures de production) ils arrêtent de produire, des "
+               "récoltes trop espacées font donc perdre une partie de la production."),
+    )
+
+
 class MillProduction(Gain):
+    parameter_dependencies = [hq_param, vip_param, mill_lvl_param, collection_schedule_param]
+
     @classmethod
     def iteration_income(cls, mill_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1, **kwargs) -> ResourcePacket:
         """
@@ -299,15 +324,13 @@ class MillProduction(Gain):
         """
         return Mill.bihourly_incomes[mill_lvl or hq_lvl] * vip.goods_production
 
-    # TODO daily_collect_count can be miss understood by the user, it would be better to ask it's play hours
-    #  (or various play strategy (once a day, twice a day, sparsly all the day, etc.)
     @classmethod
-    def daily_income(cls, mill_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1, daily_collect_count: int = None,
-                     **kwargs) -> ResourcePacket:
-        income = cls.iteration_income(mill_lvl=mill_lvl, hq_lvl=hq_lvl, vip=vip, **kwargs) * 12
-        if daily_collect_count is not None:
-            income = min(income, Mill.storage_limits[mill_lvl or hq_lvl] * daily_collect_count)
-        return income
+    def daily_income(cls, mill_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1,
+                     collection_schedule: Schedule = None, **kwargs) -> ResourcePacket:
+        if collection_schedule is None:
+            return cls.iteration_income(mill_lvl=mill_lvl, hq_lvl=hq_lvl, vip=vip, **kwargs) * 12
+        return ResourcePacket(R.Goods(float(
+            day_production(Mill, collection_schedule, vip=vip, levels=mill_lvl or hq_lvl).collected)))
 
     __display_name = TranslatableString("Mill", french="Moulin")
 
@@ -324,17 +347,17 @@ station_lvl_param = UIParameter(
     help_txt=TranslatableString(
         "Select the level of your trading station "
         "\n\n*(AUTO take the maximum level available with your current HQ level)*.  "
-        "\n*(Note: the transport station production assume that it produces 24/24, so that imply not leaving "
-        "it more than 8 hours without collecting gold, so in practice you will probably earn less)*",
+        "\n*(Note: production losses due to full storage depend on the 'Production collection' parameter)*",
         french="Sélectionner le niveau de votre station de transport."
                "\n\n*(AUTO choisi le niveau maximum disponnible selon votre niveau de QG)*  "
-               "\n*(Note: le simulateur assume que la station de transport tourne 24h/24, ce qui implqiue de ne jamais"
-               "la laisser tourner plus de 8 heures sans récupérer l'or. Donc en pratique vous gagnerez probablement moins)*",
+               "\n*(Note: les pertes de production dues au stockage plein dépendent du paramètre 'Récolte de la production')*",
         ),
     )
 
 
 class TransportStationProduction(Gain):
+    parameter_dependencies = [hq_param, vip_param, station_lvl_param, collection_schedule_param]
+
     @classmethod
     def iteration_income(cls, station_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1, **kwargs) -> ResourcePacket:
         """
@@ -348,22 +371,19 @@ class TransportStationProduction(Gain):
         return TransportStation.bihourly_incomes[station_lvl or hq_lvl] * vip.gold_production
 
 
-    # TODO The income will probably be partially lost if the player don't play during extended period, thus it may
-    #   be more precise to ask for it. Like a daily_collect_count, but it can be miss understood by the user, it
-    #   would be better to ask its play hours (or various play strategy (once a day, twice a day, sparsly
-    #   all the day, etc.) but all this soon become fairly complex while not adding real value... to meditate on...
     @classmethod
-    def daily_income(cls, station_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1, daily_collect_count: int = None,
-                     **kwargs) -> ResourcePacket:
-        income = cls.iteration_income(station_lvl=station_lvl, hq_lvl=hq_lvl, vip=vip, **kwargs) * 12
-        if daily_collect_count is not None:
-            income = min(income, Mill.storage_limits[station_lvl or hq_lvl] * daily_collect_count)
-        return income
+    def daily_income(cls, station_lvl: Optional[int] = None, hq_lvl=1, vip: VIP = 1,
+                     collection_schedule: Schedule = None, **kwargs) -> ResourcePacket:
+        if collection_schedule is None:
+            return cls.iteration_income(station_lvl=station_lvl, hq_lvl=hq_lvl, vip=vip, **kwargs) * 12
+        return ResourcePacket(R.Gold(float(
+            day_production(TransportStation, collection_schedule, vip=vip, levels=station_lvl or hq_lvl).collected)))
 
     __display_name = TranslatableString("Transport station", french="Station de transport")
 
 
 class DailyQuest(Gain):
+    parameter_dependencies = [rank_param]
 
     @classmethod
     def iteration_income(cls, rank: Rank = Rank.NONE, **kwargs) -> ResourcePacket:
@@ -386,6 +406,7 @@ class DailyQuest(Gain):
 
 
 class FreeDailyOffer(Gain):
+    parameter_dependencies = [rank_param]
 
     @classmethod
     def iteration_income(cls, rank: Rank = Rank.NONE, **kwargs) -> ResourcePacket:
@@ -481,6 +502,8 @@ average_trophy_param = UIParameter(
 
 
 class Ambushes(Gain):
+    parameter_dependencies = [rank_param, hq_param, ambush_won_param, fast_ambushes_param, temple_lvl_param,
+                              average_trophy_param]
     _ambush_reward = ResourcePacket(
         R.Gem(8),
         R.LifePotion(1/3),
@@ -559,6 +582,7 @@ ask_for_donation_param = UIParameter(
 
 
 class ClanDonation(Gain):
+    parameter_dependencies = [hq_param, ask_for_donation_param]
     donation_bases = [50, 150, 150, 750, 750, 1875, 1875, 3750, 3750, 9000, 9000, 17500, 17500,
                       42500, 42500, 100000, 100000, 255000, 255000, 640000, 640000, 1600000, 1600000,
                       3680000, 3680000, 8160000, 8160000, 16320000, 16320000, 16320000, 16320000]
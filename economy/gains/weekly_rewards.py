@@ -20,6 +20,7 @@
 """
 List gains obtainable on a weekly basis
 """
+import functools
 from abc import ABC
 from typing import Optional
 
@@ -29,6 +30,7 @@ from common.rarity import Rarity
 from common.resources import ResourcePacket, ResourceQuantity, hero_souls
 from common.resources import Resources as R
 
+from economy.clan_boss_rewards import predict_fight_goods
 from economy.gains.abstract_gains import Gain, Days, rank_param
 from lang.languages import TranslatableString
 from spells.defense_spells import ModuleBoost
@@ -268,6 +270,7 @@ class ClanWarReward(ChallengeOfTheDay):
     """
     Reward obtained at the end of the clan wars according to your rankings
     """
+    parameter_dependencies = [rank_param, clan_league_param, battle_ranking_param]
     start_day = Days.Sunday
     end_day = Days.Wednesday
     presence_required_day = Days.Saturday
@@ -283,20 +286,17 @@ class ClanWarReward(ChallengeOfTheDay):
 
 
 class ClanMission(ChallengeOfTheDay):
+    parameter_dependencies = [rank_param]
     start_day = Days.Sunday
     end_day = Days.Sunday
 
     @classmethod
-    def iteration_income(cls, **kwargs) -> ResourcePacket:
+    def iteration_income(cls, rank: Rank = Rank.NONE, **kwargs) -> ResourcePacket:
         # TODO allow partial reward?
-        raise NotImplemented()
-
-    @classmethod
-    def daily_income(cls, rank: Rank = Rank.NONE, **kwargs) -> ResourcePacket:
         return ResourcePacket(
             R.Gold(2 * 10 * rank.traiding_base),
             R.Gem(150),
-            ) * (1/7)
+            )
 
     __display_name = TranslatableString("Clan quests", french="Missions de clan")
 
@@ -336,6 +336,8 @@ clan_boss_attack_count_param = UIParameter(
 
 
 class ClanBoss(ChallengeOfTheDay):
+    parameter_dependencies = [rank_param, personal_boss_kill_per_fight_param, clan_boss_kills_param,
+                              clan_boss_attack_count_param]
     start_day = Days.Sunday
     end_day = Days.Sunday
 
@@ -347,19 +349,26 @@ class ClanBoss(ChallengeOfTheDay):
     def iteration_income(cls, rank: Rank = Rank.NONE, personal_boss_kill_per_fight=0, clan_boss_kills=0,
                          clan_boss_attack_count=2, **kwargs) -> ResourcePacket:
         # TODO automatically predict personal_boss_kill_per_fight from MY_CARDS
-        # First count goods obtained fighting the boss
-        total_reward = ResourcePacket(
-            #R.Goods(20000 * sum(range(1, personal_boss_kill_per_fight+1))
-            R.Goods(10000 * (personal_boss_kill_per_fight) * (personal_boss_kill_per_fight + 1)
-                    * clan_boss_attack_count),
+        # First count goods obtained fighting the boss (see economy/clan_boss_rewards.py)
+        fight_reward = ResourcePacket(
+            R.Goods(round(predict_fight_goods(personal_boss_kill_per_fight)) * clan_boss_attack_count),
         # Include extra attack gem costs
             R.Gem(BOSS_ATTACK_GEM_COST[clan_boss_attack_count]),
             )
+        # Then add the rewards unlocked by the clan
+        return fight_reward + cls.unlocked_rewards(rank, clan_boss_kills)
 
-        # Then iteratively add unlocked rewards
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def unlocked_rewards(rank: Rank, clan_boss_kills: int) -> ResourcePacket:
+        """
+        Return the rewards unlocked by the clan total kills.
+        The results are cached per (rank, kills), so they must not be modified.
+        """
+        total_reward = ResourcePacket()
         levels_unlocked = (clan_boss_kills - 125) // 250 + 1
         for level in range(levels_unlocked):
-            level_reward = cls.reward_sequence[level % len(cls.reward_sequence)]
+            level_reward = ClanBoss.reward_sequence[level % len(ClanBoss.reward_sequence)]
             # Gold reward depend of your rank
             if level_reward is R.Gold:
                 total_reward[R.Gold] += rank.traiding_base * 5
@@ -377,6 +386,7 @@ class ClanBoss(ChallengeOfTheDay):
 
 
 class WeeklyQuest(ChallengeOfTheDay):
+    parameter_dependencies = [rank_param]
     start_day = Days.Monday
 
 
@@ -393,10 +403,6 @@ class WeeklyQuest(ChallengeOfTheDay):
             ResourceQuantity((Guardian, Rarity.Rare), 2),
             )
 
-    @classmethod
-    def daily_income(cls, rank: Rank = Rank.NONE, **kwargs) -> ResourcePacket:
-        return cls.iteration_income(rank=rank) * (1/7)
-
     __display_name = TranslatableString("Weekly quests", french="Quêtes hébdomadaires")
 
 
@@ -424,6 +430,7 @@ clanwar1v1_result_param = UIParameter(
 
 
 class ClanWar1v1Reward(ChallengeOfTheDay):
+    parameter_dependencies = [rank_param, clan_rank_param, clanwar1v1_result_param]
     start_day = Days.Thursday
     end_day = Days.Saturday
     presence_required_day = Days.Wednesday
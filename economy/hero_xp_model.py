@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Hero experience cost model: a piecewise growth model fitted on Hero._xp_costs.
+
+The experience cost of a hero sub-level is the cost of the previous sub-level multiplied by a growth factor that only
+changes at some hero levels (regimes), then rounded by the game:
+
+    xp_cost(level) = xp_cost(1) * product of growth_factor(k) for k in [2;level]
+
+In log space the model is linear, so it is fitted by weighted least-squares (each cost weighted by the inverse of its
+rounding uncertainty). Regimes are found by starting with one regime per hero level and merging the adjacent regimes
+whose growth factors can't be told apart.
+
+Usage example:
+
+    >>> model = HeroXpModel.fit()
+    >>> print(model.validation_report())
+    >>> model.xp_cost(250)
+    >>> model.completed_xp_costs()
+
+Or `python3 -m economy.hero_xp_model` to print the validation report.
+"""
+from collections import namedtuple
+from typing import List, Optional, Sequence, Union
+
+import numpy
+
+from common.cards import MAX_LEVEL
+from units.heroes import Hero
+
+XpRegime = namedtuple('XpRegime', 'start end growth_factor standard_error')
+"""Range of sub-levels [start;end[ sharing the same growth factor"""
+
+REGIME_SEPARATION_SIGMAS = 3.
+"""Minimal difference between the growth factors of two adjacent regimes, in standard errors of their difference"""
+
+VALIDATION_FOLDS = 5
+"""Number of folds of the cross validation"""
+
+
+def growth_steps(levels: numpy.ndarray, regime_edges: Sequence[int]) -> numpy.ndarray:
+    """
+    Return the design matrix of the model: a first column of ones (for log(xp_cost(1))), then for each regime the
+    number of growth steps of that regime between level 1 and each level.
+
+    :param levels: 1D array of sub-levels >= 1
+    :param regime_edges: sorted list of the first sub-level of each regime, plus the end of the last regime
+    :return: (len(levels) x len(regime_edges)) array
+    """
+    levels = numpy.asarray(levels)
+    design = numpy.ones((len(levels), len(regime_edges)))
+    for k, (start, end) in enumerate(zip(regime_edges[:-1], regime_edges[1:])):
+        # Last regime is extended to infinity for extrapolation
+        end = numpy.inf if k == len(regime_edges) - 2 else end
+        design[:, k + 1] = numpy.clip(numpy.minimum(levels, end - 1) - max(start, 2) + 1, 0, None)
+    return design
+
+
+def recorded_xp_costs(hero_class=Hero) -> numpy.ndarray:
+    """Return the positive experience cost of each sub-level, starting at sub-level 1 (sub-level 0 is free)"""
+    return -numpy.array(hero_class._xp_costs[1:], dtype=float)
+
+
+class HeroXpModel:
+    """Piecewise growth model of the hero experience costs"""
+
+    def __init__(self, regime_edges: List[int], parameters: numpy.ndarray, covariance: numpy.ndarray,
+                 costs: numpy.ndarray):
+        self.regime_edges = regime_edges
+        """First sub-level of each regime, plus the end of the recorded levels"""
+        self.parameters = parameters
+        """log(xp_cost(1)) followed by the log of the growth factor of each regime"""
+        self.covariance = covariance
+        self.costs = costs
+        """Recorded costs the model was fitted on (sub-levels 1 to len(costs))"""
+
+    @classmethod
+    def fit_regimes(cls, costs: numpy.ndarray, regime_edges: Sequence[int],
+                    levels: Optional[numpy.ndarray] = None) -> 'HeroXpModel':
+        """
+        Fit the model with fixed regimes.
+
+        :param costs: 1D array of the positive costs of sub-levels 1, 2, ...
+        :param regime_edges: first sub-level of each regime, plus the end of the recorded levels
+        :param levels: optional array of the sub-levels to fit on (default to all of them), for validation
+        :return: HeroXpModel
+        """
+        costs = numpy.asarray(costs, dtype=float)
+        if levels is None:
+            levels = numpy.arange(1, len(costs) + 1)
+        regime_edges = list(regime_edges)
+        log_costs = numpy.log(costs[levels - 1])
+        # Rounding to the unit gives an uncertainty of 0.5 / cost on the log of the cost
+        weights = costs[levels - 1] / 0.5
+        design = growth_steps(levels, regime_edges)
+        weighted_design = design * weights[:, None]
+        parameters = numpy.linalg.lstsq(weighted_design, log_costs * weights, rcond=None)[0]
+        # Rescale the covariance when the residuals are bigger than the rounding (recording errors)
+        normalized_residuals = (log_costs - design @ parameters) * weights
+        degrees_of_freedom = max(1, len(levels) - len(parameters))
+        scale = max(1., normalized_residuals @ normalized_residuals / degrees_of_freedom)
+        covariance = scale * numpy.linalg.pinv(weighted_design.T @ weighted_design)
+        return cls(regime_edges, parameters, covariance, costs)
+
+    @classmethod
+    def fit(cls, costs: Optional[numpy.ndarray] = None, initial_edges: Optional[Sequence[int]] = None,
+            separation_sigmas: float = REGIME_SEPARATION_SIGMAS) -> 'HeroXpModel':
+        """
+        Fit the model, detecting the regimes.
+
+        :param costs: 1D array of the positive costs of sub-levels 1, 2, ... (default to Hero._xp_costs)
+        :param initial_edges: candidate regime edges (default to every hero level)
+        :param separation_sigmas: float, see REGIME_SEPARATION_SIGMAS
+        :return: HeroXpModel
+        """
+        if costs is None:
+            costs = recorded_xp_costs()
+        if initial_edges is None:
+            initial_edges = range(Hero.sub_levels_per_level, len(costs) + 1, Hero.sub_levels_per_level)
+        regime_edges = sorted({1, len(costs) + 1} | {edge for edge in initial_edges if 1 < edge <= len(costs)})
+
+        model = cls.fit_regimes(costs, regime_edges)
+        while len(regime_edges) > 2:
+            # Merge the two adjacent regimes whose growth factors are the most similar, if they can't be told apart
+            log_factors = model.parameters[1:]
+            variances = numpy.diag(model.covariance)[1:]
+            covariances = numpy.diag(model.covariance, 1)[1:]
+            separations = numpy.abs(numpy.diff(log_factors)) / numpy.sqrt(
+                numpy.maximum(variances[:-1] + variances[1:] - 2 * covariances, 1e-300))
+            k = int(numpy.argmin(separations))
+            if separations[k] >= separation_sigmas:
+                break
+            regime_edges = regime_edges[:k + 1] + regime_edges[k + 2:]
+            model = cls.fit_regimes(costs, regime_edges)
+        return model
+
+    @property
+    def regimes(self) -> List[XpRegime]:
+        standard_errors = numpy.sqrt(numpy.diag(self.covariance))[1:]
+        return [XpRegime(start, end, float(numpy.exp(log_factor)), float(numpy.exp(log_factor) * standard_error))
+                for start, end, log_factor, standard_error
+                in zip(self.regime_edges[:-1], self.regime_edges[1:], self.parameters[1:], standard_errors)]
+
+    def predict(self, levels: Union[int, numpy.ndarray]) -> Union[float, numpy.ndarray]:
+        """
+        Return the unrounded experience cost of the sub-levels (levels above the recorded ones are extrapolated with
+        the growth factor of the last regime).
+
+        :param levels: int or array of sub-levels >= 1
+        :return: positive float, or array of floats
+        """
+        if numpy.ndim(levels) == 0:
+            return float(self.predict(numpy.array([levels]))[0])
+        return numpy.exp(growth_steps(numpy.asarray(levels), self.regime_edges) @ self.parameters)
+
+    def xp_cost(self, level: int) -> int:
+        """Return the experience cost of upgrading a hero from <level> to <level> + 1 (negative like Hero._xp_costs),
+        the recorded value if known else the prediction"""
+        if level == 0:
+            return 0
+        if level <= len(self.costs):
+            return -int(self.costs[level - 1])
+        return -int(round(self.predict(level)))
+
+    def completed_xp_costs(self, max_level: int = MAX_LEVEL * Hero.sub_levels_per_level) -> List[int]:
+        """Return Hero._xp_costs extended up to <max_level> with the predictions"""
+        return [self.xp_cost(level) for level in range(max_level)]
+
+    def validation_report(self, folds: int = VALIDATION_FOLDS) -> str:
+        """
+        Describe the regimes and the errors of the model: on the recorded costs, and in cross validation (the costs of
+        each fold of levels being predicted by the model fitted on the other folds with the same regimes).
+        """
+        levels = numpy.arange(1, len(self.costs) + 1)
+        predictions = numpy.round(self.predict(levels))
+        errors = predictions - self.costs
+
+        validation_errors = numpy.empty_like(errors)
+        for fold in range(folds):
+            fitted = levels % folds != fold
+            fold_model = self.fit_regimes(self.costs, self.regime_edges, levels=levels[fitted])
+            validation_errors[~fitted] = numpy.round(fold_model.predict(levels[~fitted])) - self.costs[~fitted]
+
+        lines = ["{} regimes fitted on {} recorded costs".format(len(self.regime_edges) - 1, len(self.costs)),
+                 "  {:>9}  {:>18}  {:>9}  {:>9}  {:>7}".format("levels", "growth factor", "max error",
+                                                                "relative", "exact")]
+        for regime in self.regimes:
+            in_regime = (regime.start <= levels) & (levels < regime.end)
+            lines.append("  {:>9}  {:>8.5f} ±{:<8.2g}  {:>9.0f}  {:>8.2%}  {:>3}/{:<3}".format(
+                "{}-{}".format(regime.start, regime.end - 1), regime.growth_factor, regime.standard_error,
+                numpy.abs(errors[in_regime]).max(), numpy.abs(errors[in_regime] / self.costs[in_regime]).max(),
+                int(numpy.sum(errors[in_regime] == 0)), int(numpy.sum(in_regime))))
+        for title, title_errors in (("Fit", errors), ("{}-fold cross validation".format(folds), validation_errors)):
+            lines.append("{}: rmse={:.3g} xp, max error={:.0f} xp ({:.2%}), {:.0%} of the costs exactly predicted".format(
+                title, float(numpy.sqrt(numpy.mean(title_errors ** 2))), numpy.abs(title_errors).max(),
+                numpy.abs(title_errors / self.costs).max(), numpy.mean(title_errors == 0)))
+        return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    print(HeroXpModel.fit().validation_report())
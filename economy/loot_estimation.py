@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Estimation of the chests loot statistics from the chest openings recorded in experiments/data/chest_loots.py
+
+For each chest type it estimates the probability of each rarity per card (scaled to the number of cards of the chest),
+the share of spells, the average number of reincarnation tokens, and for chests looting resources the gold and goods
+multipliers of the rank trading base (Chest._average_gold_base and Chest._average_goods_base) per rank.
+
+Every statistic is a ratio of sums over the records (e.g. number of rare cards / number of cards), so its uncertainty is
+estimated by bootstrap: the records are resampled with replacement many times (in parallel processes) and the
+confidence interval is given by the percentiles of the statistic over the resamples.
+
+Usage example:
+
+    >>> estimates = estimate_all_chests()
+    >>> print(estimates[SilverChest].report())
+    >>> estimates[SilverChest].average_loot_candidate()
+
+Or `python3 -m economy.loot_estimation` to print the reports of every chest.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Type, Optional, Tuple
+
+import numpy
+
+from common.leagues import Rank
+from common.rarity import Rarity
+from common.resources import ResourcePacket, ResourceQuantity, Resources
+from economy.chests import Chest
+from spells.common_spell import Spell
+
+Estimate = namedtuple('Estimate', 'value lower upper')
+"""Estimated value of a statistic and the bounds of its confidence interval"""
+
+BOOTSTRAP_ITERATIONS = 10000
+"""Default number of bootstrap resamples"""
+
+CONFIDENCE = 0.95
+"""Default level of the confidence intervals"""
+
+MIN_RANK_RECORDS = 2
+"""Minimal number of records of a rank for the confidence intervals of its multipliers to be computed (resampling a
+single record always gives the same value, i.e. a null width interval). Smaller ranks have NaN bounds."""
+
+
+def recorded_loots() -> Dict[Type[Chest], list]:
+    """Return the recorded chest openings {chest class: list of Loot}"""
+    # Imported here as it imports every card module
+    from experiments.data.chest_loots import chest_opening_examples
+    return chest_opening_examples
+
+
+def card_loot_types(card) -> Tuple[ResourceQuantity.VALID_RESOURCE_TYPE, ...]:
+    """Return the loot types a looted card counts for: its rarity, and Spell for spells"""
+    return (card.rarity, Spell) if issubclass(card, Spell) else (card.rarity,)
+
+
+class RatioStatistics:
+    """
+    Statistics of the form sum(numerators) / sum(denominators) over the records, stored as two (records x statistics)
+    matrices so that any resample of the records is evaluated with a few numpy operations.
+    """
+
+    def __init__(self):
+        self.names: List[tuple] = []
+        self._numerator_columns: List[List[float]] = []
+        self._denominator_columns: List[List[float]] = []
+
+    def add(self, name: tuple, numerators: List[float], denominators: List[float]):
+        self.names.append(name)
+        self._numerator_columns.append(numerators)
+        self._denominator_columns.append(denominators)
+
+    @property
+    def numerators(self) -> numpy.ndarray:
+        return numpy.array(self._numerator_columns, dtype=float).T
+
+    @property
+    def denominators(self) -> numpy.ndarray:
+        return numpy.array(self._denominator_columns, dtype=float).T
+
+
+def ratios(numerators: numpy.ndarray, denominators: numpy.ndarray) -> numpy.ndarray:
+    """Return the ratio of the sums along the records axis (-2), NaN where there is no denominator"""
+    denominator_sums = denominators.sum(axis=-2)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return numpy.where(denominator_sums > 0, numerators.sum(axis=-2) / denominator_sums, numpy.nan)
+
+
+def bootstrap_ratios(numerators: numpy.ndarray, denominators: numpy.ndarray, iterations: int,
+                     seed: numpy.random.SeedSequence) -> numpy.ndarray:
+    """
+    Compute the ratio statistics on resamples of the records.
+
+    :return: (iterations x statistics) array
+    """
+    generator = numpy.random.default_rng(seed)
+    record_number = numerators.shape[0]
+    results = numpy.empty((iterations, numerators.shape[1]))
+    # Resamples are processed by batches to bound the memory usage
+    batch_size = max(1, 10**6 // max(1, record_number * numerators.shape[1]))
+    for start in range(0, iterations, batch_size):
+        indexes = generator.integers(0, record_number, size=(min(batch_size, iterations - start), record_number))
+        results[start:start + len(indexes)] = ratios(numerators[indexes], denominators[indexes])
+    return results
+
+
+def parallel_bootstrap_ratios(numerators: numpy.ndarray, denominators: numpy.ndarray,
+                              iterations: int = BOOTSTRAP_ITERATIONS, workers: Optional[int] = None,
+                              seed: Optional[int] = None) -> numpy.ndarray:
+    """
+    Compute the ratio statistics on resamples of the records, split between several processes.
+
+    :param workers: number of processes (default to the number of cores), 1 to compute everything in this process
+    :param seed: optional int, to get reproducible results (for a given number of workers)
+    :return: (iterations x statistics) array
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, iterations))
+    seeds = numpy.random.SeedSequence(seed).spawn(workers)
+    chunk_sizes = [iterations // workers + (k < iterations % workers) for k in range(workers)]
+    if workers == 1:
+        return bootstrap_ratios(numerators, denominators, iterations, seeds[0])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(bootstrap_ratios, [numerators] * workers, [denominators] * workers, chunk_sizes, seeds)
+        return numpy.concatenate(list(chunks))
+
+
+class LootEstimate:
+    """Loot statistics of a chest type estimated from recorded openings"""
+
+    def __init__(self, chest_type: Type[Chest], record_number: int, card_averages: Dict[object, Estimate],
+                 reincarnation_token: Estimate, gold_multipliers: Dict[Optional[Rank], Estimate],
+                 goods_multipliers: Dict[Optional[Rank], Estimate], rank_record_numbers: Dict[Optional[Rank], int]):
+        self.chest_type = chest_type
+        self.record_number = record_number
+        self.card_averages = card_averages
+        """Average number of cards of each rarity per chest (and of spells, with the Spell key)"""
+        self.reincarnation_token = reincarnation_token
+        """Average number of reincarnation tokens per chest"""
+        self.gold_multipliers = gold_multipliers
+        """Gold looted divided by the rank trading base, per rank (the None key being for all ranks together)"""
+        self.goods_multipliers = goods_multipliers
+        """Goods looted divided by the rank trading base, per rank (the None key being for all ranks together)"""
+        self.rank_record_numbers = rank_record_numbers
+        """Number of records of each rank (the None key being for all ranks together)"""
+
+    @classmethod
+    def fit(cls, chest_type: Type[Chest], loots: list, iterations: int = BOOTSTRAP_ITERATIONS,
+            confidence: float = CONFIDENCE, workers: Optional[int] = None, seed: Optional[int] = None,
+            ) -> 'LootEstimate':
+        """
+        Estimate the loot statistics of a chest type and their confidence intervals.
+
+        Note: records where the cards weren't recorded (None) are only used for the other statistics, and the card
+        statistics are normalized by the number of cards recorded (some records miss a few cards), then scaled to the
+        number of cards of a full chest (the biggest number of cards recorded).
+        Note: a record without reincarnation token (empty ResourcePacket) is counted as 0 tokens.
+
+        :param chest_type: the chest class
+        :param loots: List[Loot], the recorded openings of this chest
+        :param iterations: int, number of bootstrap resamples
+        :param confidence: float, level of the confidence intervals
+        :param workers: number of processes used for the bootstrap (default to the number of cores)
+        :param seed: optional int, to get reproducible results
+        :return: LootEstimate
+        """
+        statistics = RatioStatistics()
+        card_numbers = [len(loot.cards) if loot.cards is not None else 0 for loot in loots]
+        card_types = sorted({card_type for loot in loots for card in (loot.cards or ())
+                             for card_type in card_loot_types(card)}, key=str)
+        for card_type in card_types:
+            statistics.add(('cards', card_type),
+                           [sum(card_type in card_loot_types(card) for card in (loot.cards or ())) for loot in loots],
+                           card_numbers)
+        statistics.add(('token',), [loot.resource_packet.get(Resources.ReincarnationToken, 0) for loot in loots],
+                       [1] * len(loots))
+        ranks = sorted({loot.ligue for loot in loots}, key=lambda rank: rank.value)
+        rank_record_numbers = {rank: sum(rank in (None, loot.ligue) for loot in loots) for rank in [None] + ranks}
+        for resource, base in ((Resources.Gold, chest_type._average_gold_base),
+                               (Resources.Goods, chest_type._average_goods_base)):
+            if base is None:
+                continue
+            for rank in [None] + ranks:
+                statistics.add((resource, rank),
+                               [loot.resource_packet.get(resource, 0) / loot.ligue.traiding_base
+                                if rank in (None, loot.ligue) else 0 for loot in loots],
+                               [1 if rank in (None, loot.ligue) else 0 for loot in loots])
+
+        numerators, denominators = statistics.numerators, statistics.denominators
+        values = ratios(numerators, denominators)
+        resamples = parallel_bootstrap_ratios(numerators, denominators, iterations, workers=workers, seed=seed)
+        with numpy.errstate(invalid='ignore'):
+            lowers, uppers = numpy.nanpercentile(resamples, [50 * (1 - confidence), 50 * (1 + confidence)], axis=0)
+        estimates = {name: Estimate(float(value), float(lower), float(upper))
+                     for name, value, lower, upper in zip(statistics.names, values, lowers, uppers)}
+        for name, estimate in estimates.items():
+            if name[0] in (Resources.Gold, Resources.Goods) and rank_record_numbers[name[1]] < MIN_RANK_RECORDS:
+                estimates[name] = Estimate(estimate.value, numpy.nan, numpy.nan)
+
+        def scaled(estimate: Estimate, factor: float) -> Estimate:
+            return Estimate(*(factor * value for value in estimate))
+
+        return cls(
+            chest_type, len(loots),
+            {name[1]: scaled(estimate, max(card_numbers))
+             for name, estimate in estimates.items() if name[0] == 'cards'},
+            estimates[('token',)],
+            {name[1]: estimate for name, estimate in estimates.items() if name[0] is Resources.Gold},
+            {name[1]: estimate for name, estimate in estimates.items() if name[0] is Resources.Goods},
+            rank_record_numbers,
+            )
+
+    def average_loot_candidate(self) -> ResourcePacket:
+        """Return the estimated values of the loot types of the chest _average_loot (a candidate to replace it)"""
+        return ResourcePacket(*[ResourceQuantity(loot_type, self.card_averages.get(loot_type, Estimate(0, 0, 0)).value)
+                                for loot_type in self.chest_type._average_loot])
+
+    def report(self) -> str:
+        """Describe the estimates, compared to the current values of the chest class"""
+        lines = ["{} ({} records)".format(self.chest_type.__name__, self.record_number)]
+
+        def line(name: str, estimate: Estimate, current_value: Optional[float]):
+            lines.append("  {:<44} {:>8.3f}  [{:.3f}, {:.3f}]  (current: {})".format(
+                name, estimate.value, estimate.lower, estimate.upper,
+                "-" if current_value is None else "{:.3f}".format(current_value)))
+
+        for loot_type in sorted(self.card_averages, key=lambda loot_type: list(Rarity).index(loot_type)
+                                if isinstance(loot_type, Rarity) else len(Rarity)):
+            line(loot_type.name if isinstance(loot_type, Rarity) else loot_type.__name__,
+                 self.card_averages[loot_type], self.chest_type._average_loot.get(loot_type))
+        line("ReincarnationToken", self.reincarnation_token, self.chest_type._average_reincarnation_token)
+        for resource, multipliers, current_base in (
+                (Resources.Gold, self.gold_multipliers, self.chest_type._average_gold_base),
+                (Resources.Goods, self.goods_multipliers, self.chest_type._average_goods_base)):
+            for rank, estimate in multipliers.items():
+                name = "{} multiplier ({}, {} records)".format(
+                    resource.name, "all ranks" if rank is None else rank.name, self.rank_record_numbers[rank])
+                line(name, estimate, current_base)
+        return "\n".join(lines)
+
+
+def estimate_all_chests(iterations: int = BOOTSTRAP_ITERATIONS, confidence: float = CONFIDENCE,
+                        workers: Optional[int] = None, seed: Optional[int] = None,
+                        ) -> Dict[Type[Chest], LootEstimate]:
+    """Estimate the loot statistics of every chest type having recorded openings"""
+    return {chest_type: LootEstimate.fit(chest_type, loots, iterations, confidence, workers=workers, seed=seed)
+            for chest_type, loots in recorded_loots().items() if loots}
+
+
+if __name__ == '__main__':
+    for estimate in estimate_all_chests().values():
+        print(estimate.report())
+        print("  _average_loot candidate: {}".format(
+            ", ".join("{}={:.3g}".format(ResourceQuantity.prettify_type(loot_type), quantity)
+                      for loot_type, quantity in estimate.average_loot_candidate().items())))
+        print()
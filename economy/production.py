@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Event based production model of the buildings that produce resources continuously (Mill and TransportStation).
+
+The building fills its storage at a constant hourly rate, and the player empties it at each collection. Anything
+produced while the storage is full is lost. Given the collection timestamps of a day (repeated every day), the amount
+collected over each interval between two collections is min(hourly_rate * interval, storage_limit).
+
+All the computations are vectorized over building levels and over several schedules at once, so that for example all
+the collection strategies can be evaluated for all levels 1-30 in a single call.
+"""
+from collections import namedtuple
+from typing import Type, Sequence, Union, Optional
+
+import numpy
+
+from buildings.base_buildings import Building
+from buildings.buildings import Mill, TransportStation
+from common.cards import MAX_LEVEL
+from common.resources import Resources as R
+from common.vip import VIP
+
+ProductionBuildingSpec = namedtuple('ProductionBuildingSpec', 'resource_type production_effect storage_effect')
+
+PRODUCTION_BUILDINGS = {
+    Mill: ProductionBuildingSpec(R.Goods, 'goods_production', 'goods_storage'),
+    TransportStation: ProductionBuildingSpec(R.Gold, 'gold_production', 'gold_storage'),
+    }
+"""Resource produced by each production building and the VIP effects attributes that affect it"""
+
+_HOURLY_RATES = {
+    building: numpy.array([packet[spec.resource_type] / 2 for packet in building.bihourly_incomes], dtype=float)
+    for building, spec in PRODUCTION_BUILDINGS.items()
+    }
+_STORAGE_LIMITS = {
+    building: numpy.array(building.storage_limits, dtype=float)
+    for building in PRODUCTION_BUILDINGS
+    }
+
+ALL_LEVELS = numpy.arange(1, MAX_LEVEL + 1)
+"""Every existing production building level (1-30)"""
+
+DayProduction = namedtuple('DayProduction', 'collected produced lost')
+"""
+Daily amounts of a production building, as numpy arrays of shape (schedules, levels) (or (levels,) if a single
+schedule was given): collected resources, produced resources (24h of production), and overflow losses.
+"""
+
+Schedule = Optional[Sequence[float]]
+"""Daily collection timestamps in hours [0, 24), None meaning the storage never overflows"""
+
+
+def collection_intervals(schedules: Union[Schedule, Sequence[Schedule]]) -> numpy.ndarray:
+    """
+    Convert daily collection schedules into the durations (in hours) between consecutive collections.
+
+    Schedules repeat every day, so the last interval wraps around midnight up to the first collection of the next day.
+
+    :param schedules: a single schedule, or a sequence of schedules. A schedule is a sequence of collection timestamps
+        in hours [0, 24), or None for a player collecting often enough to never lose anything.
+    :return: numpy.ndarray of shape (schedules, max collection count), padded with 0, where the intervals of a None
+        schedule are also 0.
+    """
+    if schedules is None or (len(schedules) > 0 and numpy.isscalar(schedules[0])):
+        schedules = [schedules]
+    assert len(schedules) > 0, "At least one schedule is required, use None for continuous collection"
+    max_count = max([len(schedule) for schedule in schedules if schedule is not None] + [1])
+
+    # Pad with NaN to build a (schedules x collections) array of sorted timestamps
+    timestamps = numpy.full((len(schedules), max_count), numpy.nan)
+    for k, schedule in enumerate(schedules):
+        if schedule is not None:
+            assert len(schedule) > 0, "A schedule must contain at least one collection, use None for continuous collection"
+            assert all(0 <= t < 24 for t in schedule), "Collection timestamps must be in hours in [0, 24)"
+            timestamps[k, :len(schedule)] = numpy.sort(schedule)
+
+    # Interval to the next collection, the last valid collection of each row wraps to the first one + 24h
+    intervals = numpy.diff(timestamps, axis=1, append=numpy.nan)
+    counts = numpy.sum(~numpy.isnan(timestamps), axis=1)
+    has_collections = counts > 0
+    last_indexes = counts[has_collections] - 1
+    intervals[has_collections, last_indexes] = 24 - timestamps[has_collections, last_indexes] + timestamps[has_collections, 0]
+    return numpy.nan_to_num(intervals, nan=0.)
+
+
+def day_production(building: Type[Building], schedules: Union[Schedule, Sequence[Schedule]],
+                   vip: VIP = VIP.lvl0, levels: Union[int, Sequence[int]] = ALL_LEVELS) -> DayProduction:
+    """
+    Compute the resources really collected in a day from a production building, including overflow losses.
+
+    :param building: Type[Building], Mill or TransportStation
+    :param schedules: a single collection schedule or a sequence of schedules (see collection_intervals)
+    :param vip: VIP, the VIP level of the player (production and storage multipliers)
+    :param levels: int or sequence of int, the building level(s) to evaluate, all levels by default
+    :return: DayProduction of arrays of shape (schedules, levels), dimensions of scalar inputs being dropped
+    """
+    spec = PRODUCTION_BUILDINGS[building]
+    single_schedule = schedules is None or (len(schedules) > 0 and numpy.isscalar(schedules[0]))
+    levels = numpy.asarray(levels)
+
+    hourly_rates = _HOURLY_RATES[building][levels] * getattr(vip, spec.production_effect)
+    storage_limits = _STORAGE_LIMITS[building][levels] * getattr(vip, spec.storage_effect)
+    intervals = collection_intervals(schedules)
+    continuous = ~intervals.any(axis=1)  # None schedules
+
+    # (schedules, collections, levels) broadcast
+    interval_productions = intervals[:, :, numpy.newaxis] * hourly_rates.reshape(1, 1, -1)
+    collected = numpy.minimum(interval_productions, storage_limits.reshape(1, 1, -1)).sum(axis=1)
+    produced = numpy.broadcast_to(hourly_rates.reshape(1, -1) * 24, collected.shape)
+    collected[continuous] = produced[continuous]
+    lost = produced - collected
+
+    shape = ((() if single_schedule else (len(intervals),))
+             + levels.shape)
+    return DayProduction(collected.reshape(shape), produced.reshape(shape), lost.reshape(shape))
@@ -24,8 +24,8 @@ from collections import namedtuple
 
 from common.resources import ResourcePacket, Resources
 from economy.chests import RecycleChest, WoodenChest, IronChest, SilverChest, GoldenChest, RaidChest
-from spells.convoy_boosts import *
-from spells.spells import *
+from spells.attack_spells import *
+from spells.defense_spells import *
 from units.bandits import *
 from units.guardians import *
 from units.vehicles import *
@@ -246,7 +246,8 @@ chest_opening_examples = {
 
     RaidChest: [
         # For raid chest: index means the number of stars won
-        Loot(8, L.Horse2, 6, None, ResourcePacket(Resources.ReincarnationToken(2), Resources.BanditShieldProtection()),
+        # + a bandit shield protection (not a resource)
+        Loot(8, L.Horse2, 6, None, ResourcePacket(Resources.ReincarnationToken(2)),
              (Charrette, Helicopter, Brute, Maraudeur, Hunter, Archer, Guard,)),
         Loot(8, L.Horse3, 6, None, ResourcePacket(Resources.ReincarnationToken(2)),
              (Chaingun, Maraudeur, Scout, Scout, Poison, Lutin, Berserk)),
@@ -266,11 +267,11 @@ chest_opening_examples = {
     #         ResourcePacket(Resources.Gem(20), Resources.LifePotion(1), Resources.BeginnerGrowth(20)), ()),
     #    ],
 
-    WeeklyQuestChest: [
-        Loot(8, L.Horse3, 6, 4,
-             ResourcePacket(Resources.Gold(30000), Resources.LifePotion(5), Resources.BeginnerGrowth(60)), ()),
-        Loot(8, L.Horse3, 6, 5, ResourcePacket(Resources.Gold(50000), Resources.Gem(100), Resources.BeginnerGrowth(60)),
-             ()),
-        ],
+    #WeeklyQuestChest: [
+    #    Loot(8, L.Horse3, 6, 4,
+    #         ResourcePacket(Resources.Gold(30000), Resources.LifePotion(5), Resources.BeginnerGrowth(60)), ()),
+    #    Loot(8, L.Horse3, 6, 5, ResourcePacket(Resources.Gold(50000), Resources.Gem(100), Resources.BeginnerGrowth(60)),
+    #         ()),
+    #    ],
 
     }
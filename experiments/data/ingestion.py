@@ -0,0 +1,472 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Ingestion of the hand-recorded experiment CSV files into a compressed columnar store.
+
+CSV rows are streamed one by one, validated and converted into typed values according to the schema of the file
+(blank rows are skipped, extra fields are gathered in the free-form column of the schema, invalid rows are reported
+and left out). Rows are appended to the store as a new part file, and the store remembers how far the CSV file has
+been ingested, so that ingesting it again only processes the rows added since (or everything again if the already
+ingested rows were edited).
+
+Parts are written in Parquet or Feather when pyarrow is installed, else in compressed numpy archives (.npz).
+
+Usage example:
+
+    >>> store = ColumnarStore(os.path.join(STORE_DIRECTORY, 'ambush_loots'), AMBUSH_LOOTS_SCHEMA)
+    >>> report = store.ingest(os.path.join(DATA_DIRECTORY, 'ambush_loots.csv'))
+    >>> columns = store.load()
+    >>> columns['gems'].mean()
+
+Or `python3 -m experiments.data.ingestion` to ingest every known CSV file.
+"""
+import argparse
+import csv
+import datetime
+import glob
+import hashlib
+import json
+import os
+from collections import namedtuple
+from typing import Any, List, Optional, Dict, Iterator, Tuple, Union
+
+import numpy
+
+from common.leagues import Rank
+from common.rarity import Rarity
+
+DATA_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+STORE_DIRECTORY = os.path.join(DATA_DIRECTORY, "store")
+
+METADATA_FILE = "_ingestion.json"
+NULL_SUFFIX = "__null"
+"""Suffix of the arrays storing the null mask of each column in the .npz parts"""
+LIST_SEPARATOR = ";"
+"""Separator of the items of list columns in CSV files (and in .npz parts)"""
+
+CARD_MARKERS = ('CARD_EVENT',)
+"""Special values allowed in card lists besides rarities and card names"""
+
+FORMATS = ('parquet', 'feather', 'npz')
+
+
+# ----- Coercion of the CSV fields -----
+
+def parse_int(value: str) -> int:
+    return int(value)
+
+
+def parse_float(value: str) -> float:
+    return float(value)
+
+
+def parse_bool(value: str) -> bool:
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError("not a boolean")
+
+
+def parse_date(value: str) -> datetime.date:
+    """Parse dates written day first (e.g. 25/04/2020)"""
+    return datetime.datetime.strptime(value, "%d/%m/%Y").date()
+
+
+def parse_rank(value: str) -> str:
+    """Check the value is a Rank name (e.g. RedDragon3) and return its canonical name"""
+    return Rank[value].name
+
+
+def parse_str(value: str) -> str:
+    return value
+
+
+_card_names: Optional[Dict[str, str]] = None
+
+
+def card_names() -> Dict[str, str]:
+    """Return the names of every card class {lower case name: name}"""
+    global _card_names
+    if _card_names is None:
+        import importlib
+        from common.cards import Card
+        from economy.cost_models import CARD_MODULES
+        for module_name in CARD_MODULES:
+            importlib.import_module(module_name)
+        _card_names = {}
+        classes_to_visit = [Card]
+        while classes_to_visit:
+            cls = classes_to_visit.pop()
+            _card_names[cls.__name__.lower()] = cls.__name__
+            classes_to_visit.extend(cls.__subclasses__())
+    return _card_names
+
+
+def parse_card_list(value: str) -> List[str]:
+    """Parse a list of looted cards separated by LIST_SEPARATOR: each item being a rarity name (e.g. epic), a card
+    class name (e.g. Maraudeur) or a marker (CARD_MARKERS). Return the canonical names."""
+    cards = []
+    for item in value.split(LIST_SEPARATOR):
+        item = item.strip()
+        if item in CARD_MARKERS:
+            cards.append(item)
+        elif item.capitalize() in Rarity.__members__:
+            cards.append(item.capitalize())
+        elif item.lower() in card_names():
+            cards.append(card_names()[item.lower()])
+        else:
+            raise ValueError("unknown card or rarity {!r}".format(item))
+    return cards
+
+
+# ----- Schemas -----
+
+Column = namedtuple('Column', 'name type parse required')
+"""A CSV column: its name, the type of its values ('int', 'float', 'bool', 'date', 'str' or 'list'), the function
+converting the (stripped, non empty) field into a value, and whether rows without it are invalid"""
+
+RowError = namedtuple('RowError', 'line column value message')
+"""An invalid CSV row: line number (starting at 1), name of the invalid column, invalid field and reason"""
+
+
+class Schema:
+    """The columns of a CSV file"""
+
+    def __init__(self, name: str, columns: List[Column], free_form_column: Optional[str] = None,
+                 omittable_column: Optional[str] = None):
+        self.name = name
+        self.columns = columns
+        self.free_form_column = free_form_column
+        """Name of the last column, where the fields in excess are gathered (e.g. comments containing commas)"""
+        self.omittable_column = omittable_column
+        """Name of a column some rows were recorded without (one comma fewer): when its field isn't valid but is a
+        valid value of the next column, the following fields are shifted back into their columns"""
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def check_header(self, header: List[str]):
+        names = [name.strip() for name in header]
+        if names != self.column_names:
+            raise ValueError("{} header mismatch: expected {}, found {}".format(self.name, self.column_names, names))
+
+    @staticmethod
+    def _is_valid(column: Column, field: str) -> bool:
+        try:
+            column.parse(field)
+        except (ValueError, KeyError):
+            return False
+        return True
+
+    def parse_row(self, line_number: int, fields: List[str]) -> Union[Dict[str, Any], RowError]:
+        """Convert the fields of a CSV row into typed values (None for missing values)"""
+        if self.omittable_column is not None:
+            k = self.column_names.index(self.omittable_column)
+            field = fields[k].strip() if k < len(fields) else ""
+            if (field and k + 1 < len(self.columns) and not self._is_valid(self.columns[k], field)
+                    and self._is_valid(self.columns[k + 1], field)):
+                fields = fields[:k] + [""] + fields[k:]
+        if len(fields) > len(self.columns):
+            if self.free_form_column is None or self.columns[-1].name != self.free_form_column:
+                return RowError(line_number, None, ",".join(fields), "too many fields ({} instead of {})".format(
+                    len(fields), len(self.columns)))
+            fields = fields[:len(self.columns) - 1] + [",".join(fields[len(self.columns) - 1:])]
+        row = {}
+        for k, column in enumerate(self.columns):
+            field = fields[k].strip() if k < len(fields) else ""
+            if not field:
+                if column.required:
+                    return RowError(line_number, column.name, field, "missing required value")
+                row[column.name] = None
+                continue
+            try:
+                row[column.name] = column.parse(field)
+            except (ValueError, KeyError) as error:
+                return RowError(line_number, column.name, field, "invalid {}: {}".format(column.type, error))
+        return row
+
+
+AMBUSH_LOOTS_SCHEMA = Schema("ambush_loots", [
+    Column('day', 'date', parse_date, True),
+    Column('id', 'int', parse_int, True),
+    Column('is_bot', 'bool', parse_bool, False),
+    Column('star_score', 'int', parse_int, False),
+    Column('gems', 'int', parse_int, False),
+    Column('potions', 'int', parse_int, False),
+    Column('legendary_souls', 'int', parse_int, False),
+    Column('reincarnation_medals', 'int', parse_int, False),
+    Column('bandit_shield', 'bool', parse_bool, False),
+    Column('cards', 'list', parse_card_list, False),
+    Column('comments', 'str', parse_str, False),
+    ], free_form_column='comments', omittable_column='bandit_shield')
+"""Note: the rows of the card events (e.g. `06/06/2020,32,False, 3,,,,, legendary`) were recorded without the
+bandit_shield field"""
+
+CLAN_BOSS_LOOTS_SCHEMA = Schema("clan_boss_loots", [
+    Column('date', 'date', parse_date, True),
+    Column('boss_kills', 'int', parse_int, True),
+    Column('goods_reward', 'int', parse_int, True),
+    ])
+
+SCHEMAS = {schema.name: schema for schema in (AMBUSH_LOOTS_SCHEMA, CLAN_BOSS_LOOTS_SCHEMA)}
+"""Schemas of the CSV files of the data directory, by file name (without extension)"""
+
+
+def read_rows(path: str, schema: Schema, offset: int = 0, line_number: int = 0,
+              ) -> Iterator[Tuple[int, int, Union[Dict[str, Any], RowError, None]]]:
+    """
+    Stream the rows of a CSV file, from a byte offset (0 to read the header too).
+
+    :param path: path of the CSV file
+    :param schema: Schema of the file
+    :param offset: int, byte offset of the first row to read (right after a line break)
+    :param line_number: int, number of lines before the offset
+    :return: iterator of (byte offset after the row, line number of the row, row values or RowError), with None values
+        for blank rows
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for raw_line in file:
+            offset += len(raw_line)
+            line_number += 1
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if line_number == 1:
+                schema.check_header(next(csv.reader([line])))
+                continue
+            if not line.strip():
+                yield offset, line_number, None
+                continue
+            yield offset, line_number, schema.parse_row(line_number, next(csv.reader([line])))
+
+
+# ----- Columnar store -----
+
+def _numpy_column(column: Column, values: List[Any]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Convert column values into (values array, null mask array)"""
+    mask = numpy.array([value is None for value in values], dtype=bool)
+    if column.type == 'date':
+        array = numpy.array([value if value is not None else 'NaT' for value in values], dtype='datetime64[D]')
+    elif column.type == 'int':
+        array = numpy.array([value if value is not None else 0 for value in values], dtype=numpy.int64)
+    elif column.type == 'float':
+        array = numpy.array([value if value is not None else numpy.nan for value in values], dtype=float)
+    elif column.type == 'bool':
+        array = numpy.array([bool(value) for value in values], dtype=bool)
+    elif column.type == 'list':
+        array = numpy.array([LIST_SEPARATOR.join(value) if value is not None else "" for value in values], dtype=str)
+    else:
+        array = numpy.array([value if value is not None else "" for value in values], dtype=str)
+    return array, mask
+
+
+def _arrow_table(schema: Schema, rows: List[Dict[str, Any]]):
+    import pyarrow
+    types = {'date': pyarrow.date32(), 'int': pyarrow.int64(), 'float': pyarrow.float64(), 'bool': pyarrow.bool_(),
+             'str': pyarrow.string(), 'list': pyarrow.list_(pyarrow.string())}
+    return pyarrow.table({column.name: pyarrow.array([row[column.name] for row in rows], type=types[column.type])
+                          for column in schema.columns})
+
+
+class ColumnarStore:
+    """Directory of compressed columnar part files holding the rows ingested from a CSV file"""
+
+    def __init__(self, directory: str, schema: Schema, file_format: Optional[str] = None):
+        """
+        :param directory: path of the store directory (created when needed)
+        :param schema: Schema of the ingested CSV file
+        :param file_format: 'parquet', 'feather' or 'npz', default to parquet if pyarrow is installed else npz
+        """
+        if file_format is None:
+            try:
+                import pyarrow
+                file_format = 'parquet'
+            except ImportError:
+                file_format = 'npz'
+        assert file_format in FORMATS, "Unknown format {}, valid formats are {}".format(file_format, FORMATS)
+        self.directory = directory
+        self.schema = schema
+        self.file_format = file_format
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.directory, METADATA_FILE)
+
+    def _metadata(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.metadata_path):
+            return None
+        with open(self.metadata_path) as file:
+            return json.load(file)
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "part-*.*")))
+
+    def clear(self):
+        for path in self._parts() + [self.metadata_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _prefix_hash(path: str, size: int) -> str:
+        """Return the hash of the first <size> bytes of the file"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            remaining = size
+            while remaining > 0:
+                chunk = file.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest.hexdigest()
+
+    def ingest(self, csv_path: str) -> 'IngestionReport':
+        """
+        Append the rows of the CSV file that weren't ingested yet into the store.
+
+        :param csv_path: path of the CSV file
+        :return: IngestionReport
+        """
+        metadata = self._metadata()
+        offset, line_number = 0, 0
+        rebuilt = False
+        if metadata is not None:
+            # Already ingested rows must be unchanged, else everything is ingested again
+            offset, line_number = metadata['offset'], metadata.get('lines')
+            if (metadata['format'] != self.file_format or line_number is None
+                    or os.path.getsize(csv_path) < offset
+                    or self._prefix_hash(csv_path, offset) != metadata['prefix_hash']):
+                self.clear()
+                offset, line_number, rebuilt = 0, 0, True
+                metadata = None
+
+        rows, errors = [], []
+        for offset, line_number, row in read_rows(csv_path, self.schema, offset, line_number):
+            if row is not None:
+                (errors if isinstance(row, RowError) else rows).append(row)
+
+        os.makedirs(self.directory, exist_ok=True)
+        if rows:
+            self._write_part(os.path.join(self.directory, "part-{:05d}.{}".format(len(self._parts()),
+                                                                                    self.file_format)), rows)
+        with open(self.metadata_path, 'w') as file:
+            json.dump({'source': os.path.abspath(csv_path), 'format': self.file_format, 'offset': offset,
+                       'lines': line_number, 'prefix_hash': self._prefix_hash(csv_path, offset),
+                       'rows': (metadata['rows'] if metadata else 0) + len(rows)}, file)
+        return IngestionReport(len(rows), errors, rebuilt)
+
+    def _write_part(self, path: str, rows: List[Dict[str, Any]]):
+        if self.file_format == 'npz':
+            arrays = {}
+            for column in self.schema.columns:
+                arrays[column.name], arrays[column.name + NULL_SUFFIX] = _numpy_column(
+                    column, [row[column.name] for row in rows])
+            numpy.savez_compressed(path, **arrays)
+        elif self.file_format == 'parquet':
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(_arrow_table(self.schema, rows), path, compression='zstd')
+        else:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(_arrow_table(self.schema, rows), path, compression='zstd')
+
+    def _read_part(self, path: str) -> Dict[str, numpy.ma.MaskedArray]:
+        columns = {}
+        if self.file_format == 'npz':
+            with numpy.load(path) as archive:
+                for column in self.schema.columns:
+                    values, mask = archive[column.name], archive[column.name + NULL_SUFFIX]
+                    if column.type == 'list':
+                        values = numpy.array([value.split(LIST_SEPARATOR) if value else [] for value in values]
+                                             + [None], dtype=object)[:-1]
+                    columns[column.name] = numpy.ma.MaskedArray(values, mask=mask)
+            return columns
+        import pyarrow.parquet
+        import pyarrow.feather
+        table = (pyarrow.parquet.read_table(path) if self.file_format == 'parquet'
+                 else pyarrow.feather.read_table(path))
+        for column in self.schema.columns:
+            array = table[column.name]
+            mask = array.is_null().to_numpy(zero_copy_only=False)
+            if column.type == 'list':
+                values = numpy.array([value or [] for value in array.to_pylist()] + [None], dtype=object)[:-1]
+            else:
+                values = _numpy_column(column, array.to_pylist())[0]
+            columns[column.name] = numpy.ma.MaskedArray(values, mask=mask)
+        return columns
+
+    def load(self) -> Dict[str, numpy.ma.MaskedArray]:
+        """
+        Return the typed columns of all the ingested rows: {column name: masked array} (missing values being masked,
+        dates being datetime64[D] and lists being object arrays of lists of strings)
+        """
+        parts = [self._read_part(path) for path in self._parts()]
+        if not parts:
+            return {column.name: numpy.ma.MaskedArray(_numpy_column(column, [])[0]) for column in self.schema.columns}
+        return {column.name: numpy.ma.concatenate([part[column.name] for part in parts])
+                for column in self.schema.columns}
+
+    def load_dataframe(self):
+        """Return the ingested rows as a pandas DataFrame (missing values being NA, int and bool columns using the
+        pandas nullable dtypes)"""
+        import pandas
+        nullable_dtypes = {'int': 'Int64', 'bool': 'boolean'}
+        series = {}
+        for column, (name, values) in zip(self.schema.columns, self.load().items()):
+            mask = numpy.ma.getmaskarray(values)
+            if column.type in nullable_dtypes:
+                array = pandas.array(values.data, dtype=nullable_dtypes[column.type])
+                array[mask] = pandas.NA
+                series[name] = pandas.Series(array)
+            else:
+                series[name] = pandas.Series(values.data).where(~mask)
+        return pandas.DataFrame(series)
+
+
+class IngestionReport:
+    def __init__(self, added_rows: int, errors: List[RowError], rebuilt: bool):
+        self.added_rows = added_rows
+        self.errors = errors
+        """Invalid rows, left out of the store"""
+        self.rebuilt = rebuilt
+        """Whether the already ingested rows changed, and were thus ingested again"""
+
+    def __str__(self):
+        lines = ["{} rows added{}, {} invalid rows".format(self.added_rows, " (store rebuilt)" if self.rebuilt else "",
+                                                           len(self.errors))]
+        for error in self.errors:
+            lines.append("  line {}: {} ({} = {!r})".format(error.line, error.message, error.column, error.value))
+        return "\n".join(lines)
+
+
+def default_store(name: str, file_format: Optional[str] = None) -> ColumnarStore:
+    """Return the store of one of the CSV files of the data directory (see SCHEMAS)"""
+    return ColumnarStore(os.path.join(STORE_DIRECTORY, name), SCHEMAS[name], file_format)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingest the experiment CSV files into columnar stores")
+    parser.add_argument('names', nargs='*', default=list(SCHEMAS), help="CSV files to ingest (default to all)")
+    parser.add_argument('-f', '--format', choices=FORMATS, default=None,
+                        help="format of the part files (default to parquet if pyarrow is installed, else npz)")
+    arguments = parser.parse_args()
+    for name in arguments.names:
+        store = default_store(name, arguments.format)
+        print("{}: {}".format(name, store.ingest(os.path.join(DATA_DIRECTORY, name + ".csv"))))
@@ -25,7 +25,7 @@ from modulefinder import Module
 from typing import Type, Callable, Union, Any, Dict, Optional
 
 from dash import dash
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 from dash.development.base_component import Component as DashComponent
 import dash_core_components as dcc
 
@@ -182,25 +182,54 @@ def build_language_selector(id="language_selector", persistence=True) -> dcc.Dro
         )
 
 
+_LANGUAGE_CALLBACK_JS = """
+function(language_name, catalog) {
+    return catalog[language_name];
+}
+"""
+"""Clientside language callback: just pick the translations of the selected language in the catalog"""
+
+
+def build_translation_catalog(translatable_components: TranslatableComponentRegister) -> Dict[str, list]:
+    """
+    Return the translations of every registered component, as a JSON serializable dict {language name: [translations
+    in the order of translatable_components]}
+    """
+    return {
+        language.name: [translatable_string.translated_into(language)
+                        for _, _, translatable_string in translatable_components.values()]
+        for language in Language
+        }
+
+
 def setup_language_callback(
         app: dash.Dash,
         translatable_components: TranslatableComponentRegister,
-        language_selector_id="language_selector"):
+        language_selector_id="language_selector",
+        catalog_id="translation_catalog") -> dcc.Store:
+    """
+    Build the callback translating all the registered components when the language selector changes.
+
+    Translations are sent once with the page in a dcc.Store, and language switching runs in the browser (clientside
+    callback), so it doesn't cost any request to the server.
 
+    :param app: the main dash application
+    :param translatable_components: the register of all the translatable components
+    :param language_selector_id: id of the language selector component
+    :param catalog_id: id of the dcc.Store holding the translation catalog
+    :return: the dcc.Store holding the translation catalog, it must be inserted in the application layout
+    """
     assert not translatable_components.callback_built, "Error: language callback can only be built once"
 
-    @app.callback(
-        output=[Output(id, target_attr) for id, target_attr, _ in translatable_components.values()],
-        inputs=[Input('language_selector', 'value')],
+    app.clientside_callback(
+        _LANGUAGE_CALLBACK_JS,
+        [Output(id, target_attr) for id, target_attr, _ in translatable_components.values()],
+        [Input(language_selector_id, 'value')],
+        [State(catalog_id, 'data')],
         )
-    def language_callback(language_name: str):
-        selected_language = Language.__members__[language_name]
-        return [translatable_string.translated_into(selected_language)
-                for _, _, translatable_string in translatable_components.values()]
 
     # Flag the TranslatableComponentRegister to indicated that the language callback has been built already and
     # forbid new translation registration
     translatable_components.callback_built = True
 
-    return language_callback
-
+    return dcc.Store(id=catalog_id, data=build_translation_catalog(translatable_components))
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy
+
+from common.armor import armor_reduction, armor_table, armor_value
+
+
+class ArmorTestCase(unittest.TestCase):
+    def test_measured_levels(self):
+        for level, value in armor_table.items():
+            with self.subTest(level=level):
+                self.assertAlmostEqual(armor_value(level), value)
+                self.assertAlmostEqual(armor_reduction(level), (100 - value) / 100)
+
+    def test_fractional_levels(self):
+        levels = sorted(armor_table)
+        for lower_level, upper_level in zip(levels, levels[1:]):
+            level = (lower_level + upper_level) / 2
+            with self.subTest(level=level):
+                self.assertLess(armor_table[lower_level], armor_value(level))
+                self.assertLess(armor_value(level), armor_table[upper_level])
+
+    def test_negative_levels(self):
+        # Armor piercing greater than the armor: no reduction
+        self.assertEqual(armor_value(-2), 0.)
+        self.assertEqual(armor_reduction(-2), 1.)
+        self.assertEqual(armor_reduction(-0.5), 1.)
+
+    def test_continuity_at_last_measured_level(self):
+        # Beyond the last measured level the fitted formula is used without correction
+        last_level = max(armor_table)
+        self.assertAlmostEqual(armor_value(last_level - 1e-9), armor_value(last_level + 1e-9), places=6)
+        self.assertLess(armor_value(last_level), armor_value(last_level + 1))
+
+    def test_shapes(self):
+        levels = numpy.array([[0, 1.5, 10], [-1, 12, 4]])
+        reductions = armor_reduction(levels)
+        self.assertEqual(reductions.shape, levels.shape)
+        for index in numpy.ndindex(levels.shape):
+            with self.subTest(level=levels[index]):
+                self.assertAlmostEqual(reductions[index], armor_reduction(float(levels[index])))
+        numpy.testing.assert_allclose(armor_reduction([0, 1.5, 10]), reductions[0])
+        self.assertIsInstance(armor_reduction(3), float)
+        self.assertIsInstance(armor_reduction(numpy.float64(3)), float)
+        self.assertIsInstance(armor_reduction(numpy.array(3.)), float)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import math
+import unittest
+
+import numpy
+
+from common.rarity import Rarity
+from common.resources import Resources
+from economy.budget_simulator.card_collection import CardCollectionModel, chest_copies_distribution
+from economy.budget_simulator.time_series import BudgetTimeSeries
+from economy.chests import GoldenChest
+from economy.gains.abstract_gains import Days
+
+
+def time_series(weekly_flows, resource_type=Rarity.Legendary, weeks=8):
+    """Build a time series repeating the given flows of a single resource type each week"""
+    daily_incomes = numpy.tile(numpy.array(weekly_flows, dtype=float), weeks).reshape(-1, 1, 1)
+    return BudgetTimeSeries(daily_incomes, [('test', None)], [resource_type])
+
+
+class CardCollectionTestCase(unittest.TestCase):
+    def test_constant_flow(self):
+        model = CardCollectionModel(time_series([1] * 7), Rarity.Legendary, max_copies=20)
+        for copies in range(21):
+            with self.subTest(copies=copies):
+                self.assertAlmostEqual(model.expected_days(copies), copies)
+                self.assertEqual(model.percentile(copies, 0.99), copies)
+        self.assertAlmostEqual(model.expected_days(10, owned=4), 6)
+
+    def test_negative_binomial(self):
+        # One card looted each day with probability p: the number of days follows a negative binomial distribution
+        p, copies = 0.3, 5
+        model = CardCollectionModel(time_series([p] * 7), Rarity.Legendary, max_copies=copies)
+        self.assertAlmostEqual(model.expected_days(copies), copies / p)
+        completion = model.completion_probabilities(copies)
+        for days in range(copies, 40):
+            with self.subTest(days=days):
+                self.assertAlmostEqual(completion[days] - completion[days - 1],
+                                       math.comb(days - 1, copies - 1) * p**copies * (1 - p)**(days - copies))
+
+    def test_weekly_cycle(self):
+        # A single card looted every Sunday
+        model = CardCollectionModel(time_series([0, 0, 0, 0, 0, 0, 1]), Rarity.Legendary, max_copies=3)
+        self.assertAlmostEqual(model.expected_days(1), 7)
+        self.assertAlmostEqual(model.expected_days(2, start_day=Days.Sunday), 8)
+        self.assertEqual(model.percentile(3, 0.5, start_day=Days.Saturday), 16)
+
+    def test_unreachable_target(self):
+        model = CardCollectionModel(time_series([2] * 7, Resources.Gold), Rarity.Legendary, max_copies=5)
+        self.assertEqual(model.expected_days(1), math.inf)
+        self.assertEqual(model.expected_days(0), 0)
+        self.assertIsNone(model.percentile(1, 0.5))
+
+    def test_chests(self):
+        # Unopened chests give the legendary cards of their card slots
+        model = CardCollectionModel(time_series([1] * 7, GoldenChest), Rarity.Legendary, max_copies=5)
+        distribution = chest_copies_distribution(GoldenChest, Rarity.Legendary)
+        self.assertAlmostEqual(model.daily_distributions[0].mean, distribution.mean)
+        self.assertAlmostEqual(model.expected_days(1), 1 / distribution.probability_at_least(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from economy.clan_boss_rewards import fit_goods_reward_model, predict_fight_goods, CLAN_BOSS_GOODS_FORMULA_A, \
+    CLAN_BOSS_GOODS_FORMULA_B
+from experiments.data.ingestion import ColumnarStore, CLAN_BOSS_LOOTS_SCHEMA, DATA_DIRECTORY
+
+
+class ClanBossRewardsTestCase(unittest.TestCase):
+    def test_fitted_constants(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ColumnarStore(directory, CLAN_BOSS_LOOTS_SCHEMA, 'npz')
+            store.ingest(os.path.join(DATA_DIRECTORY, "clan_boss_loots.csv"))
+            columns = store.load()
+        fit_result, valid = fit_goods_reward_model(columns['boss_kills'].data, columns['goods_reward'].data)
+        numpy.testing.assert_allclose(fit_result.parameters, [CLAN_BOSS_GOODS_FORMULA_A, CLAN_BOSS_GOODS_FORMULA_B],
+                                      rtol=1e-6)
+        # Only the bugged replay records are rejected
+        rejected_dates = set(columns['date'].data[~valid].tolist())
+        self.assertEqual(rejected_dates, {datetime.date(2020, 4, 19)})
+
+    def test_vectorized_prediction(self):
+        kills = numpy.arange(0, 200)
+        numpy.testing.assert_array_equal(predict_fight_goods(kills), [predict_fight_goods(int(k)) for k in kills])
+
+
+if __name__ == '__main__':
+    unittest.main()
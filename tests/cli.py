@@ -0,0 +1,47 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from economy.budget_simulator.cli import main
+
+
+class CliParameterFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def parameter_file(self, content) -> str:
+        path = os.path.join(self.directory.name, "parameters.json")
+        with open(path, 'w') as parameter_file:
+            json.dump(content, parameter_file)
+        return path
+
+    def assert_usage_error(self, *args):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as context:
+            main(list(args))
+        self.assertNotEqual(context.exception.code, 0)
+        self.assertIn("error:", stderr.getvalue())
+
+    def test_missing_file(self):
+        self.assert_usage_error(os.path.join(self.directory.name, "missing.json"))
+
+    def test_invalid_content(self):
+        for content in (42, "vip", {'points': 3}, {'unknown_parameter': 1}):
+            with self.subTest(content=content):
+                self.assert_usage_error(self.parameter_file(content))
+
+    def test_valid_file(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main([self.parameter_file({'base': {'vip': 'lvl10'}, 'points': [{}, {'hq_lvl': 18}]}), '--format', 'json'])
+        self.assertEqual(len(json.loads(stdout.getvalue())['incomes']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORBIDDEN_PACKAGES = ('dash', 'dash_core_components', 'dash_html_components', 'dash_bootstrap_components', 'plotly',
+                      'flask')
+"""Web application packages the command line simulator must never import"""
+
+CLI_IMPORT_BUDGET = 1.
+"""Maximal time in seconds to import the command line simulator"""
+
+
+def run_python(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable] + list(args), cwd=PROJECT_ROOT, capture_output=True, text=True,
+                          timeout=120)
+
+
+class CliStartupTestCase(unittest.TestCase):
+    def test_no_web_dependencies(self):
+        process = run_python("-c", "import sys, json, economy.budget_simulator.cli; "
+                                   "print(json.dumps(sorted(sys.modules)))")
+        self.assertEqual(process.returncode, 0, process.stderr)
+        imported_packages = {module.split('.')[0] for module in json.loads(process.stdout.splitlines()[-1])}
+        for package in FORBIDDEN_PACKAGES:
+            with self.subTest(package=package):
+                self.assertNotIn(package, imported_packages)
+
+    def test_import_time(self):
+        process = run_python("-X", "importtime", "-c", "import economy.budget_simulator.cli")
+        self.assertEqual(process.returncode, 0, process.stderr)
+        # Lines are "import time: self [us] | cumulative | imported package"
+        cumulative_times = {line.split('|')[2].strip(): int(line.split('|')[1])
+                            for line in process.stderr.splitlines() if line.startswith("import time:")
+                            and not line.split('|')[1].strip().startswith('cumulative')}
+        import_time = cumulative_times['economy.budget_simulator.cli'] / 10**6
+        self.assertLess(import_time, CLI_IMPORT_BUDGET,
+                        "Importing the command line simulator took {:.2f}s".format(import_time))
+
+    def test_run(self):
+        process = run_python("-m", "economy.budget_simulator.cli", "--set", "vip=lvl10", "--format", "json")
+        self.assertEqual(process.returncode, 0, process.stderr)
+        result = json.loads(process.stdout)
+        self.assertEqual(result['points'][0]['vip'], 'lvl10')
+        self.assertIn('Resources.Gold', result['resources'])
+        self.assertEqual(len(result['incomes'][0]), len(result['gains']))
+
+    def test_invalid_point(self):
+        # More convoys lost than convoys sent
+        process = run_python("-m", "economy.budget_simulator.cli", "--set", "defense_lost=1000")
+        self.assertNotEqual(process.returncode, 0)
+        self.assertNotIn("Traceback", process.stderr)
+        self.assertIn("error: point 0", process.stderr)
+        self.assertIn("not compatible", process.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import math
+import unittest
+
+import numpy
+
+from buildings.headquarters import HQ
+from common.cards import MAX_LEVEL
+from common.resources import ResourcePacket, Resources
+from economy.cost_models import CostModel, cost_matrix, round_significant
+
+
+def geometric_costs(scale, known_levels, holes=()):
+    """Upgrade costs doubling at each level, None for the holes"""
+    return [None if level in holes else ResourcePacket(Resources.Gold(-scale * 2 ** level))
+            for level in range(known_levels)]
+
+
+class Tower:
+    upgrade_costs = geometric_costs(1000, 15)
+
+
+class Vehicle:
+    upgrade_costs = geometric_costs(3000, 15)
+
+
+class Guardian:
+    upgrade_costs = geometric_costs(500, 10, holes=(5,))
+
+
+class Building:
+    upgrade_costs = [None,
+                     ResourcePacket(Resources.Gold(-100)),
+                     ResourcePacket(Resources.Gold(-200), Resources.Goods(-50)),
+                     ResourcePacket()]
+
+
+class CostMatrixTestCase(unittest.TestCase):
+    def test_missing_values(self):
+        series, costs, missing = cost_matrix([Building])
+        self.assertEqual(series, [(Building, Resources.Gold), (Building, Resources.Goods)])
+        self.assertEqual(costs.shape, (2, MAX_LEVEL))
+        numpy.testing.assert_array_equal(costs[:, :4], [[numpy.nan, 100, 200, numpy.nan],
+                                                        [numpy.nan, numpy.nan, 50, numpy.nan]])
+        self.assertTrue(numpy.isnan(costs[:, 4:]).all())
+        # Free upgrades are not missing, unlike the None entries and the levels not filled yet
+        expected_missing = [True, False, False, False] + [True] * (MAX_LEVEL - 4)
+        numpy.testing.assert_array_equal(missing, [expected_missing, expected_missing])
+
+
+class CostModelTestCase(unittest.TestCase):
+    def test_predict_known_levels(self):
+        model = CostModel.fit([Tower, Vehicle, Guardian])
+        self.assertEqual(len(model.clusters), 1)
+        for upgradable in (Tower, Vehicle, Guardian):
+            series, costs, missing = cost_matrix([upgradable])
+            known = ~numpy.isnan(costs[0])
+            with self.subTest(upgradable=upgradable.__name__):
+                predictions, lower_bounds, upper_bounds = model.predict(upgradable, Resources.Gold)
+                numpy.testing.assert_allclose(predictions[known], costs[0][known], rtol=1e-6)
+                self.assertTrue((lower_bounds[known] < predictions[known]).all())
+                self.assertTrue((upper_bounds[known] > predictions[known]).all())
+        self.assertEqual(model.outliers(), [])
+
+    def test_predict_recorded_costs(self):
+        model = CostModel.fit()
+        costs = model.costs[(HQ, Resources.Gold)]
+        known = numpy.nonzero(~numpy.isnan(costs))[0]
+        predictions, lower_bounds, upper_bounds = model.predict(HQ, Resources.Gold, known)
+        # Recorded costs are rounded by the game, which is the only error left
+        numpy.testing.assert_allclose(predictions, costs[known], rtol=0.1)
+        self.assertTrue(((lower_bounds <= costs[known]) & (costs[known] <= upper_bounds)).all())
+
+    def test_completed_upgrade_costs(self):
+        model = CostModel.fit([Tower, Vehicle, Guardian])
+        completed_costs = model.completed_upgrade_costs(Guardian)
+        self.assertEqual(len(completed_costs), MAX_LEVEL)
+        for level, packet in enumerate(Guardian.upgrade_costs):
+            if packet is not None:
+                with self.subTest(level=level):
+                    self.assertIs(completed_costs[level], packet)
+        # Missing levels are predicted, rounded like the game does
+        for level in [5] + list(range(10, 15)):
+            with self.subTest(level=level):
+                self.assertEqual(completed_costs[level][Resources.Gold], -round_significant(500 * 2 ** level))
+        # No series knows the last levels, they can't be predicted
+        self.assertEqual(completed_costs[15:], [None] * (MAX_LEVEL - 15))
+
+    def test_round_significant(self):
+        self.assertEqual(round_significant(8192000), 8190000)
+        self.assertEqual(round_significant(math.pi * 100, 2), 310)
+        self.assertEqual(round_significant(0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+import numpy
+
+from utils.curve_fitting import FitResult, fit_curve, gauss_newton, grid_search, student_t_quantile
+
+
+def log_model(x, a, b):
+    return a * numpy.log(b * x + 1)
+
+
+XS = numpy.linspace(0, 10, 21)
+YS = log_model(XS, 24., 0.3)
+
+
+class CurveFittingTestCase(unittest.TestCase):
+    def test_grid_search(self):
+        grids = [numpy.linspace(10, 40, 31), numpy.linspace(0.1, 1, 10)]
+        parameters, rss = grid_search(log_model, XS, YS, grids)
+        numpy.testing.assert_allclose(parameters, [24., 0.3])
+        self.assertAlmostEqual(rss, 0.)
+        # Same result when the grid is split in chunks
+        with mock.patch('utils.curve_fitting.GRID_SEARCH_MEMORY', 100):
+            chunked_parameters, chunked_rss = grid_search(log_model, XS, YS, grids)
+        numpy.testing.assert_array_equal(chunked_parameters, parameters)
+        self.assertEqual(chunked_rss, rss)
+
+    def test_gauss_newton(self):
+        parameters, iterations = gauss_newton(log_model, XS, YS, [20., 0.35])
+        numpy.testing.assert_allclose(parameters, [24., 0.3], rtol=1e-8)
+        self.assertGreater(iterations, 1)
+
+    def test_student_t_quantile(self):
+        for degrees_of_freedom, quantile in ((1, 12.706), (5, 2.571), (30, 2.042)):
+            with self.subTest(degrees_of_freedom=degrees_of_freedom):
+                self.assertAlmostEqual(student_t_quantile(0.975, degrees_of_freedom), quantile, places=3)
+
+    def test_confidence_intervals(self):
+        noisy_ys = YS + numpy.random.default_rng(0).normal(0, 0.1, len(XS))
+        result = fit_curve(log_model, XS, noisy_ys, [numpy.linspace(10, 40, 31), numpy.linspace(0.1, 1, 10)],
+                           parameter_names=['a', 'b'])
+        self.assertEqual(result.degrees_of_freedom, len(XS) - 2)
+        self.assertEqual(result.covariance.shape, (2, 2))
+        self.assertEqual(result.standard_errors.shape, (2,))
+        self.assertEqual(result.confidence_intervals.shape, (2, 2))
+        for k, (lower, upper) in enumerate(result.confidence_intervals):
+            with self.subTest(parameter=result.parameter_names[k]):
+                self.assertLess(lower, result.parameters[k])
+                self.assertLess(result.parameters[k], upper)
+                self.assertAlmostEqual((upper - lower) / 2, student_t_quantile(0.975, result.degrees_of_freedom)
+                                       * result.standard_errors[k])
+                self.assertLess(lower, [24., 0.3][k])
+                self.assertLess([24., 0.3][k], upper)
+        # Without any degree of freedom, there is no interval
+        exact_result = FitResult(log_model, ['a', 'b'], numpy.array([24., 0.3]), XS[:2], YS[:2])
+        self.assertIsNone(exact_result.confidence_intervals)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+import pandas
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from experiments.data.ingestion import ColumnarStore, AMBUSH_LOOTS_SCHEMA, CLAN_BOSS_LOOTS_SCHEMA, DATA_DIRECTORY
+
+
+class IngestionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.directory, "clan_boss_loots.csv")
+        shutil.copy(os.path.join(DATA_DIRECTORY, "clan_boss_loots.csv"), self.csv_path)
+        self.store = ColumnarStore(os.path.join(self.directory, "store"), CLAN_BOSS_LOOTS_SCHEMA, 'npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_incremental_ingestion(self):
+        first_report = self.store.ingest(self.csv_path)
+        self.assertGreater(first_report.added_rows, 0)
+        self.assertEqual(first_report.errors, [])
+        self.assertEqual(self.store.ingest(self.csv_path).added_rows, 0)
+
+        with open(self.csv_path, 'a') as file:
+            file.write("\n01/01/2021,12,1440000\n01/01/2021,abc,1\n")
+        report = self.store.ingest(self.csv_path)
+        self.assertEqual(report.added_rows, 1)
+        self.assertFalse(report.rebuilt)
+        self.assertEqual([(error.column, error.value) for error in report.errors], [('boss_kills', 'abc')])
+
+        columns = self.store.load()
+        self.assertEqual(len(columns['date']), first_report.added_rows + 1)
+        self.assertEqual(columns['date'][-1], datetime.date(2021, 1, 1))
+        self.assertEqual(columns['boss_kills'][-1], 12)
+
+    def test_edited_rows(self):
+        first_report = self.store.ingest(self.csv_path)
+        with open(self.csv_path) as file:
+            content = file.read()
+        with open(self.csv_path, 'w') as file:
+            file.write(content.replace("13/03/2020,143,", "13/03/2020,144,", 1))
+        report = self.store.ingest(self.csv_path)
+        self.assertTrue(report.rebuilt)
+        self.assertEqual(report.added_rows, first_report.added_rows)
+        self.assertEqual(self.store.load()['boss_kills'][0], 144)
+
+    def test_ambush_loots(self):
+        store = ColumnarStore(os.path.join(self.directory, "ambush_store"), AMBUSH_LOOTS_SCHEMA, 'npz')
+        store.ingest(os.path.join(DATA_DIRECTORY, "ambush_loots.csv"))
+        columns = store.load()
+        self.assertTrue(columns['gems'].mask[0])
+        self.assertEqual(columns['gems'][1], 25)
+        self.assertIn(['Epic'], columns['cards'].compressed().tolist())
+
+    def test_card_event_rows(self):
+        # Rows recorded without the bandit_shield field hold the only legendary drops
+        store = ColumnarStore(os.path.join(self.directory, "ambush_store"), AMBUSH_LOOTS_SCHEMA, 'npz')
+        report = store.ingest(os.path.join(DATA_DIRECTORY, "ambush_loots.csv"))
+        self.assertEqual(report.errors, [])
+        columns = store.load()
+        legendary_rows = [k for k, cards in enumerate(columns['cards'].filled(None)) if cards == ['Legendary']]
+        self.assertEqual(len(legendary_rows), 2)
+        last_row = legendary_rows[-1]
+        self.assertEqual((columns['day'][last_row], columns['id'][last_row]), (datetime.date(2020, 8, 6), 32))
+        self.assertFalse(columns['is_bot'][last_row])
+        self.assertTrue(columns['bandit_shield'].mask[last_row])
+        # Comments are still gathered in their column
+        row = AMBUSH_LOOTS_SCHEMA.parse_row(1, "20/06/2020,31,,,,,,, epic, 21/06/2020:01:57:00FR".split(","))
+        self.assertEqual((row['bandit_shield'], row['cards'], row['comments']), (None, ['Epic'], "21/06/2020:01:57:00FR"))
+
+    def test_incremental_line_numbers(self):
+        self.store.ingest(self.csv_path)
+        with open(self.csv_path) as file:
+            line_count = len(file.read().splitlines())
+        with open(self.csv_path, 'a') as file:
+            file.write("\n01/01/2021,abc,1\n")
+        report = self.store.ingest(self.csv_path)
+        self.assertEqual([error.line for error in report.errors], [line_count + 2])
+
+    def test_dataframe_dtypes(self):
+        store = ColumnarStore(os.path.join(self.directory, "ambush_store"), AMBUSH_LOOTS_SCHEMA, 'npz')
+        store.ingest(os.path.join(DATA_DIRECTORY, "ambush_loots.csv"))
+        dataframe = store.load_dataframe()
+        self.assertEqual(str(dataframe['gems'].dtype), 'Int64')
+        self.assertEqual(str(dataframe['bandit_shield'].dtype), 'boolean')
+        self.assertTrue(pandas.isna(dataframe['gems'][0]))
+        self.assertEqual(dataframe['gems'][1], 25)
+        self.assertEqual(len(dataframe), len(store.load()['day']))
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_arrow_formats(self):
+        csv_path = os.path.join(DATA_DIRECTORY, "ambush_loots.csv")
+        npz_store = ColumnarStore(os.path.join(self.directory, "npz_store"), AMBUSH_LOOTS_SCHEMA, 'npz')
+        npz_store.ingest(csv_path)
+        expected = npz_store.load()
+        for file_format in ('parquet', 'feather'):
+            with self.subTest(file_format=file_format):
+                store = ColumnarStore(os.path.join(self.directory, file_format + "_store"), AMBUSH_LOOTS_SCHEMA,
+                                      file_format)
+                store.ingest(csv_path)
+                columns = store.load()
+                self.assertEqual(set(columns), set(expected))
+                # Date and list columns included, with their missing values
+                for name in columns:
+                    numpy.testing.assert_array_equal(columns[name].mask, expected[name].mask, name)
+                    self.assertEqual(columns[name].compressed().tolist(), expected[name].compressed().tolist(), name)
+                self.assertEqual(columns['day'].dtype, expected['day'].dtype)
+
+
+if __name__ == '__main__':
+    unittest.main()
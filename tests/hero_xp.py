@@ -0,0 +1,32 @@
+import unittest
+
+from common.resources import ResourcePacket
+from economy.hero_xp_model import HeroXpModel, recorded_xp_costs
+from units.heroes import Zora
+
+
+class HeroXpTestCase(unittest.TestCase):
+    def test_cumulative_upgrade_cost(self):
+        for from_level, to_level in [(0, 0), (0, 1), (9, 10), (10, 11), (5, 57), (0, len(Zora._xp_costs))]:
+            with self.subTest(from_level=from_level, to_level=to_level):
+                expected_costs = ResourcePacket()
+                for level in range(from_level, to_level):
+                    expected_costs = expected_costs + Zora.upgrade_costs[level]
+                cumulative_costs = Zora.cumulative_upgrade_cost(from_level, to_level)
+                self.assertDictEqual({resource: quantity for resource, quantity in expected_costs.items() if quantity},
+                                     {resource: quantity for resource, quantity in cumulative_costs.items()
+                                      if quantity})
+
+    def test_xp_model(self):
+        model = HeroXpModel.fit()
+        costs = recorded_xp_costs()
+        # The rounding of the game is the only error left
+        self.assertLessEqual(abs(model.predict(len(costs)) - costs[-1]), 1)
+        self.assertIn(40, model.regime_edges)
+        self.assertIn(50, model.regime_edges)
+        self.assertIn(60, model.regime_edges)
+        self.assertEqual(model.completed_xp_costs(len(Zora._xp_costs)), Zora._xp_costs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = ('common.resources', 'common.armor', 'common.cards', 'units.base_units', 'units.towers',
+                'units.vehicles', 'units.guardians', 'units.heroes', 'units.bandits', 'units.equipments', 'units.modules',
+                'buildings.buildings', 'buildings.headquarters', 'spells.attack_spells', 'spells.defense_spells',
+                'economy.gains')
+"""Modules of the core packages, imported by every other part of the project"""
+
+HEAVY_PACKAGES = ('matplotlib', 'pandas')
+"""Analysis packages the core modules must only import when they are actually used"""
+
+CORE_IMPORT_BUDGET = 0.5
+"""Maximal time in seconds to import all the core modules"""
+
+
+def import_times(modules) -> (float, dict, list):
+    """
+    Import the modules in a new interpreter.
+
+    :return: (total import time in seconds, {module: cumulative import time in seconds} for every module imported,
+        sorted list of the modules loaded)
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                              "import sys, json; {}; print(json.dumps(sorted(sys.modules)))".format(
+                                  "; ".join("import " + module for module in modules))],
+                             cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120)
+    assert process.returncode == 0, process.stderr
+    # Lines are "import time: self [us] | cumulative | imported package", the package name being indented by its depth
+    lines = [line.split('|') for line in process.stderr.splitlines() if line.startswith("import time:")
+             and not line.split('|')[1].strip().startswith('cumulative')]
+    cumulative_times = {name.strip(): int(cumulative) / 10**6 for _, cumulative, name in lines}
+    total_time = sum(int(cumulative) / 10**6 for _, cumulative, name in lines if not name[1:].startswith(' '))
+    return total_time, cumulative_times, json.loads(process.stdout.splitlines()[-1])
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.total_time, cls.cumulative_times, cls.loaded_modules = import_times(CORE_MODULES)
+
+    def test_no_heavy_packages(self):
+        loaded_packages = {module.split('.')[0] for module in self.loaded_modules}
+        for package in HEAVY_PACKAGES:
+            with self.subTest(package=package):
+                self.assertNotIn(package, loaded_packages)
+
+    def test_import_time(self):
+        slowest_modules = sorted(CORE_MODULES, key=lambda module: -self.cumulative_times.get(module, 0))[:3]
+        self.assertLess(self.total_time, CORE_IMPORT_BUDGET,
+                        "Importing the core modules took {:.2f}s (slowest: {})".format(
+                            self.total_time,
+                            ", ".join("{} {:.2f}s".format(module, self.cumulative_times.get(module, 0))
+                                      for module in slowest_modules)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import math
+import unittest
+
+import numpy
+
+from common.leagues import Rank
+from common.rarity import Rarity
+from economy.chests import ALL_CHESTS, GoldenChest, WoodenChest, chests_loot_distributions
+from utils.discrete_distribution import DiscreteDistribution
+
+
+class DiscreteDistributionTestCase(unittest.TestCase):
+    def test_binomial(self):
+        distribution = DiscreteDistribution.binomial(10, 0.3)
+        for k in range(11):
+            with self.subTest(k=k):
+                self.assertAlmostEqual(distribution.probability(k), math.comb(10, k) * 0.3**k * 0.7**(10 - k))
+        self.assertAlmostEqual(distribution.mean, 3)
+        self.assertAlmostEqual(distribution.variance, 2.1)
+
+    def test_binomial_tails(self):
+        # Far in the tails the probabilities are much smaller than the rounding errors of the biggest ones
+        trials, probability = 100000, 0.001
+        distribution = DiscreteDistribution.binomial(trials, probability)
+        for k in range(0, 400):
+            exact = math.exp(math.lgamma(trials + 1) - math.lgamma(k + 1) - math.lgamma(trials - k + 1)
+                             + k * math.log(probability) + (trials - k) * math.log1p(-probability))
+            with self.subTest(k=k):
+                # Relative accuracy down to the negligible probabilities
+                self.assertAlmostEqual(distribution.probability(k), exact, delta=1e-3 * exact + 1e-15)
+        # Exactly 8.9e-19
+        self.assertLess(distribution.probability_at_least(200), 1e-14)
+
+    def test_fft_convolution(self):
+        # Big enough to be computed through FFT, must give the same result as direct convolutions
+        distribution = DiscreteDistribution.from_dict({0: 0.5, 1: 0.2, 3: 0.3})
+        fft_power = distribution.convolution_power(400)
+        direct_power = DiscreteDistribution([1.])
+        for _ in range(400):
+            direct_power = direct_power + distribution
+        self.assertEqual(fft_power.percentile(0.5), direct_power.percentile(0.5))
+        values = numpy.arange(0, 1201)
+        numpy.testing.assert_allclose([fft_power.probability(value) for value in values],
+                                      [direct_power.probability(value) for value in values], atol=1e-12)
+
+    def test_compound(self):
+        # Keeping each of Binomial(n, p) items with probability q gives Binomial(n, p * q)
+        thinned = DiscreteDistribution.binomial(10, 0.3).compound(DiscreteDistribution.bernoulli(0.5))
+        expected = DiscreteDistribution.binomial(10, 0.15)
+        for k in range(11):
+            with self.subTest(k=k):
+                self.assertAlmostEqual(thinned.probability(k), expected.probability(k))
+        # A constant number of summands is a convolution power
+        summand = DiscreteDistribution([0.2, 0.5, 0.3], offset=1)
+        compound = DiscreteDistribution.point_mass(3).compound(summand)
+        self.assertEqual(compound.offset, 3)
+        numpy.testing.assert_allclose(compound.probabilities, summand.convolution_power(3).probabilities)
+
+    def test_queries(self):
+        distribution = DiscreteDistribution.from_dict({2: 0.25, 3: 0.5, 5: 0.25})
+        self.assertEqual(distribution.percentile(0.), 2)
+        self.assertEqual(distribution.percentile(0.25), 2)
+        self.assertEqual(distribution.percentile(0.5), 3)
+        self.assertEqual(distribution.percentile(1.), 5)
+        self.assertAlmostEqual(distribution.probability_at_least(3), 0.75)
+        self.assertAlmostEqual(distribution.probability_at_least(6), 0.)
+        self.assertAlmostEqual(distribution.cdf(4), 0.75)
+
+
+class ChestLootDistributionTestCase(unittest.TestCase):
+    def test_average_loot(self):
+        for chest_type in ALL_CHESTS:
+            average_loot = chest_type.average_loot(Rank.Camel1)
+            for loot_type, distribution in chest_type.loot_distributions(Rank.Camel1).items():
+                if loot_type in average_loot:
+                    with self.subTest(chest=chest_type.__name__, loot=str(loot_type)):
+                        self.assertAlmostEqual(distribution.mean, average_loot[loot_type])
+
+    def test_several_chests(self):
+        distributions = chests_loot_distributions({GoldenChest: 10, WoodenChest: 3})
+        self.assertAlmostEqual(distributions[Rarity.Legendary].probability_at_least(1), 1 - 0.93**10)
+        self.assertAlmostEqual(distributions[Rarity.Rare].mean,
+                               10 * GoldenChest.average_loot()[Rarity.Rare] + 3 * WoodenChest.average_loot()[Rarity.Rare])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import math
+import unittest
+
+from common.rarity import Rarity
+from economy.chests import GoldenChest, RecycleChest
+from economy.loot_estimation import LootEstimate, MIN_RANK_RECORDS, recorded_loots
+from spells.common_spell import Spell
+
+
+class LootEstimationTestCase(unittest.TestCase):
+    def test_card_averages(self):
+        loots = [loot for loot in recorded_loots()[GoldenChest] if loot.cards is not None]
+        estimate = LootEstimate.fit(GoldenChest, loots, iterations=200, workers=1, seed=0)
+        card_number = sum(len(loot.cards) for loot in loots)
+        legendary_number = sum(card.rarity is Rarity.Legendary for loot in loots for card in loot.cards)
+        self.assertAlmostEqual(estimate.card_averages[Rarity.Legendary].value, legendary_number / card_number * 8)
+        self.assertAlmostEqual(sum(estimate.card_averages[rarity].value for rarity in Rarity
+                                   if rarity in estimate.card_averages), 8)
+        for card_type, (value, lower, upper) in estimate.card_averages.items():
+            with self.subTest(card_type=card_type):
+                self.assertLessEqual(lower, value)
+                self.assertLessEqual(value, upper)
+
+    def test_parallel_bootstrap(self):
+        estimate = LootEstimate.fit(RecycleChest, recorded_loots()[RecycleChest], iterations=400, workers=2, seed=1)
+        self.assertEqual(estimate.average_loot_candidate()[Spell], 3)
+        value, lower, upper = estimate.gold_multipliers[None]
+        self.assertLess(lower, value)
+        self.assertLess(value, upper)
+        same_estimate = LootEstimate.fit(RecycleChest, recorded_loots()[RecycleChest], iterations=400, workers=2, seed=1)
+        self.assertEqual(estimate.gold_multipliers, same_estimate.gold_multipliers)
+
+    def test_rank_multipliers(self):
+        loots = recorded_loots()[RecycleChest]
+        estimate = LootEstimate.fit(RecycleChest, loots, iterations=200, workers=1, seed=0)
+        self.assertEqual(estimate.rank_record_numbers[None], len(loots))
+        for rank, (value, lower, upper) in estimate.gold_multipliers.items():
+            record_number = estimate.rank_record_numbers[rank]
+            with self.subTest(rank=rank):
+                self.assertEqual(record_number, len(loots) if rank is None else
+                                 sum(loot.ligue is rank for loot in loots))
+                # A single record can't give any confidence interval
+                self.assertEqual(math.isnan(lower) and math.isnan(upper), record_number < MIN_RANK_RECORDS)
+                self.assertFalse(math.isnan(value))
+        self.assertIn("(all ranks, {} records)".format(len(loots)), estimate.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
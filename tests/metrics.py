@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest import mock
+
+import flask
+
+from economy.budget_simulator.api import register_metrics
+from utils.metrics import MetricsRegistry
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry(buckets=(0.1, 1.))
+
+    def test_histogram_buckets(self):
+        for seconds in (0.05, 0.1, 0.5, 2.):
+            self.metrics.observe('update_income', seconds)
+        lines = self.metrics.render_prometheus().splitlines()
+        # Cumulative counts, bounds included in their bucket
+        for bound, count in (('0.1', 2), ('1.0', 3), ('+Inf', 4)):
+            with self.subTest(bound=bound):
+                self.assertIn('wins_stage_duration_seconds_bucket{{stage="update_income",le="{}"}} {}'
+                              .format(bound, count), lines)
+        self.assertIn('wins_stage_duration_seconds_count{stage="update_income"} 4', lines)
+        self.assertIn('wins_stage_duration_seconds_sum{stage="update_income"} 2.65', lines)
+
+    def test_label_escaping(self):
+        self.metrics.observe('update_func', 0.01, graph='a "quoted" \\ multiline\nname')
+        self.assertIn('wins_stage_duration_seconds_count'
+                      '{stage="update_func",graph="a \\"quoted\\" \\\\ multiline\\nname"} 1',
+                      self.metrics.render_prometheus().splitlines())
+
+    def test_cache_hit_ratios(self):
+        for _ in range(4):
+            self.metrics.increment('cache_lookups', cache='gain_income')
+        self.metrics.increment('cache_misses', cache='gain_income')
+        self.metrics.increment('cache_lookups', cache='snapshot')
+        self.assertEqual(self.metrics.cache_hit_ratios(), {'gain_income': 0.75, 'snapshot': 1.})
+        lines = self.metrics.render_prometheus().splitlines()
+        self.assertIn('wins_cache_lookups_total{cache="gain_income"} 4', lines)
+        self.assertIn('wins_cache_misses_total{cache="gain_income"} 1', lines)
+        self.assertIn('wins_cache_hit_ratio{cache="gain_income"} 0.75', lines)
+
+
+class ServerTimingTestCase(unittest.TestCase):
+    def client(self, metrics: MetricsRegistry):
+        server = flask.Flask(__name__)
+        register_metrics(server, metrics)
+
+        @server.route("/simulate")
+        def simulate():
+            with metrics.timer('update_income'):
+                pass
+            return "done"
+        return server.test_client()
+
+    def test_header(self):
+        for variable, expected in (('1', True), ('', False)):
+            with self.subTest(WINS_SERVER_TIMING=variable), \
+                    mock.patch.dict(os.environ, {'WINS_SERVER_TIMING': variable}):
+                response = self.client(MetricsRegistry()).get("/simulate")
+                self.assertEqual('Server-Timing' in response.headers, expected)
+                if expected:
+                    self.assertRegex(response.headers['Server-Timing'], r"^update_income;dur=\d+\.\d\d$")
+
+    def test_metrics_route(self):
+        metrics = MetricsRegistry()
+        client = self.client(metrics)
+        client.get("/simulate")
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('wins_stage_duration_seconds_count{stage="update_income"} 1', response.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
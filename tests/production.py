@@ -0,0 +1,59 @@
+import unittest
+
+import numpy
+
+from buildings.buildings import Mill, TransportStation
+from common.vip import VIP
+from economy.production import ALL_LEVELS, PRODUCTION_BUILDINGS, collection_intervals, day_production
+
+
+class ProductionTestCase(unittest.TestCase):
+    def test_collection_intervals(self):
+        numpy.testing.assert_array_equal(collection_intervals([20, 8]), [[12, 12]])
+        numpy.testing.assert_array_equal(collection_intervals([[6], None, [0, 6, 12]]),
+                                         [[24, 0, 0], [0, 0, 0], [6, 6, 12]])
+
+    def test_empty_schedules(self):
+        with self.assertRaises(AssertionError):
+            collection_intervals([])
+        with self.assertRaises(AssertionError):
+            day_production(Mill, [])
+        with self.assertRaises(AssertionError):
+            collection_intervals([[8], []])
+
+    def test_storage_cap(self):
+        schedules = [[0], [0, 12], [0, 4, 8, 12, 16, 20], None]
+        for building, spec in PRODUCTION_BUILDINGS.items():
+            for vip in (VIP.lvl0, VIP.lvl2, VIP.lvl6, VIP.lvl10, VIP.lvl12):
+                production = day_production(building, schedules, vip=vip)
+                self.assertEqual(production.collected.shape, (len(schedules), len(ALL_LEVELS)))
+                hourly_rates = day_production(building, None, vip=vip).produced / 24
+                storage_limits = numpy.array(building.storage_limits, dtype=float)[ALL_LEVELS] \
+                    * getattr(vip, spec.storage_effect)
+                for k, schedule in enumerate(schedules):
+                    with self.subTest(building=building.__name__, vip=vip, schedule=schedule):
+                        if schedule is None:
+                            expected = hourly_rates * 24
+                        else:
+                            expected = sum(numpy.minimum(hourly_rates * interval, storage_limits)
+                                           for interval in collection_intervals(schedule)[0])
+                        numpy.testing.assert_allclose(production.collected[k], expected)
+                        numpy.testing.assert_allclose(production.lost[k], hourly_rates * 24 - expected, atol=1e-9)
+
+    def test_vip_multipliers(self):
+        # A single collection per day collects a full storage
+        level = 10
+        base = day_production(Mill, [0], levels=level)
+        boosted = day_production(Mill, [0], vip=VIP.lvl12, levels=level)
+        self.assertAlmostEqual(base.collected, Mill.storage_limits[level])
+        self.assertAlmostEqual(boosted.collected, Mill.storage_limits[level] * VIP.lvl12.goods_storage)
+        self.assertAlmostEqual(boosted.produced, base.produced * VIP.lvl12.goods_production)
+        # Gold effects don't change the goods production
+        gold_boosted = day_production(Mill, [0], vip=VIP.lvl1, levels=level)
+        self.assertAlmostEqual(gold_boosted.produced, base.produced)
+        self.assertAlmostEqual(day_production(TransportStation, None, vip=VIP.lvl1, levels=level).produced,
+                               day_production(TransportStation, None, levels=level).produced * 1.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
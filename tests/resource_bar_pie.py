@@ -0,0 +1,66 @@
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from common.resources import ResourcePacket, ResourceQuantity, Resources
+from economy.budget_simulator.graphs import ResourceBarPie
+from economy.gains import GAINS_DICTIONARY
+from lang.languages import Language
+
+
+class ResourceBarPieTestCase(unittest.TestCase):
+    def setUp(self):
+        self.graph = ResourceBarPie(Resources.Gold, id="test_gold_plot")
+        self.gains = [gain for category in GAINS_DICTIONARY for gain in GAINS_DICTIONARY[category]][:10]
+
+    def incomes(self, seed: int):
+        """Build incomes unique to the seed, the gold income of the k-th gain is seed * 1000 + k"""
+        return {'test': {gain: ResourcePacket(ResourceQuantity(Resources.Gold, seed * 1000 + k))
+                         for k, gain in enumerate(self.gains)}}
+
+    def expected_values(self, seed: int):
+        return sorted([seed * 1000 + k for k in range(len(self.gains)) if seed * 1000 + k != 0], reverse=True)
+
+    def test_figure_content(self):
+        figure = self.graph.figures_updates(self.incomes(3), Language.ENGLISH, None)
+        bar, pie = figure['data']
+        self.assertEqual(bar['y'], self.expected_values(3))
+        self.assertEqual(pie['values'], self.expected_values(3))
+        self.assertEqual(bar['x'], pie['labels'])
+
+    def test_concurrent_updates(self):
+        seeds = list(range(-50, 50))
+
+        def update(seed):
+            return seed, self.graph.figures_updates(self.incomes(seed), Language.ENGLISH, None)
+
+        with ThreadPool(8) as pool:
+            results = pool.map(update, seeds * 4)
+
+        figures_ids = set()
+        for seed, figure in results:
+            with self.subTest(seed=seed):
+                bar, pie = figure['data']
+                self.assertEqual(bar['y'], self.expected_values(seed))
+                self.assertEqual(pie['values'], [abs(x) for x in self.expected_values(seed)])
+                figures_ids.add(id(figure['data']))
+        # Every request got its own figure
+        self.assertEqual(len(figures_ids), len(results))
+
+    def test_figures_share_nothing(self):
+        figure = self.graph.figures_updates(self.incomes(1), Language.ENGLISH, None)
+        figure['layout']['title'] = {'text': "Modified"}
+        figure['data'][0]['marker']['color'] = "#000000"
+        other_figure = self.graph.figures_updates(self.incomes(1), Language.ENGLISH, None)
+        self.assertNotIn('title', other_figure['layout'])
+        self.assertNotEqual(other_figure['data'][0]['marker']['color'], "#000000")
+        self.assertFalse(hasattr(self.graph, 'fig'))
+
+    def test_incomes_not_modified(self):
+        incomes = {'test': {gain: ResourcePacket(ResourceQuantity(Resources.Goods, 10)) for gain in self.gains}}
+        self.graph.figures_updates(incomes, Language.ENGLISH, None)
+        for packet in incomes['test'].values():
+            self.assertNotIn(Resources.Gold, packet)
+
+
+if __name__ == '__main__':
+    unittest.main()
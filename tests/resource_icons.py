@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import dash
+
+from common.resources import Resources
+from economy.budget_simulator.graphs import RESOURCE_ICONS_FOLDER, asset_manifest, resource_icons
+
+
+class UnlistedCard:
+    """A card type missing from the resource types known at startup"""
+
+
+class AssetManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.assets_directory = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.assets_directory.name, RESOURCE_ICONS_FOLDER))
+
+    def tearDown(self):
+        self.assets_directory.cleanup()
+
+    def write_icon(self, filename: str, content: bytes):
+        with open(os.path.join(self.assets_directory.name, RESOURCE_ICONS_FOLDER, filename), 'wb') as icon_file:
+            icon_file.write(content)
+
+    def new_app(self) -> dash.Dash:
+        # The manifest is scanned once per application
+        return dash.Dash(__name__, assets_folder=self.assets_directory.name)
+
+    def test_content_hash(self):
+        self.write_icon("Gold.png", b"first icon")
+        first_url = asset_manifest(self.new_app())[Resources.Gold]
+        self.assertRegex(first_url, r"/Gold\.png\?v=[0-9a-f]{10}$")
+        self.assertEqual(asset_manifest(self.new_app())[Resources.Gold], first_url)
+        self.write_icon("Gold.png", b"second icon")
+        second_url = asset_manifest(self.new_app())[Resources.Gold]
+        self.assertNotEqual(second_url, first_url)
+        self.assertEqual(second_url.split('?')[0], first_url.split('?')[0])
+
+    def test_missing_icon(self):
+        app = self.new_app()
+        self.assertIsNone(asset_manifest(app)[Resources.Goods])
+        self.assertIsNone(resource_icons(app, Resources.Goods))
+        self.assertIsNotNone(resource_icons(app, Resources.Goods, fail_safe=True))
+
+    def test_unlisted_resource_type(self):
+        self.write_icon("random_UnlistedCard.png", b"icon")
+        app = self.new_app()
+        manifest = asset_manifest(app)
+        self.assertNotIn(UnlistedCard, manifest)
+        self.assertRegex(manifest[UnlistedCard], r"/random_UnlistedCard\.png\?v=[0-9a-f]{10}$")
+        # Resolved once, then stored like the other types
+        self.assertIn(UnlistedCard, manifest)
+        self.assertEqual(resource_icons(app, UnlistedCard, height="20px").src, manifest[UnlistedCard])
+        self.assertIsNone(manifest[type('OtherUnlistedCard', (), {})])
+
+
+if __name__ == '__main__':
+    unittest.main()
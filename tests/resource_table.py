@@ -0,0 +1,45 @@
+import tempfile
+import time
+import unittest
+
+import dash
+
+from economy.budget_simulator.graphs import ResourceTable
+from economy.budget_simulator.simulation import default_parameter_values, update_income
+from lang.languages import Language
+
+TABLE_RENDER_BUDGET = 0.02
+"""Maximal time in seconds to render the resource table of the default simulation (its cells being already cached)"""
+
+
+class ResourceTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.assets_directory = tempfile.TemporaryDirectory()
+        self.app = dash.Dash(__name__, assets_folder=self.assets_directory.name)
+        self.incomes = update_income(default_parameter_values())
+
+    def tearDown(self):
+        self.assets_directory.cleanup()
+
+    def test_duration(self):
+        ResourceTable.figures_updates(self.incomes, Language.ENGLISH, self.app)
+        durations = []
+        for _ in range(5):
+            start = time.perf_counter()
+            ResourceTable.figures_updates(self.incomes, Language.ENGLISH, self.app)
+            durations.append(time.perf_counter() - start)
+        # Best of several runs, to be robust to the load of the machine
+        self.assertLess(min(durations), TABLE_RENDER_BUDGET,
+                        "Rendering the resource table took {:.1f}ms".format(min(durations) * 1000))
+
+    def test_one_section_per_category(self):
+        sections = ResourceTable.figures_updates(self.incomes, Language.ENGLISH, self.app)
+        # A header and a body per gain category, and for the totals
+        self.assertEqual(len(sections), 2 * (len(self.incomes) + 1))
+        total_row = sections[-1].children[0].children
+        header = sections[-2].children.children
+        self.assertEqual(len(total_row), len(header))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from common.vip import VIP
+from economy.budget_simulator.result_cache import ResultCache, build_result_cache, cache_key, source_version
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cache_key(self):
+        # Stable whatever the order of the parameters, and different for other values
+        key = cache_key({'vip': VIP.lvl4, 'hq_lvl': 16}, 'en')
+        self.assertEqual(key, cache_key({'hq_lvl': 16, 'vip': VIP.lvl4}, 'en'))
+        self.assertNotEqual(key, cache_key({'hq_lvl': 16, 'vip': VIP.lvl5}, 'en'))
+        self.assertNotEqual(key, cache_key({'hq_lvl': 16, 'vip': VIP.lvl4}, 'fr'))
+
+    def test_round_trip(self):
+        cache = ResultCache(self.path, version='a')
+        key = cache_key({'vip': VIP.lvl4})
+        self.assertIsNone(cache.get(key))
+        result = {'incomes': [1.5, 2], 'labels': ['Gold', None]}
+        cache.put(key, result)
+        self.assertEqual(cache.get(key), result)
+        # Another process opening the same database sees the result
+        self.assertEqual(ResultCache(self.path, version='a').get(key), result)
+        compute = mock.Mock(return_value={'other': 1})
+        self.assertEqual(cache.get_or_compute(key, compute), result)
+        self.assertEqual(cache.get_or_compute(cache_key('other'), compute), {'other': 1})
+        self.assertEqual(cache.get_or_compute(cache_key('other'), compute), {'other': 1})
+        compute.assert_called_once()
+
+    def test_version_invalidation(self):
+        key = cache_key('key')
+        ResultCache(self.path, version='a').put(key, 1)
+        # Results of other versions of the code are ignored, then dropped
+        self.assertIsNone(ResultCache(self.path, version='b').get(key))
+        self.assertIsNone(ResultCache(self.path, version='a').get(key))
+        self.assertEqual(len(source_version()), 64)
+
+    def test_lru_eviction(self):
+        # Room for 3 results of 10 bytes
+        cache = ResultCache(self.path, max_size=30, version='a')
+        keys = [cache_key(k) for k in range(4)]
+        for key in keys[:3]:
+            cache.put(key, "12345678")
+        with mock.patch('time.time', return_value=1e12):
+            # The first result becomes the most recently used one
+            self.assertEqual(cache.get(keys[0]), "12345678")
+        cache.put(keys[3], "12345678")
+        self.assertEqual([cache.get(key) is not None for key in keys], [True, False, True, True])
+
+    def test_unavailable_database(self):
+        with mock.patch.dict(os.environ, {'WINS_RESULT_CACHE': self.directory.name}):
+            with self.assertLogs('economy.budget_simulator.result_cache', level='WARNING'):
+                self.assertIsNone(build_result_cache())
+        with mock.patch.dict(os.environ, {'WINS_RESULT_CACHE': ''}):
+            self.assertIsNone(build_result_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import time
+import unittest
+
+from common.resources import ResourcePacket, Resources
+from economy.budget_simulator.parameters import PARAMETERS_BY_NAME
+from economy.budget_simulator.sensitivity import parameter_neighbours, sensitivity, serialize_report, \
+    deserialize_report
+from economy.budget_simulator.simulation import default_parameter_values, update_income, gain_income
+from economy.converters.abstract_converter import ConverterModeUIParameter
+from economy.gains.daily_rewards import Trading10Km
+
+ConversionMode = ConverterModeUIParameter.ConversionMode
+
+
+def total_income(ui_parameters_values: dict) -> ResourcePacket:
+    total = ResourcePacket()
+    for gain_incomes in update_income(ui_parameters_values).values():
+        for resource_packet in gain_incomes.values():
+            total = total + resource_packet
+    return total
+
+
+def converters_enabled_values() -> dict:
+    return dict(default_parameter_values(), lottery_mode=ConversionMode.IN_PLACE,
+                legendarysoulexchange_mode=ConversionMode.IN_PLACE, recycle_mode=ConversionMode.EXTERNAL,
+                chestopening_mode=ConversionMode.IN_PLACE)
+
+
+SENSITIVITY_BUDGET = 0.2
+"""Maximal time in seconds of a sensitivity analysis (with the converters enabled and the gains already cached)"""
+
+
+class ParameterNeighboursTestCase(unittest.TestCase):
+    def test_bool(self):
+        self.assertEqual(parameter_neighbours(PARAMETERS_BY_NAME['ask_for_donation'], False), [True])
+
+    def test_int(self):
+        self.assertEqual(parameter_neighbours(PARAMETERS_BY_NAME['ambush_won'], 20), [19, 21])
+        self.assertEqual(parameter_neighbours(PARAMETERS_BY_NAME['defense_lost'], 0), [1])
+
+    def test_value_range(self):
+        hq_param = PARAMETERS_BY_NAME['hq_lvl']
+        self.assertEqual(parameter_neighbours(hq_param, 16), [15, 17])
+        self.assertEqual(parameter_neighbours(hq_param, hq_param.value_range[0]), [hq_param.value_range[1]])
+        self.assertEqual(parameter_neighbours(hq_param, hq_param.value_range[-1]), [hq_param.value_range[-2]])
+        self.assertEqual(parameter_neighbours(hq_param, 1000), [])
+
+
+class SensitivityTestCase(unittest.TestCase):
+    def test_deltas(self):
+        ui_parameters_values = converters_enabled_values()
+        report = sensitivity(ui_parameters_values)
+        reference = total_income(ui_parameters_values)
+        for res_type, entries in report.items():
+            self.assertTrue(entries, res_type)
+            self.assertEqual([abs(entry.delta) for entry in entries],
+                             sorted((abs(entry.delta) for entry in entries), reverse=True))
+            # Check the biggest variations against a full simulation
+            for entry in entries[:3]:
+                with self.subTest(resource=res_type, parameter=entry.parameter.parameter_name):
+                    perturbed = total_income(dict(ui_parameters_values, **{entry.parameter.parameter_name: entry.value}))
+                    self.assertAlmostEqual(entry.delta, perturbed[res_type] - reference[res_type], places=6)
+
+    def test_duration(self):
+        ui_parameters_values = converters_enabled_values()
+        sensitivity(ui_parameters_values)
+        durations = []
+        for _ in range(5):
+            start = time.perf_counter()
+            sensitivity(ui_parameters_values)
+            durations.append(time.perf_counter() - start)
+        # Best of several runs, to be robust to the load of the machine
+        self.assertLess(min(durations), SENSITIVITY_BUDGET,
+                        "A sensitivity analysis took {:.0f}ms".format(min(durations) * 1000))
+
+    def test_cached_incomes_are_not_modified(self):
+        ui_parameters_values = converters_enabled_values()
+        gain = Trading10Km
+        resource_types = set(gain_income(gain, ui_parameters_values))
+        # Converters read resource types missing from the packets (e.g. every chest type), which mustn't insert them
+        # into the cached packets
+        update_income(ui_parameters_values)
+        sensitivity(ui_parameters_values)
+        income = gain_income(gain, ui_parameters_values)
+        self.assertEqual(set(income), resource_types)
+        income[Resources.Gem] = -1
+        self.assertNotEqual(gain_income(gain, ui_parameters_values)[Resources.Gem], -1)
+
+    def test_serialized_report(self):
+        report = sensitivity(converters_enabled_values())
+        self.assertEqual(deserialize_report(json.loads(json.dumps(serialize_report(report)))), report)
+
+if __name__ == '__main__':
+    unittest.main()
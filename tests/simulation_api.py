@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import flask
+
+from economy.budget_simulator import simulation
+from economy.budget_simulator.api import register_api
+from economy.budget_simulator.result_cache import ResultCache
+from economy.budget_simulator.simulation import SimulationStore, default_parameter_values
+
+
+class SimulationApiTestCase(unittest.TestCase):
+    def setUp(self):
+        server = flask.Flask(__name__)
+        register_api(server)
+        self.client = server.test_client()
+
+    def test_simulate(self):
+        response = self.client.post("/api/simulate", json={'parameters': {}})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['incomes'])
+
+    def test_incompatible_converter_parameters(self):
+        # More convoys lost than convoys sent: the DefenseLost converter can't be applied
+        response = self.client.post("/api/simulate", json={'parameters': {'defense_lost': 1000}})
+        self.assertEqual(response.status_code, 422)
+        # Whatever the requested format
+        response = self.client.post("/api/simulate?format=arrow", json={'parameters': {'defense_lost': 1000}})
+        self.assertEqual(response.status_code, 422)
+
+    def test_batch_with_an_incompatible_point(self):
+        response = self.client.post("/api/simulate/batch", json={'points': [{}, {'defense_lost': 1000}]})
+        self.assertEqual(response.status_code, 200)
+        incomes = response.get_json()['incomes']
+        self.assertIsNotNone(incomes[0])
+        self.assertIsNone(incomes[1])
+
+
+class SharedIncomesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.result_cache = ResultCache(os.path.join(self.directory.name, "cache.sqlite"), version='a')
+        server = flask.Flask(__name__)
+        register_api(server, self.result_cache)
+        self.client = server.test_client()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_api_reuses_dash_simulations(self):
+        uncached_server = flask.Flask(__name__)
+        register_api(uncached_server)
+        expected = uncached_server.test_client().post("/api/simulate", json={'parameters': {}}).get_json()
+        SimulationStore(result_cache=self.result_cache).put(default_parameter_values())
+        with mock.patch('economy.budget_simulator.api.update_income',
+                        side_effect=AssertionError("simulation ran again")):
+            response = self.client.post("/api/simulate", json={'parameters': {}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), expected)
+
+    def test_dash_reuses_api_simulations(self):
+        self.client.post("/api/simulate", json={'parameters': {'hq_lvl': 18}})
+        ui_parameters_values = dict(default_parameter_values(), hq_lvl=18)
+        with mock.patch.object(simulation, 'update_income', side_effect=AssertionError("simulation ran again")):
+            store = SimulationStore(result_cache=self.result_cache)
+            _, incomes = store.get(store.put(ui_parameters_values), lambda: ui_parameters_values)
+        self.assertTrue(incomes)
+
+
+if __name__ == '__main__':
+    unittest.main()
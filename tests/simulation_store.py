@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from economy.budget_simulator import simulation
+from economy.budget_simulator.result_cache import ResultCache, cache_key
+from economy.budget_simulator.simulation import SimulationStore, default_parameter_values, deserialize_incomes, \
+    serialize_incomes, update_income
+from economy.converters.abstract_converter import ConverterModeUIParameter
+
+ConversionMode = ConverterModeUIParameter.ConversionMode
+
+
+def non_zero(incomes) -> dict:
+    # ResourcePackets insert the missing resource types that are read, only compare the actual quantities
+    return {(category, gain): {res_type: quantity for res_type, quantity in packet.items() if quantity != 0}
+            for category in incomes for gain, packet in incomes[category].items()}
+
+
+class SerializedIncomesTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        # With a converter in external mode, whose category isn't a gain category
+        ui_parameters_values = dict(default_parameter_values(), recycle_mode=ConversionMode.EXTERNAL)
+        incomes = update_income(ui_parameters_values)
+        self.assertEqual(non_zero(deserialize_incomes(serialize_incomes(incomes))), non_zero(incomes))
+
+    def test_unknown_gain(self):
+        with self.assertRaises(KeyError):
+            deserialize_incomes([["Nowhere", "Nothing", {}]])
+
+
+class SimulationStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.result_cache = ResultCache(os.path.join(self.directory.name, "cache.sqlite"), version='a')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shared_between_processes(self):
+        ui_parameters_values = default_parameter_values()
+        key = SimulationStore(result_cache=self.result_cache).put(ui_parameters_values)
+        self.assertEqual(key, cache_key(ui_parameters_values))
+        self.assertIsNotNone(self.result_cache.get(key))
+        # A store of another process finds the incomes in the result cache, without running the simulation
+        with mock.patch.object(simulation, 'update_income', side_effect=AssertionError("simulation ran again")):
+            values, incomes = SimulationStore(result_cache=self.result_cache).get(key, lambda: ui_parameters_values)
+        self.assertEqual(values, ui_parameters_values)
+        self.assertEqual(non_zero(incomes), non_zero(update_income(ui_parameters_values)))
+
+    def test_invalid_shared_entry(self):
+        # Incompatible points of the simulation API are stored without incomes, they are simulated again
+        ui_parameters_values = default_parameter_values()
+        key = cache_key(ui_parameters_values)
+        self.result_cache.put(key, {'incomes': None})
+        _, incomes = SimulationStore(result_cache=self.result_cache).get(key, lambda: ui_parameters_values)
+        self.assertEqual(non_zero(incomes), non_zero(update_income(ui_parameters_values)))
+
+
+if __name__ == '__main__':
+    unittest.main()
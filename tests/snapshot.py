@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from economy.budget_simulator.bs_ui_parameters import get_parameter_value
+from economy.budget_simulator.result_cache import cache_key
+from economy.budget_simulator.simulation import all_parameters, default_parameter_values
+from economy.budget_simulator.snapshot import Snapshot, build_snapshot
+from lang.languages import Language
+
+
+class SnapshotTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "snapshot.json.gz")
+        # Same as --default-only
+        build_snapshot(cls.path, scenarios=[default_parameter_values()])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_default_scenario_keys(self):
+        snapshot = Snapshot(self.path)
+        self.assertEqual(len(snapshot), len(Language))
+        # The initial values of the selectors must hit the snapshot
+        ui_parameter_values = {ui_parameter.parameter_name: get_parameter_value(ui_parameter,
+                                                                                ui_parameter.default_value_index)
+                               for ui_parameter in all_parameters}
+        for language in Language:
+            with self.subTest(language=language):
+                key = cache_key(ui_parameter_values, language.name)
+                self.assertIn(key, snapshot)
+                self.assertIsNotNone(snapshot.get_graph(key, 0))
+                self.assertIn(key, snapshot.incomes)
+
+    def test_other_version(self):
+        with mock.patch('economy.budget_simulator.snapshot.source_version', return_value='other'):
+            with self.assertLogs('economy.budget_simulator.snapshot', level='WARNING'):
+                snapshot = Snapshot(self.path)
+        self.assertEqual(len(snapshot), 0)
+        self.assertIsNone(snapshot.get(cache_key(default_parameter_values(), Language.ENGLISH.name)))
+
+    def test_missing_file(self):
+        self.assertEqual(len(Snapshot(os.path.join(self.directory.name, "missing.json.gz"))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy
+
+from common.vip import VIP
+from economy.budget_simulator.simulation import default_parameter_values, update_income, gain_income
+from economy.budget_simulator.sweep import sweep, evaluate_batch
+from economy.gains.abstract_gains import vip_param, hq_param
+
+VIP_LEVELS = (VIP.lvl4, VIP.lvl7, VIP.lvl10)
+HQ_LEVELS = (10, 16)
+
+
+def non_null(resource_packet):
+    return {res_type: quantity for res_type, quantity in resource_packet.items() if quantity != 0}
+
+
+class SweepTestCase(unittest.TestCase):
+    def assertPacketsAlmostEqual(self, first, second):
+        first, second = non_null(first), non_null(second)
+        self.assertEqual(set(first), set(second))
+        for res_type in first:
+            self.assertAlmostEqual(first[res_type], second[res_type], places=6, msg=str(res_type))
+
+    def test_broadcast(self):
+        result = sweep({vip_param: VIP_LEVELS, hq_param: HQ_LEVELS}, apply_converters=False)
+        self.assertEqual(result.shape, (3, 2))
+        for i, vip in enumerate(VIP_LEVELS):
+            for j, hq_level in enumerate(HQ_LEVELS):
+                parameter_values = dict(default_parameter_values(), vip=vip, hq_lvl=hq_level)
+                for gain_index, (_, gain) in enumerate(result.gains):
+                    with self.subTest(vip=vip, hq_lvl=hq_level, gain=gain.__name__):
+                        self.assertPacketsAlmostEqual(result.to_resource_packet((i, j), gain_index),
+                                                      gain_income(gain, parameter_values))
+
+    def test_points_agree_with_update_income(self):
+        result = sweep({vip_param: VIP_LEVELS, hq_param: HQ_LEVELS})
+        self.assertFalse(result.invalid().any())
+        for i, vip in enumerate(VIP_LEVELS):
+            for j, hq_level in enumerate(HQ_LEVELS):
+                incomes = update_income(dict(default_parameter_values(), vip=vip, hq_lvl=hq_level))
+                for gain_index, (gain_category, gain) in enumerate(result.gains):
+                    with self.subTest(vip=vip, hq_lvl=hq_level, gain=gain.__name__):
+                        self.assertPacketsAlmostEqual(result.to_resource_packet((i, j), gain_index),
+                                                      incomes[gain_category][gain])
+
+    def test_parallel_points(self):
+        grid = {vip_param: VIP_LEVELS, 'defense_lost': (0, 2, 1000)}
+        serial = sweep(grid)
+        parallel = sweep(grid, processes=2, parallel_threshold=1)
+        numpy.testing.assert_array_equal(serial.invalid(), parallel.invalid())
+        for gain_key in serial.gains:
+            for resource_type in serial.resource_types:
+                numpy.testing.assert_allclose(
+                    serial.values[..., serial.gains.index(gain_key), serial.resource_index(resource_type)],
+                    parallel.values[..., parallel.gains.index(gain_key), parallel.resource_index(resource_type)])
+
+    def test_invalid_converter_points(self):
+        # More convoys lost than convoys sent: only these points are invalid, the sweep still completes
+        result = sweep({vip_param: VIP_LEVELS, 'defense_lost': (0, 1000)})
+        numpy.testing.assert_array_equal(result.invalid(), [[False, True]] * 3)
+        self.assertTrue(numpy.isnan(result.values[:, 1]).all())
+        self.assertFalse(numpy.isnan(result.values[:, 0]).any())
+
+    def test_evaluate_batch(self):
+        result = evaluate_batch([{}, {'defense_lost': 1000}, {'vip': VIP.lvl10}])
+        numpy.testing.assert_array_equal(result.invalid(), [False, True, False])
+        self.assertTrue(evaluate_batch([{'defense_lost': 1000}]).invalid().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
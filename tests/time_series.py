@@ -0,0 +1,52 @@
+import unittest
+
+import numpy
+
+from common.resources import ResourcePacket, Resources
+from economy.budget_simulator.simulation import default_parameter_values, update_income
+from economy.budget_simulator.time_series import BudgetTimeSeries, simulate_days
+from economy.gains.abstract_gains import Days, MeasurementPeriod
+
+
+class BudgetTimeSeriesTestCase(unittest.TestCase):
+    def setUp(self):
+        # 2 gains, 2 resource types, 3 days
+        self.time_series = BudgetTimeSeries(
+            numpy.array([[[10, 1], [5, 0]],
+                         [[10, 1], [-20, 0]],
+                         [[10, 1], [5, 2]]], dtype=float),
+            [('first', object), ('second', object)], [Resources.Gold, Resources.Goods], start_day=Days.Saturday)
+
+    def test_cumulative_balance(self):
+        numpy.testing.assert_array_equal(self.time_series.cumulative_balance(), [[15, 1], [5, 2], [20, 5]])
+        # Resource types that never appear are ignored
+        initial_balance = ResourcePacket(Resources.Gold(100), Resources.LegendarySoul(3))
+        numpy.testing.assert_array_equal(self.time_series.cumulative_balance(initial_balance),
+                                         [[115, 1], [105, 2], [120, 5]])
+
+    def test_resource_balance(self):
+        numpy.testing.assert_array_equal(self.time_series.resource_balance(Resources.Gold), [15, 5, 20])
+        numpy.testing.assert_array_equal(self.time_series.resource_balance(Resources.Goods, 10), [11, 12, 15])
+        numpy.testing.assert_array_equal(self.time_series.resource_balance(Resources.LegendarySoul, 3), [3, 3, 3])
+
+    def test_weekdays(self):
+        self.assertEqual([self.time_series.weekday(day_index) for day_index in range(3)],
+                         [Days.Saturday, Days.Sunday, Days.Monday])
+
+    def test_weekly_totals(self):
+        # Any 7 consecutive days sum up to the weekly incomes of the average simulation
+        parameter_values = default_parameter_values()
+        time_series = simulate_days(parameter_values, days=10, start_day=Days.Wednesday)
+        weekly_incomes = update_income(dict(parameter_values, mesurement_range=MeasurementPeriod.WEEK))
+        for first_day in (0, 3):
+            weekly_totals = time_series.daily_incomes[first_day:first_day + 7].sum(axis=0)
+            for gain_index, (gain_category, gain) in enumerate(time_series.gains):
+                expected = weekly_incomes[gain_category][gain]
+                for res_index, res_type in enumerate(time_series.resource_types):
+                    with self.subTest(first_day=first_day, gain=gain.__name__, res_type=str(res_type)):
+                        self.assertAlmostEqual(weekly_totals[gain_index, res_index], expected.get(res_type, 0),
+                                               places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
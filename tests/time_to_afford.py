@@ -0,0 +1,57 @@
+import unittest
+
+import numpy
+
+from buildings.headquarters import HQ
+from common.rarity import Rarity
+from common.resources import ResourcePacket, ResourceQuantity, Resources
+from economy.budget_simulator.simulation import default_parameter_values
+from economy.budget_simulator.time_series import BudgetTimeSeries, simulate_days
+from economy.budget_simulator.time_to_afford import required_resources, time_to_afford
+
+
+
+def constant_time_series(daily_gold, daily_goods, days=365):
+    return BudgetTimeSeries(numpy.tile([[[daily_gold, daily_goods]]], (days, 1, 1)).astype(float),
+                            [('constant', object)], [Resources.Gold, Resources.Goods])
+
+
+class TimeToAffordTestCase(unittest.TestCase):
+    def test_known_target(self):
+        # Upgrade of the HQ of config/my_cards.py (level 15)
+        requirement = required_resources(HQ(17))
+        self.assertEqual(requirement[Resources.Gold], 449330000)
+        self.assertEqual(requirement[Resources.Goods], 95000000)
+        # 35.9 days of gold, 4.75 days of goods
+        result = time_to_afford(HQ(17), constant_time_series(12.5e6, 20e6))
+        self.assertEqual(result.day, 36)
+        self.assertEqual(result.constraints, {Resources.Gold: 36, Resources.Goods: 5})
+        # Owned resources shorten the wait
+        result = time_to_afford(HQ(17), constant_time_series(12.5e6, 20e6),
+                                initial_balance=ResourcePacket(Resources.Gold(449330000 - 12.5e6 * 10)))
+        self.assertEqual(result.day, 10)
+
+    def test_simulated_known_target(self):
+        time_series = simulate_days(default_parameter_values(), days=365)
+        result = time_to_afford(HQ(17), time_series)
+        self.assertEqual(result.day, 42)
+        self.assertEqual(result.constraints, {Resources.Gold: 42, Resources.Goods: 7})
+
+    def test_never_affordable(self):
+        # Goods are never earned, and the spent gold never builds up
+        result = time_to_afford(HQ(17), constant_time_series(0, 0))
+        self.assertIsNone(result.day)
+        self.assertEqual(result.constraints, {Resources.Gold: None, Resources.Goods: None})
+        result = time_to_afford(HQ(17), constant_time_series(12.5e6, -1e6))
+        self.assertIsNone(result.day)
+        self.assertEqual(result.constraints, {Resources.Gold: 36, Resources.Goods: None})
+        # Never looted at all
+        result = time_to_afford(ResourceQuantity(Rarity.Legendary, 1), constant_time_series(12.5e6, 20e6))
+        self.assertIsNone(result.day)
+
+    def test_nothing_required(self):
+        self.assertEqual(time_to_afford(ResourcePacket(), constant_time_series(0, 0)), (0, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
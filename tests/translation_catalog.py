@@ -0,0 +1,47 @@
+import unittest
+
+import dash
+import dash_html_components as html
+
+from economy.budget_simulator.bs_ui_parameters import build_parameters_selectors_list
+from lang.languages import Language, TranslatableString
+from lang.translation_dash_wrapper import TranslatableComponentRegister, build_translation_catalog, \
+    setup_language_callback, wrap_dash_module_translation
+
+
+class TranslationCatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.translatable_components = TranslatableComponentRegister()
+        self.htmlt = wrap_dash_module_translation(html, self.translatable_components)
+
+    def test_every_component_in_every_language(self):
+        self.htmlt.Div(TranslatableString("Title", french="Titre"), id='title')
+        self.htmlt.Span(TranslatableString("Only in english"), id='untranslated')
+        html.Div("Not translatable", id='static')
+        catalog = build_translation_catalog(self.translatable_components)
+        self.assertEqual(catalog, {Language.ENGLISH.name: ["Title", "Only in english"],
+                                   Language.FRENCH.name: ["Titre", "Only in english"]})
+
+    def test_parameter_selectors(self):
+        app = dash.Dash(__name__)
+        build_parameters_selectors_list(app, [], self.translatable_components)
+        self.assertTrue(self.translatable_components)
+        catalog = build_translation_catalog(self.translatable_components)
+        self.assertEqual(set(catalog), {language.name for language in Language})
+        for language in Language:
+            with self.subTest(language=language):
+                # One translation per component, in the order of the callback outputs
+                self.assertEqual(catalog[language.name],
+                                 [attribute.translations.translated_into(language)
+                                  for attribute in self.translatable_components.values()])
+                self.assertTrue(all(isinstance(text, str) and text for text in catalog[language.name]))
+
+    def test_catalog_store(self):
+        self.htmlt.Div(TranslatableString("Title", french="Titre"), id='title')
+        store = setup_language_callback(dash.Dash(__name__), self.translatable_components)
+        self.assertEqual(store.data, build_translation_catalog(self.translatable_components))
+        self.assertTrue(self.translatable_components.callback_built)
+
+
+if __name__ == '__main__':
+    unittest.main()
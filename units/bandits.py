@@ -165,6 +165,7 @@ class Berserk(Bandit):
     armor_piercing = 0
     cost = 4
     move_speed = 1.8
+    rarity = Rarity.Rare
     upgrade_costs = resourcepackets_gold(
         0,  # 0 -> 1
         -380, -1900, -7200, -16000, -44000,  # 1 -> 6
@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from itertools import accumulate
 from typing import Type
 
 from buildings.buildings import HeroTemple
@@ -56,21 +57,66 @@ class Hero(MovableUnit):
                  -11436, -11608, -11782, -11959, -12138, -12320, -12505, -12693, -12883, -13076,  # 180 -> 190
                  -13272, -13471, -13673, -13879, -14087, -14298, -14512, -14730, -14951, -15175,  # 190 -> 200
                  ]
-    # TODO: find a predictive formula for xp costs.  (e.g. experiments/hero_cp_formula.py)
-    #      (This seems difficult: growth seems random at first due to round operation, then stabilize around
-    #      x1.12 per lvl until lvl 40 where it drop to x1.1; then to 1.05 at lvl 50, and finally to 1.03 at lvl 60 ...)
+    # See economy/hero_xp_model.py for a model of these costs, predicting the levels above 200
+    _soul_costs = [(-30 if level == 0 else -5 * level // 10) if level % 10 == 0 else 0
+                   for level in range(len(_xp_costs))]
+
+    # Prefix sums of the costs, the cost of upgrading from level a to level b is then
+    # _xp_prefix_costs[b] - _xp_prefix_costs[a] whatever the number of levels in between
+    _xp_prefix_costs = list(accumulate(_xp_costs, initial=0))
+    _soul_prefix_costs = list(accumulate(_soul_costs, initial=0))
 
     @classproperty
     def upgrade_costs(cls):
-        # OPTIMIZE: if needed it is possible to save cpu in exhange of memory: As this function will always return the
-        #  same results for one specific hero class (only hero soul type change), each hero class can cache the results.
-        return [
-            (ResourcePacket(Resources.HeroExperience(xp_cost)) if level % 10
-             else ResourcePacket(Resources.HeroExperience(xp_cost),
-                                 cls.soul_class(-30 if level == 0 else -5 * level//10))
-             )
-            for level, xp_cost in enumerate(cls._xp_costs)
-            ]
+        # The result only depends on the hero class (only hero soul type change), so it is built once per class
+        upgrade_costs = cls.__dict__.get('_upgrade_costs')
+        if upgrade_costs is None:
+            upgrade_costs = [
+                (ResourcePacket(Resources.HeroExperience(xp_cost)) if level % 10
+                 else ResourcePacket(Resources.HeroExperience(xp_cost), cls.soul_class(soul_cost))
+                 )
+                for level, (xp_cost, soul_cost) in enumerate(zip(cls._xp_costs, cls._soul_costs))
+                ]
+            cls._upgrade_costs = upgrade_costs
+        return upgrade_costs
+
+    @classmethod
+    def _check_level_range(cls, from_level: int, to_level: int):
+        assert 0 <= from_level <= to_level <= len(cls._xp_costs), \
+            "Levels should be in range [0;{}] and ordered, {} -> {} is forbidden".format(len(cls._xp_costs),
+                                                                                         from_level, to_level)
+
+    @classmethod
+    def cumulative_xp_cost(cls, from_level: int, to_level: int) -> int:
+        """
+        Return the hero experience needed to upgrade a hero from <from_level> to <to_level> (negative like the
+        upgrade costs), in constant time.
+
+        :param from_level: int, the current hero sub-level
+        :param to_level: int, the targeted hero sub-level, >= from_level
+        :return: int
+        """
+        cls._check_level_range(from_level, to_level)
+        return cls._xp_prefix_costs[to_level] - cls._xp_prefix_costs[from_level]
+
+    @classmethod
+    def cumulative_soul_cost(cls, from_level: int, to_level: int) -> int:
+        """Return the hero souls needed to upgrade a hero from <from_level> to <to_level>, in constant time"""
+        cls._check_level_range(from_level, to_level)
+        return cls._soul_prefix_costs[to_level] - cls._soul_prefix_costs[from_level]
+
+    @classmethod
+    def cumulative_upgrade_cost(cls, from_level: int, to_level: int) -> ResourcePacket:
+        """
+        Return the total costs of upgrading the hero from <from_level> to <to_level>, in constant time (same result as
+        summing upgrade_costs[from_level:to_level]).
+
+        :param from_level: int, the current hero sub-level
+        :param to_level: int, the targeted hero sub-level, >= from_level
+        :return: ResourcePacket
+        """
+        return ResourcePacket(Resources.HeroExperience(cls.cumulative_xp_cost(from_level, to_level)),
+                              cls.soul_class(cls.cumulative_soul_cost(from_level, to_level)))
 
 
 class HeroSpell:
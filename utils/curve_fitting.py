@@ -0,0 +1,244 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Least-squares fitting of game formulas on recorded data tables (e.g. the armor table).
+
+A model is a function model(x, *parameters) written with numpy operations, so that it can be evaluated on whole grids
+of candidate parameters at once. Fitting first searches the best point of a parameter grid, then refines it with
+Gauss-Newton iterations.
+
+Usage example:
+
+    >>> result = fit_curve(lambda x, a, b: a * numpy.log(b * x + 1), list(armor_table), list(armor_table.values()),
+    ...                    [numpy.linspace(10, 40, 300), numpy.linspace(0.01, 1, 300)])
+    >>> print(result)
+"""
+import math
+from typing import Callable, Sequence, Tuple, Optional, Dict, Union
+
+import numpy
+
+Model = Callable[..., numpy.ndarray]
+"""model(x, *parameters) -> y, evaluated with numpy broadcasting"""
+
+GRID_SEARCH_MEMORY = 2 * 10**7
+"""Maximal number of model evaluations done at once by grid_search (to bound its memory usage)"""
+
+
+def grid_search(model: Model, xs: numpy.ndarray, ys: numpy.ndarray, parameter_grids: Sequence[numpy.ndarray],
+                ) -> Tuple[numpy.ndarray, float]:
+    """
+    Evaluate the model on every combination of the candidate parameter values and return the best one.
+
+    The model is evaluated as a single numpy broadcast (parameter k varying along axis k and x along the last axis),
+    split in chunks along the first parameter when the grid is too big.
+
+    :param model: the model to fit
+    :param xs: 1D array of the recorded x values
+    :param ys: 1D array of the recorded y values
+    :param parameter_grids: 1D arrays of the candidate values of each parameter
+    :return: (array of the best parameter values, their sum of squared residuals)
+    """
+    xs, ys = numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float)
+    dimension = len(parameter_grids) + 1
+    grids = [numpy.asarray(grid, dtype=float).reshape([-1 if axis == k else 1 for axis in range(dimension)])
+             for k, grid in enumerate(parameter_grids)]
+    xs_axis = xs.reshape([1] * (dimension - 1) + [-1])
+
+    evaluations_per_first_value = int(numpy.prod([len(grid) for grid in parameter_grids[1:]])) * len(xs)
+    chunk_size = max(1, GRID_SEARCH_MEMORY // max(1, evaluations_per_first_value))
+    best_rss, best_index = numpy.inf, None
+    for start in range(0, len(parameter_grids[0]), chunk_size):
+        rss = ((model(xs_axis, grids[0][start:start + chunk_size], *grids[1:]) - ys) ** 2).sum(axis=-1)
+        # Invalid candidates (e.g. log of a negative number) are just ignored
+        rss = numpy.where(numpy.isfinite(rss), rss, numpy.inf)
+        chunk_best = numpy.unravel_index(numpy.argmin(rss), rss.shape)
+        if rss[chunk_best] < best_rss:
+            best_rss = float(rss[chunk_best])
+            best_index = (chunk_best[0] + start,) + tuple(chunk_best[1:])
+    if best_index is None:
+        raise ValueError("The model can't be evaluated on any point of the parameter grid")
+    return numpy.array([grid[k] for grid, k in zip(parameter_grids, best_index)], dtype=float), best_rss
+
+
+def numerical_jacobian(model: Model, xs: numpy.ndarray, parameters: numpy.ndarray, relative_step: float = 1e-6,
+                       ) -> numpy.ndarray:
+    """Return the derivatives of the model at each x relative to each parameter (len(xs) x len(parameters) matrix)"""
+    jacobian = numpy.empty((len(xs), len(parameters)))
+    for k, value in enumerate(parameters):
+        step = relative_step * max(abs(value), 1.)
+        shifted_up, shifted_down = parameters.copy(), parameters.copy()
+        shifted_up[k] += step
+        shifted_down[k] -= step
+        jacobian[:, k] = (model(xs, *shifted_up) - model(xs, *shifted_down)) / (2 * step)
+    return jacobian
+
+
+def gauss_newton(model: Model, xs: numpy.ndarray, ys: numpy.ndarray, initial_parameters: Sequence[float],
+                 max_iterations: int = 100, tolerance: float = 1e-12) -> Tuple[numpy.ndarray, int]:
+    """
+    Refine the model parameters by Gauss-Newton iterations (the step is halved until it reduces the residuals).
+
+    :param model: the model to fit
+    :param xs: 1D array of the recorded x values
+    :param ys: 1D array of the recorded y values
+    :param initial_parameters: starting point, must be close enough to the solution (e.g. given by grid_search)
+    :param max_iterations: int, maximal number of iterations
+    :param tolerance: float, stop when the relative improvement of the sum of squared residuals gets lower than that
+    :return: (array of the refined parameter values, number of iterations done)
+    """
+    xs, ys = numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float)
+    parameters = numpy.array(initial_parameters, dtype=float)
+    residuals = ys - model(xs, *parameters)
+    rss = residuals @ residuals
+    for iteration in range(1, max_iterations + 1):
+        step = numpy.linalg.lstsq(numerical_jacobian(model, xs, parameters), residuals, rcond=None)[0]
+        # Halve the step until it improves the fit
+        for _ in range(30):
+            new_parameters = parameters + step
+            with numpy.errstate(invalid='ignore', divide='ignore'):
+                new_residuals = ys - model(xs, *new_parameters)
+            new_rss = new_residuals @ new_residuals
+            if numpy.isfinite(new_rss) and new_rss <= rss:
+                break
+            step = step / 2
+        else:
+            # No improvement in the Gauss-Newton direction, we are at the minimum
+            return parameters, iteration
+        improvement = rss - new_rss
+        parameters, residuals, rss = new_parameters, new_residuals, new_rss
+        if improvement <= tolerance * max(rss, tolerance):
+            return parameters, iteration
+    return parameters, max_iterations
+
+
+def student_t_quantile(probability: float, degrees_of_freedom: int) -> float:
+    """
+    Return the quantile of the Student t distribution (numerical integration of its density, as scipy isn't a
+    dependency of the project).
+
+    :param probability: float in ]0.5, 1[
+    :param degrees_of_freedom: int, >= 1
+    """
+    assert 0.5 < probability < 1 and degrees_of_freedom >= 1
+    nu = degrees_of_freedom
+    log_normalization = math.lgamma((nu + 1) / 2) - math.lgamma(nu / 2) - 0.5 * math.log(nu * math.pi)
+
+    def cdf(t: float) -> float:
+        # Substitution t = tan(theta) keeps the integration interval bounded even for heavy tails
+        thetas = numpy.linspace(0, math.atan(t), 2001)
+        densities = numpy.exp(log_normalization - (nu + 1) / 2 * numpy.log1p(numpy.tan(thetas) ** 2 / nu)) \
+            / numpy.cos(thetas) ** 2
+        return 0.5 + float(numpy.sum((densities[1:] + densities[:-1]) / 2 * numpy.diff(thetas)))
+
+    low, high = 0., 1.
+    while cdf(high) < probability:
+        low, high = high, high * 2
+    for _ in range(60):
+        middle = (low + high) / 2
+        if cdf(middle) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class FitResult:
+    """Result of a least-squares fit, with the statistics needed to judge it"""
+
+    def __init__(self, model: Model, parameter_names: Sequence[str], parameters: numpy.ndarray, xs: numpy.ndarray,
+                 ys: numpy.ndarray, confidence: float = 0.95, iterations: int = 0):
+        self.model = model
+        self.parameter_names = list(parameter_names)
+        self.parameters = parameters
+        self.xs, self.ys = xs, ys
+        self.confidence = confidence
+        self.iterations = iterations
+        """Number of Gauss-Newton iterations done"""
+
+        self.residuals = ys - model(xs, *parameters)
+        self.rss = float(self.residuals @ self.residuals)
+        """Sum of squared residuals"""
+        self.degrees_of_freedom = len(xs) - len(parameters)
+
+        # Linearized covariance of the parameters around the optimum
+        self.covariance: Optional[numpy.ndarray] = None
+        self.standard_errors: Optional[numpy.ndarray] = None
+        self.confidence_intervals: Optional[numpy.ndarray] = None
+        """(len(parameters) x 2) array of the lower and upper bounds of each parameter"""
+        if self.degrees_of_freedom > 0:
+            jacobian = numerical_jacobian(model, xs, parameters)
+            variance = self.rss / self.degrees_of_freedom
+            self.covariance = variance * numpy.linalg.pinv(jacobian.T @ jacobian)
+            self.standard_errors = numpy.sqrt(numpy.diag(self.covariance))
+            half_width = student_t_quantile((1 + confidence) / 2, self.degrees_of_freedom) * self.standard_errors
+            self.confidence_intervals = numpy.stack([parameters - half_width, parameters + half_width], axis=1)
+
+    @property
+    def rmse(self) -> float:
+        """Root mean squared residual"""
+        return math.sqrt(self.rss / len(self.xs))
+
+    @property
+    def max_error(self) -> float:
+        return float(numpy.abs(self.residuals).max())
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(zip(self.parameter_names, self.parameters.tolist()))
+
+    def __call__(self, x: Union[float, numpy.ndarray]) -> Union[float, numpy.ndarray]:
+        """Evaluate the fitted model"""
+        return self.model(x, *self.parameters)
+
+    def __str__(self):
+        lines = ["Fit of {} points: rmse={:.4g}, max error={:.4g} ({} Gauss-Newton iterations)".format(
+            len(self.xs), self.rmse, self.max_error, self.iterations)]
+        for k, (name, value) in enumerate(zip(self.parameter_names, self.parameters)):
+            if self.confidence_intervals is None:
+                lines.append("  {} = {!r}".format(name, float(value)))
+            else:
+                lines.append("  {} = {!r} +/- {:.3g} ({:.0%} confidence interval [{:.6g}, {:.6g}])".format(
+                    name, float(value), self.standard_errors[k], self.confidence, *self.confidence_intervals[k]))
+        return "\n".join(lines)
+
+
+def fit_curve(model: Model, xs: Sequence[float], ys: Sequence[float], parameter_grids: Sequence[Sequence[float]],
+              parameter_names: Optional[Sequence[str]] = None, refine: bool = True, confidence: float = 0.95,
+              ) -> FitResult:
+    """
+    Fit a model on recorded data: search the best point of the parameter grid, then optionally refine it.
+
+    :param model: the model to fit, model(x, *parameters) must support numpy broadcasting
+    :param xs: the recorded x values
+    :param ys: the recorded y values
+    :param parameter_grids: candidate values of each parameter (e.g. numpy.linspace(0.1, 1, 1000))
+    :param parameter_names: names of the parameters (default to p0, p1, ...)
+    :param refine: bool, refine the best candidate with Gauss-Newton iterations
+    :param confidence: float, level of the confidence intervals of the parameters
+    :return: FitResult
+    """
+    xs, ys = numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float)
+    parameters, _ = grid_search(model, xs, ys, parameter_grids)
+    iterations = 0
+    if refine:
+        parameters, iterations = gauss_newton(model, xs, ys, parameters)
+    if parameter_names is None:
+        parameter_names = ["p{}".format(k) for k in range(len(parameters))]
+    return FitResult(model, parameter_names, parameters, xs, ys, confidence=confidence, iterations=iterations)
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Exact probability distributions of integer quantities (cards, tokens, resources looted...).
+
+The distribution of the sum of independent quantities is the convolution of their distributions, computed with numpy
+(through FFT when the distributions are big), so questions like "what is the probability to get at least 3 legendary
+cards with 50 golden chests" are answered exactly, without sampling.
+
+Usage example:
+
+    >>> legendary_per_chest = DiscreteDistribution.bernoulli(0.07)
+    >>> legendary_cards = legendary_per_chest.convolution_power(50)
+    >>> legendary_cards.probability_at_least(3), legendary_cards.percentile(0.9)
+"""
+from typing import Dict, Union
+
+import numpy
+
+FFT_CONVOLUTION_MIN_SIZE = 500
+"""Minimal size of both distributions for their convolution to be computed through FFT (direct convolution is faster
+and more accurate for small ones)"""
+
+NEGLIGIBLE_PROBABILITY = 1e-15
+"""Probabilities lower than that are considered null and trimmed off the distribution bounds"""
+
+FFT_RELATIVE_ERROR = 1e-13
+"""Bound of the rounding errors of an FFT convolution, relatively to its biggest value: smaller results are noise"""
+
+
+def convolve(first: numpy.ndarray, second: numpy.ndarray) -> numpy.ndarray:
+    """Return the convolution of two probability vectors"""
+    if min(len(first), len(second)) < FFT_CONVOLUTION_MIN_SIZE:
+        return numpy.convolve(first, second)
+    size = len(first) + len(second) - 1
+    result = numpy.fft.irfft(numpy.fft.rfft(first, size) * numpy.fft.rfft(second, size), size)
+    # Note: the rounding errors are about the same everywhere, so the small probabilities of the tails can't be told
+    # apart from noise (they would be several orders of magnitude too big)
+    return numpy.where(result > FFT_RELATIVE_ERROR * result.max(), result, 0.)
+
+
+class DiscreteDistribution:
+    """Probability distribution of an integer random variable X: P(X = offset + k) = probabilities[k]"""
+
+    def __init__(self, probabilities: Union[numpy.ndarray, list], offset: int = 0):
+        probabilities = numpy.asarray(probabilities, dtype=float)
+        assert probabilities.ndim == 1 and len(probabilities) > 0, "probabilities must be a non empty 1D array"
+        assert numpy.all(probabilities >= 0), "probabilities can't be negative"
+        total = probabilities.sum()
+        assert abs(total - 1) < 1e-6, "probabilities must sum up to 1, not {}".format(total)
+        # Trim the negligible probabilities at both ends, so that the size doesn't grow uselessly with convolutions
+        significant = numpy.flatnonzero(probabilities > NEGLIGIBLE_PROBABILITY)
+        start, end = (significant[0], significant[-1] + 1) if len(significant) else (0, 1)
+        self.probabilities = probabilities[start:end] / probabilities[start:end].sum()
+        self.offset = int(offset) + int(start)
+
+    # ----- Constructors -----
+
+    @classmethod
+    def point_mass(cls, value: float) -> 'DiscreteDistribution':
+        """
+        Distribution of a quantity that is always <value>.
+
+        A non integer value is split between the two nearest integers, so that the mean is kept (e.g. an average loot).
+        """
+        lower = int(numpy.floor(value))
+        return cls([1 - (value - lower), value - lower], offset=lower)
+
+    @classmethod
+    def bernoulli(cls, probability: float) -> 'DiscreteDistribution':
+        """Distribution of a quantity that is 1 with the given probability, else 0"""
+        return cls([1 - probability, probability])
+
+    @classmethod
+    def binomial(cls, trials: int, probability: float) -> 'DiscreteDistribution':
+        """Distribution of the number of successes among <trials> independent trials"""
+        return cls.bernoulli(probability).convolution_power(trials)
+
+    @classmethod
+    def from_dict(cls, probabilities: Dict[int, float]) -> 'DiscreteDistribution':
+        """Build a distribution from a {value: probability} dictionary (missing values having a null probability)"""
+        offset = min(probabilities)
+        vector = numpy.zeros(max(probabilities) - offset + 1)
+        for value, probability in probabilities.items():
+            vector[value - offset] += probability
+        return cls(vector, offset=offset)
+
+    # ----- Operations -----
+
+    def __add__(self, other: Union['DiscreteDistribution', int]) -> 'DiscreteDistribution':
+        """Distribution of the sum of two independent quantities (or of this quantity shifted by a constant)"""
+        if isinstance(other, int):
+            return DiscreteDistribution(self.probabilities, self.offset + other)
+        return DiscreteDistribution(convolve(self.probabilities, other.probabilities), self.offset + other.offset)
+
+    __radd__ = __add__
+
+    def convolution_power(self, n: int) -> 'DiscreteDistribution':
+        """Distribution of the sum of <n> independent quantities following this distribution"""
+        assert n >= 0
+        # Exponentiation by squaring. Note: raising the Fourier transform to the power n would do all the convolutions
+        # at once, but would also raise its rounding errors, flooding the tails with noise. Here the negligible
+        # probabilities are trimmed at each step, so small distributions stay small and exactly convolved.
+        result, power, remaining = self.point_mass(0), self, n
+        while remaining:
+            if remaining & 1:
+                result = result + power
+            remaining >>= 1
+            if remaining:
+                power = power + power
+        return result
+
+    def compound(self, summand: 'DiscreteDistribution') -> 'DiscreteDistribution':
+        """
+        Distribution of the sum of N independent quantities following <summand>, N following this distribution.
+
+        E.g. `cards.compound(DiscreteDistribution.bernoulli(share))` is the distribution of the number of cards of a
+        given type, among a random number of cards each one being of that type with probability <share>.
+        """
+        assert self.offset >= 0, "the number of summed quantities can't be negative"
+        assert summand.offset >= 0, "summed quantities can't be negative"
+        # Horner's scheme on the probability generating functions: sum p_k S^k, then multiplied by S^offset
+        summand_probabilities = numpy.concatenate([numpy.zeros(summand.offset), summand.probabilities])
+        probabilities = self.probabilities[-1:]
+        for probability in self.probabilities[-2::-1]:
+            probabilities = convolve(probabilities, summand_probabilities)
+            probabilities[0] += probability
+        result = DiscreteDistribution(probabilities)
+        return result + summand.convolution_power(self.offset) if self.offset else result
+
+    # ----- Statistics -----
+
+    @property
+    def values(self) -> numpy.ndarray:
+        """The possible values, in the same order as self.probabilities"""
+        return numpy.arange(self.offset, self.offset + len(self.probabilities))
+
+    @property
+    def mean(self) -> float:
+        return float(self.values @ self.probabilities)
+
+    @property
+    def variance(self) -> float:
+        return float(((self.values - self.mean) ** 2) @ self.probabilities)
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+    def probability(self, value: int) -> float:
+        """Return P(X = value)"""
+        index = value - self.offset
+        return float(self.probabilities[index]) if 0 <= index < len(self.probabilities) else 0.
+
+    def cdf(self, value: int) -> float:
+        """Return P(X <= value)"""
+        index = value - self.offset
+        if index < 0:
+            return 0.
+        return min(1., float(self.probabilities[:index + 1].sum()))
+
+    def probability_at_least(self, value: int) -> float:
+        """Return P(X >= value)"""
+        index = max(0, value - self.offset)
+        return min(1., float(self.probabilities[index:].sum()))
+
+    def percentile(self, probability: float) -> int:
+        """Return the lowest value v such as P(X <= v) >= probability (e.g. 0.5 for the median)"""
+        assert 0 <= probability <= 1
+        cumulative = numpy.cumsum(self.probabilities)
+        # Tolerance for the floating point errors of the cumulative sum
+        index = int(numpy.searchsorted(cumulative, probability - 1e-12))
+        return self.offset + min(index, len(self.probabilities) - 1)
+
+    def __repr__(self):
+        return "{}(mean={:.4g}, std={:.4g}, support=[{};{}])".format(
+            type(self).__name__, self.mean, self.std, self.offset, self.offset + len(self.probabilities) - 1)
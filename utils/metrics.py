@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# This is a personal project to understand and improve my knowledge/tactics in the game Caravan War.
+# Copyright (C) 2019  Kasonnara <wins@kasonnara.fr>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Lightweight latency and cache metrics, exported in the Prometheus text format.
+
+Stages are timed with the `timer` context manager (or `observe` for durations measured elsewhere), they feed a latency
+histogram per stage and name. Caches report their lookups and misses with `increment`. Timings measured while a request
+is being tracked (see `start_request`) are also gathered per stage for the Server-Timing header.
+
+Metrics are kept in the memory of each process: when the server runs several worker processes (e.g. gunicorn
+--workers N), a scrape of /metrics only returns the metrics of the worker that handled it. Scrape every worker (or run
+a single worker with threads) to get complete figures; the result cache hit ratios are only approximated otherwise.
+
+Usage example:
+
+    >>> with METRICS.timer('gain', name=gain.__name__):
+    ...     income = gain.average_income(**parameters)
+    >>> METRICS.render_prometheus()
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple, List, Optional
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.)
+"""Upper bounds (in seconds) of the latency histograms buckets"""
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative latency histogram (not thread safe by itself, see MetricsRegistry)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        """Return the number of observations lower or equal to each bucket bound (+Inf included)"""
+        counts = []
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    labels = labels + extra
+    if not labels:
+        return ""
+    return "{{{}}}".format(",".join('{}="{}"'.format(key, _escape_label_value(value)) for key, value in labels))
+
+
+class MetricsRegistry:
+    """Thread safe store of the latency histograms and counters of the process"""
+
+    def __init__(self, prefix: str = "wins", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._histograms: Dict[Labels, Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self._request = threading.local()
+
+    # ----- Recording -----
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """Record the duration of an execution of a stage"""
+        key = (('stage', stage),) + tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        request_timings = getattr(self._request, 'timings', None)
+        if request_timings is not None:
+            request_timings[stage] = request_timings.get(stage, 0.) + seconds
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """Context manager recording the duration of its block (even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def increment(self, counter: str, amount: float = 1, **labels):
+        """Increment a counter (e.g. 'cache_lookups' and 'cache_misses' with a cache label)"""
+        key = (counter, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter_value(self, counter: str, **labels) -> float:
+        return self._counters.get((counter, tuple(sorted(labels.items()))), 0)
+
+    # ----- Per request timings -----
+
+    def start_request(self):
+        """Start gathering the stage timings of the current thread (i.e. of the request it handles)"""
+        self._request.timings = {}
+
+    def end_request(self) -> Optional[Dict[str, float]]:
+        """Stop gathering the stage timings of the current thread and return them {stage: total seconds}"""
+        timings = getattr(self._request, 'timings', None)
+        self._request.timings = None
+        return timings
+
+    @staticmethod
+    def server_timing_header(timings: Dict[str, float]) -> str:
+        """Format stage timings as a Server-Timing HTTP header value"""
+        return ", ".join("{};dur={:.2f}".format(stage, seconds * 1000) for stage, seconds in timings.items())
+
+    # ----- Export -----
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        """Return the hit ratio of every cache that reported lookups"""
+        with self._lock:
+            counters = dict(self._counters)
+        ratios = {}
+        for (counter, labels), lookups in counters.items():
+            if counter == 'cache_lookups' and lookups > 0:
+                misses = counters.get(('cache_misses', labels), 0)
+                ratios[dict(labels).get('cache', '')] = 1 - misses / lookups
+        return ratios
+
+    def render_prometheus(self) -> str:
+        """Return all the metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: (histogram.cumulative_counts(), histogram.sum, histogram.count)
+                          for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        duration_metric = "{}_stage_duration_seconds".format(self.prefix)
+        lines.append("# HELP {} Latency of the simulation and rendering stages".format(duration_metric))
+        lines.append("# TYPE {} histogram".format(duration_metric))
+        for labels, (cumulative_counts, total, count) in sorted(histograms.items()):
+            for bound, cumulative_count in zip([str(bound) for bound in self.buckets] + ["+Inf"], cumulative_counts):
+                lines.append("{}_bucket{} {}".format(duration_metric, _format_labels(labels, (('le', bound),)),
+                                                     cumulative_count))
+            lines.append("{}_sum{} {}".format(duration_metric, _format_labels(labels), total))
+            lines.append("{}_count{} {}".format(duration_metric, _format_labels(labels), count))
+
+        for counter in sorted({counter for counter, _ in counters}):
+            counter_metric = "{}_{}_total".format(self.prefix, counter)
+            lines.append("# TYPE {} counter".format(counter_metric))
+            for (name, labels), value in sorted(counters.items()):
+                if name == counter:
+                    lines.append("{}{} {}".format(counter_metric, _format_labels(labels), value))
+
+        ratio_metric = "{}_cache_hit_ratio".format(self.prefix)
+        lines.append("# TYPE {} gauge".format(ratio_metric))
+        for cache, ratio in sorted(self.cache_hit_ratios().items()):
+            lines.append("{}{} {}".format(ratio_metric, _format_labels((('cache', cache),)), ratio))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+METRICS = MetricsRegistry()
+"""Metrics of the process (not shared with the other worker processes of the server)"""
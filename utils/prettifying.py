@@ -22,9 +22,10 @@
 """
 import math
 import re
-from typing import Optional, Union
+import sys
+from typing import Optional, Union, List, Iterable
 
-import pandas
+import numpy
 
 from lang.languages import Language, TranslatableString
 
@@ -42,8 +43,11 @@ def human_readable(value: int, erase_under: Optional[float] = None) -> str:
     :return: str
     """
     # Check for values to eraze
+    # Note: pandas isn't imported just for that check, if it isn't already imported value can't be pandas.NA anyway
+    if 'pandas' in sys.modules and value is sys.modules['pandas'].NA:
+        return ""
     abs_value = abs(value)
-    if (value is pandas.NA) or (math.isnan(value)) or (erase_under is not None and abs_value <= erase_under):
+    if (math.isnan(value)) or (erase_under is not None and abs_value <= erase_under):
         return ""
 
     # Find the closest meta unit
@@ -54,6 +58,31 @@ def human_readable(value: int, erase_under: Optional[float] = None) -> str:
     assert False
 
 
+_meta_unit_thresholds = numpy.array([1000. ** (k + 1) for k in range(len(_meta_unit_list) - 1)])
+
+
+def human_readable_array(values: Iterable[float], erase_under: Optional[float] = None) -> List[str]:
+    """
+    Vectorized version of human_readable, for formatting many values at once (e.g. a whole table).
+
+    :param values: Iterable[float], the values to prettify
+    :param erase_under: Optional[float], see human_readable
+    :return: List[str], the prettified values in the same order
+    """
+    values = numpy.asarray(values, dtype=float).ravel()
+    abs_values = numpy.abs(values)
+    erased = numpy.isnan(values)
+    if erase_under is not None:
+        erased |= abs_values <= erase_under
+    # Index of the meta unit of each value (the number of thresholds it reaches)
+    meta_units = numpy.searchsorted(_meta_unit_thresholds, abs_values, side='right')
+    # Note: python round is used instead of numpy.round as they don't always agree on halves
+    scaled_values = abs_values / 1000. ** meta_units
+    return ["" if is_erased else "{}{}{}".format('-' if value < 0 else '', round(scaled_value, 2), _meta_unit_list[k])
+            for is_erased, value, scaled_value, k in zip(erased.tolist(), values.tolist(), scaled_values.tolist(),
+                                                          meta_units.tolist())]
+
+
 def camelcase_2_spaced(camelcase_text: str, unbreakable_spaces=False) -> str:
     """
     Convert a CamelCase name into a space separated name.
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import collections
-from enum import EnumMeta
+from enum import EnumMeta, Enum
 from typing import Type, Union, Iterable, Optional, Callable, TypeVar, List
 
 from lang.languages import TranslatableString
@@ -93,3 +93,49 @@ class UIParameter:
         """Callback to use to update the UIParameter attributes when values of one of its dependencies change"""
         assert self._update_callback_function is not None
         self.value_range, self.display_range = (tuple(r) for r in self._update_callback_function(*dependencie_values))
+
+    @property
+    def default_value(self):
+        """The value selected by default (for int and bool parameters, the default value itself)"""
+        if isinstance(self.value_range, tuple):
+            return self.value_range[min(len(self.value_range) - 1, self.default_value_index)]
+        return self.default_value_index
+
+    def display_value(self, value) -> str:
+        """Return the text representing the given value in the UI"""
+        if isinstance(self.value_range, tuple) and value in self.value_range:
+            return str(self.display_range[self.value_range.index(value)])
+        return str(value)
+
+    def parse_value(self, raw_value):
+        """
+        Convert a value from a serialized format (JSON, command line, parameter file...) into a parameter value.
+
+        Values of list like parameters can be given as the value itself (if it's a JSON type, tuples being given as
+        lists), as its display text, or for enums as the member name.
+
+        :raise ValueError: if the raw value doesn't match any valid value
+        """
+        if self.value_range is bool:
+            if isinstance(raw_value, str) and raw_value.lower() in ('true', 'false'):
+                return raw_value.lower() == 'true'
+            if raw_value not in (True, False):
+                raise ValueError("{} expects a boolean, got {!r}".format(self.parameter_name, raw_value))
+            return bool(raw_value)
+        elif self.value_range is int:
+            try:
+                return int(raw_value)
+            except (TypeError, ValueError):
+                raise ValueError("{} expects an integer, got {!r}".format(self.parameter_name, raw_value)) from None
+        else:
+            for value, display in zip(self.value_range, self.display_range):
+                if (raw_value == str(display)
+                        or (isinstance(value, Enum) and raw_value == value.name)
+                        or (not isinstance(value, Enum) and not isinstance(raw_value, str) and (
+                            raw_value == value or (isinstance(raw_value, list) and tuple(raw_value) == value)))):
+                    return value
+                if isinstance(raw_value, str) and not isinstance(value, (Enum, str)) and raw_value == str(value):
+                    # Numbers given as text (e.g. from a command line)
+                    return value
+            raise ValueError("Invalid value {!r} for {}, expected one of: {}".format(
+                raw_value, self.parameter_name, ", ".join(str(display) for display in self.display_range)))